@@ -3,56 +3,36 @@
 
 WEB_DIRECTORY = "./js"
 
-from .nodes.RGBYPMaskBridge import NODE_CLASS_MAPPINGS as RGBYP_BR_MAPPINGS
-from .nodes.RGBYPMaskBridge import NODE_DISPLAY_NAME_MAPPINGS as RGBYP_BR_DISPLAY
-
-from .nodes.RGBYPLoadImage import NODE_CLASS_MAPPINGS as LI_MAPPINGS
-from .nodes.RGBYPLoadImage import NODE_DISPLAY_NAME_MAPPINGS as LI_DISPLAY
-
-from .nodes.RGBYPMaskToRegularMasks import NODE_CLASS_MAPPINGS as TOM_MAPPINGS
-from .nodes.RGBYPMaskToRegularMasks import NODE_DISPLAY_NAME_MAPPINGS as TOM_DISPLAY
-
-from .nodes.RGBYPMaskStrength import NODE_CLASS_MAPPINGS as MS_MAPPINGS
-from .nodes.RGBYPMaskStrength import NODE_DISPLAY_NAME_MAPPINGS as MS_DISPLAY
-
-from .nodes.RGBYPMaskStrengthOut import NODE_CLASS_MAPPINGS as MSOUT_MAPPINGS
-from .nodes.RGBYPMaskStrengthOut import NODE_DISPLAY_NAME_MAPPINGS as MSOUT_DISPLAY
-
-from .nodes.RGBYPMaskCompositeWithStrength import NODE_CLASS_MAPPINGS as COMP_MAPPINGS
-from .nodes.RGBYPMaskCompositeWithStrength import NODE_DISPLAY_NAME_MAPPINGS as COMP_DISPLAY
-
-from .nodes.RGBYPSaveMask import NODE_CLASS_MAPPINGS as SM_MAPPINGS
-from .nodes.RGBYPSaveMask import NODE_DISPLAY_NAME_MAPPINGS as SM_DISPLAY
-
-from .nodes.MaskGrowBlur import NODE_CLASS_MAPPINGS as MGB_MAPPINGS
-from .nodes.MaskGrowBlur import NODE_DISPLAY_NAME_MAPPINGS as MGB_DISPLAY
-
-from .nodes.RGBYPMaskToList import NODE_CLASS_MAPPINGS as MTL_MAPPINGS
-from .nodes.RGBYPMaskToList import NODE_DISPLAY_NAME_MAPPINGS as MTL_DISPLAY
+# Node modules are imported on first use of their node, not at startup
+# (see nodes/rgbyp_lazy.py). Every node is registered here by
+# (module, node name, display name), keep this table in sync with the
+# NODE_CLASS_MAPPINGS / NODE_DISPLAY_NAME_MAPPINGS of the modules —
+# nodes/rgbyp_import_bench.py --check verifies it.
+from .nodes.rgbyp_lazy import build_mappings
+from .nodes.rgbyp_routes import register_routes
+
+NODES = [
+    (".nodes.RGBYPMaskBridge", "RGBYPMaskBridge", "RGBYP Mask Bridge"),
+    (".nodes.RGBYPLoadImage", "RGBYPLoadImage", "RGBYP Load Image"),
+    (".nodes.RGBYPMaskToRegularMasks", "RGBYPMaskToRegularMasks", "RGBYP Mask To Regular Masks"),
+    (".nodes.RGBYPMaskStrength", "RGBYPMaskStrength", "RGBYP Mask Strength"),
+    (".nodes.RGBYPMaskStrengthOut", "RGBYPMaskStrengthOut", "RGBYP Mask Strength Out"),
+    (".nodes.RGBYPMaskCompositeWithStrength", "RGBYPMaskCompositeWithStrength", "RGBYP Mask Composite (With Strength)"),
+    (".nodes.RGBYPSaveMask", "RGBYPSaveMask", "RGBYP Save Mask"),
+    (".nodes.MaskGrowBlur", "MaskGrowBlur", "Mask Grow Blur"),
+    (".nodes.RGBYPMaskToList", "RGBYPMaskToList", "RGBYP Mask To List"),
+    (".nodes.RGBYPLayoutMask", "RGBYPLayoutMask", "RGBYP Layout Mask"),
+    (".nodes.RGBYPLabelsConvert", "RGBYPMaskToLabels", "RGBYP Mask To Labels"),
+    (".nodes.RGBYPLabelsConvert", "RGBYPLabelsToMask", "RGBYP Labels To Mask"),
+    (".nodes.RGBYPMaskKeyframes", "RGBYPMaskKeyframes", "RGBYP Mask Keyframes"),
+    (".nodes.RGBYPCropRegions", "RGBYPCropRegions", "RGBYP Crop Regions"),
+    (".nodes.RGBYPCropRegions", "RGBYPStitchRegions", "RGBYP Stitch Regions"),
+]
 
-NODE_CLASS_MAPPINGS = {
-    **RGBYP_BR_MAPPINGS,
-    **LI_MAPPINGS,
-    **TOM_MAPPINGS,
-    **MS_MAPPINGS,
-    **MSOUT_MAPPINGS,
-    **COMP_MAPPINGS,
-    **SM_MAPPINGS,
-    **MGB_MAPPINGS,
-    **MTL_MAPPINGS,
-}
+NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS = build_mappings(__name__, NODES)
 
-NODE_DISPLAY_NAME_MAPPINGS = {
-    **RGBYP_BR_DISPLAY,
-    **LI_DISPLAY,
-    **TOM_DISPLAY,
-    **MS_DISPLAY,
-    **MSOUT_DISPLAY,
-    **COMP_DISPLAY,
-    **SM_DISPLAY,
-    **MGB_DISPLAY,
-    **MTL_DISPLAY,
-}
+# editor endpoints (tile pyramids), stdlib-only until a request comes in
+register_routes()
 
 __all__ = [
     "NODE_CLASS_MAPPINGS",
@@ -0,0 +1,109 @@
+import { api } from "../../scripts/api.js";
+
+// Client of /rgbyp/bundle (nodes/rgbyp_bundle.py): a state JSON and its files,
+// or any set of files, in one request. The browser revalidates with the ETag
+// (unchanged bundle → 304), and parts received before are kept here by etag
+// and named in have=, so the server lists them without sending them again.
+
+const PART_CACHE_MAX = 64;
+const partCache = new Map(); // etag -> { blob, url }
+const lastEtags = new Map(); // request key -> etags of its last response
+
+const MIME = { png: "image/png", jpg: "image/jpeg", jpeg: "image/jpeg", json: "application/json" };
+
+function mimeFor(name) {
+    const dot = (name || "").lastIndexOf(".");
+    return MIME[dot >= 0 ? name.slice(dot + 1).toLowerCase() : ""] || "application/octet-stream";
+}
+
+function remember(etag, blob) {
+    // same etag, same bytes (e.g. a 304 served from the HTTP cache): keep the entry
+    const entry = partCache.get(etag) || { blob, url: null };
+    partCache.delete(etag);
+    partCache.set(etag, entry);
+    while (partCache.size > PART_CACHE_MAX) {
+        const [oldest, entry] = partCache.entries().next().value;
+        if (entry.url) URL.revokeObjectURL(entry.url);
+        partCache.delete(oldest);
+    }
+}
+
+// object URL of a received part (one per etag, reused)
+export function partUrl(part) {
+    const entry = part?.etag ? partCache.get(part.etag) : null;
+    if (!entry) return null;
+    if (!entry.url) entry.url = URL.createObjectURL(entry.blob);
+    return entry.url;
+}
+
+function parseBundle(buf) {
+    const view = new DataView(buf);
+    const headLen = view.getUint32(0);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 4, headLen)));
+    const base = 4 + headLen;
+    const parts = {};
+    let complete = true;
+
+    for (const p of header.parts || []) {
+        const part = { name: p.name, etag: p.etag || null, missing: !!p.missing, pyramid: p.pyramid || null };
+        if (p.length) {
+            remember(p.etag, new Blob([new Uint8Array(buf, base + p.offset, p.length)], { type: mimeFor(p.name) }));
+        } else if (p.cached && !partCache.has(p.etag)) {
+            complete = false;
+        } else if (p.cached) {
+            // most recently used again
+            const entry = partCache.get(p.etag);
+            partCache.delete(p.etag);
+            partCache.set(p.etag, entry);
+        }
+        part.blob = part.etag && partCache.has(part.etag) ? partCache.get(part.etag).blob : null;
+        parts[p.key] = part;
+    }
+    return { meta: header.meta ?? null, parts, complete };
+}
+
+/**
+ * meta:    state JSON name in temp (its original / mask / composite are added)
+ * parts:   which of those ("original", "mask", "composite"), default all
+ * files:   other files as "<temp|input|output>/<subfolder/name>"
+ * pyramid: leave out an original that has a tile pyramid (part.pyramid = info)
+ * head:    only list the parts (etags), no file bytes
+ *
+ * Returns { meta, parts: { key: { name, etag, blob, missing, pyramid } } },
+ * null when the request failed.
+ */
+export async function fetchBundle({ meta = null, parts = null, files = [], pyramid = false, head = false } = {}) {
+    const q = new URLSearchParams();
+    if (meta) q.set("meta", meta);
+    if (parts) q.set("parts", parts.join(","));
+    for (const f of files) q.append("file", f);
+    if (pyramid) q.set("pyramid", "1");
+    if (head) q.set("head", "1");
+    const key = q.toString();
+
+    for (const useHave of [true, false]) {
+        const params = new URLSearchParams(q);
+        const have = useHave && !head ? (lastEtags.get(key) || []).filter((e) => partCache.has(e)) : [];
+        if (have.length) params.set("have", have.join(","));
+
+        let resp;
+        try {
+            resp = await api.fetchApi(`/rgbyp/bundle?${params}`, { method: "GET", cache: "no-cache" });
+        } catch (e) {
+            console.warn("[RGBYP] bundle request failed", e);
+            return null;
+        }
+        if (!resp.ok) {
+            console.warn("[RGBYP] bundle request failed", resp.status);
+            return null;
+        }
+
+        const bundle = parseBundle(await resp.arrayBuffer());
+        // a listed part dropped out of the cache meanwhile: ask for everything
+        if (!bundle.complete) continue;
+
+        lastEtags.set(key, Object.values(bundle.parts).map((p) => p.etag).filter(Boolean));
+        return bundle;
+    }
+    return null;
+}
@@ -1,5 +1,6 @@
 import { api } from "../../scripts/api.js";
 import { app } from "../../../scripts/app.js";
+import { canvasToPngBlob, uploadIfAbsent } from "./RGBYPUpload.js";
 
 // RGBYPLoadImage.js
 // Adds a "Load Mask" button to RGBYPLoadImage node and handles mask upload, resize, composite, and temp/json saving.
@@ -39,16 +40,6 @@ let imageWidget = null;
     }
 
     // Utility: load HTMLImageElement from URL
-    function loadImageFromUrl(url) {
-        return new Promise((resolve, reject) => {
-            const img = new Image();
-            img.crossOrigin = "anonymous";
-            img.onload = () => resolve(img);
-            img.onerror = (e) => reject(e);
-            img.src = url;
-        });
-    }
-
     // Utility: resize an image into a canvas
     function resizeToCanvas(img, width, height) {
         const canvas = document.createElement("canvas");
@@ -257,20 +248,23 @@ let imageWidget = null;
                 const origUrl = api.apiURL(
                     `/view?filename=${encodeURIComponent(imageName)}&type=input&subfolder=`
                 );
-                const origImg = await loadImageFromUrl(origUrl);
+                const origResp = await fetch(origUrl);
+                if (!origResp.ok) throw new Error(`Failed to load image (${origResp.status})`);
+                const origBlob = await origResp.blob();
+                const origImg = await loadImageFromFile(origBlob);
 
                 const originalWidth = origImg.width;
                 const originalHeight = origImg.height;
 
-                // Resize original to canvas and also upload a copy to temp as originalFileName
+                // Resize original to canvas and also put a copy into temp as originalFileName:
+                // a PNG input is copied by the server, anything else is converted here
+                // (uploaded only if temp does not already hold these bytes)
                 const originalCanvas = resizeToCanvas(origImg, originalWidth, originalHeight);
-                await new Promise((resolve, reject) => {
-                    originalCanvas.toBlob(async (blob) => {
-                        if (!blob) return reject(new Error("Failed to create original blob"));
-                        await uploadImageToTemp(originalFileName, blob);
-                        resolve();
-                    }, "image/png");
-                });
+                if (origBlob.type === "image/png") {
+                    await uploadIfAbsent(origBlob, originalFileName, { sources: [`input/${imageName}`] });
+                } else {
+                    await uploadIfAbsent(await canvasToPngBlob(originalCanvas), originalFileName);
+                }
 
                 // Load selected mask file as image and resize to match original
                 const maskImg = await loadImageFromFile(file);
@@ -1,5 +1,6 @@
 import { app } from "/scripts/app.js";
 import { api } from "/scripts/api.js";
+import { fetchBundle } from "./RGBYPBundle.js";
 
 let jsonFileName = null;
 let originalFileName = null;
@@ -33,16 +34,6 @@ function loadImageFromFile(file) {
     });
 }
 
-function loadImageFromUrl(url) {
-    return new Promise((resolve, reject) => {
-        const img = new Image();
-        img.crossOrigin = "anonymous";
-        img.onload = () => resolve(img);
-        img.onerror = (e) => reject(e);
-        img.src = url;
-    });
-}
-
 function resizeToCanvas(img, width, height) {
     const canvas = document.createElement("canvas");
     canvas.width = width;
@@ -111,41 +102,6 @@ function getNodePreviewSrc(node) {
     return img0.src || img0?.img?.src || null;
 }
 
-function tryResolveFilenameFromSrc(src) {
-    if (!src) return null;
-
-    try {
-        const url = new URL(src, window.location.origin);
-        const qFilename = url.searchParams.get("filename");
-        if (qFilename) return decodeURIComponent(qFilename);
-
-        const parts = url.pathname.split("/");
-        return parts[parts.length - 1] || null;
-    } catch (e) {
-        const m = String(src).match(/filename=([^&]+)/);
-        if (m) return decodeURIComponent(m[1]);
-    }
-    return null;
-}
-
-function normalizeBaseName(nameNoExt, uniqueId) {
-    let s = String(nameNoExt || "");
-
-    const id = String(uniqueId ?? "");
-    if (id) {
-        s = s.replace(new RegExp(`_${id}_(original|mask|composite)$`), "");
-    }
-
-    s = s.replace(/_(original|mask|composite)$/, "");
-
-    return s;
-}
-
-function stripExt(name) {
-    const dot = name.lastIndexOf(".");
-    return dot > 0 ? name.slice(0, dot) : name;
-}
-
 function getUniqueId(node) {
     return node?.properties?.unique_id ?? node?.properties?._unique_id ?? node?.id;
 }
@@ -238,40 +194,32 @@ function ensureMaskBridgeButtons(node) {
             `/view?filename=${encodeURIComponent(jsonName)}&type=temp&subfolder=`
         );
         const meta = await fetch(jsonUrl).then(r => r.json());
-        originalFileName = meta.original;
-        const src = api.apiURL(
-            `/view?filename=${encodeURIComponent(originalFileName)}&type=temp&subfolder=`
-        );
-
-        const filename = tryResolveFilenameFromSrc(src);
-        if (!filename) {
-            console.warn("[RGBYPMaskBridge] Cannot resolve filename from current preview, aborting.");
+        if (!meta?.original) {
+            console.warn("[RGBYPMaskBridge] No original in state, run the workflow first.");
             return;
         }
+        const src = api.apiURL(
+            `/view?filename=${encodeURIComponent(meta.original)}&type=temp&subfolder=`
+        );
 
-        const nameNoExt = stripExt(filename);
-        const clean = normalizeBaseName(nameNoExt, uniqueId);
-        const baseName = `${clean}_${uniqueId}`;
-
+        // the state stays in RGBYP_<unique_id>.json and keeps pointing at the
+        // stored original (rgbyp_original_<sha>.png), which is already in temp
+        const baseName = `RGBYP_${uniqueId}`;
 
-        jsonFileName = `${baseName}.json`;
-        originalFileName = `${baseName}_original.png`;
+        jsonFileName = jsonName;
+        originalFileName = meta.original;
         maskFileName = `${baseName}_mask.png`;
         compositeFileName = `${baseName}_composite.png`;
 
         try {
-            const origImg = await loadImageFromUrl(src);
+            const origResp = await fetch(src);
+            if (!origResp.ok) throw new Error(`Failed to load original (${origResp.status})`);
+            const origBlob = await origResp.blob();
+            const origImg = await loadImageFromFile(origBlob);
             const originalWidth = origImg.width;
             const originalHeight = origImg.height;
 
             const originalCanvas = resizeToCanvas(origImg, originalWidth, originalHeight);
-            await new Promise((resolve, reject) => {
-                originalCanvas.toBlob(async (blob) => {
-                    if (!blob) return reject(new Error("Failed to create original blob"));
-                    await uploadImageToTemp(originalFileName, blob);
-                    resolve();
-                }, "image/png");
-            });
 
             const maskImg = await loadImageFromFile(file);
             const maskCanvas = resizeToCanvas(maskImg, originalWidth, originalHeight);
@@ -404,10 +352,23 @@ async function redrawRGBYPMaskBridgeNodes(appInstance) {
 
     let updatedCount = 0;
 
+    // versions of all Bridge composites in one request; a node only reloads
+    // its preview when its composite changed
+    const compositeFiles = new Map();
+    for (const node of rgbypNodes) {
+        const name = compositeFilenameForNode(node);
+        if (name) compositeFiles.set(node, name);
+    }
+
+    const bundle = compositeFiles.size
+        ? await fetchBundle({ files: [...new Set(compositeFiles.values())].map((n) => `input/rgbyp/${n}`), head: true })
+        : null;
+
     for (const node of rgbypNodes) {
         try {
             // ensureMaskBridgeButtons(node);
-            const updated = await tryUpdateCompositePreviewForNode(node);
+            const name = compositeFiles.get(node);
+            const updated = updateCompositePreviewForNode(node, name, bundle?.parts[`input/rgbyp/${name}`]);
             if (updated) {
                 updatedCount++;
             }
@@ -428,10 +389,10 @@ async function redrawRGBYPMaskBridgeNodes(appInstance) {
     // console.log("—————— [RGBYPMaskBridgeRedraw] redraw end ——————");
 }
 
-async function tryUpdateCompositePreviewForNode(node) {
+function compositeFilenameForNode(node) {
     if (!node) {
-        console.warn("[RGBYPMaskBridgeRedraw] tryUpdateCompositePreviewForNode: node is null/undefined");
-        return false;
+        console.warn("[RGBYPMaskBridgeRedraw] compositeFilenameForNode: node is null/undefined");
+        return null;
     }
 
     // Take the current image from node.img or node.imgs[0]
@@ -442,7 +403,7 @@ async function tryUpdateCompositePreviewForNode(node) {
 
     if (!currentImg || !currentImg.src) {
         // console.log(`[RGBYPMaskBridgeRedraw] node id=${node.id}: no current img/src → skip`);
-        return false;
+        return null;
     }
 
     const src = currentImg.src;
@@ -472,7 +433,7 @@ async function tryUpdateCompositePreviewForNode(node) {
 
     if (!filename) {
         console.warn(`[RGBYPMaskBridgeRedraw] node id=${node.id}: cannot resolve filename from src`);
-        return false;
+        return null;
     }
 
     // console.log(`[RGBYPMaskBridgeRedraw] node id=${node.id}: resolved filename='${filename}'`);
@@ -488,42 +449,28 @@ async function tryUpdateCompositePreviewForNode(node) {
         compositeFilename = `${baseName}_rgbyp_composite.png`;
     }
 
-    /*     console.log(
-            `[RGBYPMaskBridgeRedraw] node id=${node.id}: composite filename candidate='${compositeFilename}'`
-        );
-     */
-    // URL for checking and loading composite from input/rgbyp
-    const compositeUrl = `/view?filename=${encodeURIComponent(
-        compositeFilename
-    )}&type=input&subfolder=rgbyp&_t=${Date.now()}`;
+    return compositeFilename;
+}
 
-    /*     console.log(
-            `[RGBYPMaskBridgeRedraw] node id=${node.id}: checking composite URL='${compositeUrl}'`
-        );
-     */
-    // Try to request the image; if 404 — composite does not exist yet
-    let resp;
-    try {
-        resp = await fetch(compositeUrl, { method: "GET" });
-    } catch (e) {
-        console.error(
-            `[RGBYPMaskBridgeRedraw] node id=${node.id}: error fetching composite:`,
-            e
-        );
+// Point the node preview at its composite in input/rgbyp, versioned by the
+// bundle etag so the browser cache is used until it changes. Returns false
+// when the composite does not exist yet or did not change.
+function updateCompositePreviewForNode(node, compositeFilename, part) {
+    if (!compositeFilename || !part || part.missing || !part.etag) {
         return false;
     }
+    const url = api.apiURL(
+        `/view?filename=${encodeURIComponent(compositeFilename)}&type=input&subfolder=rgbyp&_v=${part.etag}`
+    );
 
-    if (!resp.ok) {
-/*         console.log(
-            `[RGBYPMaskBridgeRedraw] node id=${node.id}: composite not found (status ${resp.status}) → skip`
-        );
- */        return false;
+    let currentImg = node.img;
+    if (!currentImg && Array.isArray(node.imgs) && node.imgs.length > 0) {
+        currentImg = node.imgs[0];
+    }
+    if (currentImg && currentImg.src === new URL(url, window.location.origin).href) {
+        // unchanged since the last redraw
+        return false;
     }
-
-    /*     console.log(
-            `[RGBYPMaskBridgeRedraw] node id=${node.id}: composite EXISTS → updating node preview`
-        );
-     */
 
     let oldImg = node.img;
     if (!oldImg && Array.isArray(node.imgs) && node.imgs.length > 0) {
@@ -532,9 +479,8 @@ async function tryUpdateCompositePreviewForNode(node) {
     if (oldImg) {
         releaseImage(oldImg);
     }
-    // We will not use resp.body, we just create an Image with the same URL
     const img = new Image();
-    img.src = compositeUrl;
+    img.src = url;
 
     node.img = img;
     if (Array.isArray(node.imgs)) {
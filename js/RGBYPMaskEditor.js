@@ -25,6 +25,10 @@ export function cleanupEditorState(nodeId) {
         releaseImage(state.baseImg);
         state.baseImg = null;
     }
+    state.baseOriginal = null;
+    state.baseReady = null;
+    state.baseBlob = null;
+    state.baseSource = null;
     if (state.maskImg) {
         releaseImage(state.maskImg);
         state.maskImg = null;
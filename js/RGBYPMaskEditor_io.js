@@ -2,6 +2,8 @@ import { api } from "../../scripts/api.js";
 import { app } from "../../scripts/app.js";
 
 import { GP } from "./RGBYPMaskEditor.js";
+import { fetchBundle, partUrl } from "./RGBYPBundle.js";
+import { canvasToPngBlob, uploadIfAbsent } from "./RGBYPUpload.js";
 import { getNodeState } from "./RGBYPMaskEditor.js";
 import { setNodeState } from "./RGBYPMaskEditor.js";
 
@@ -17,6 +19,123 @@ function loadImageFromUrl(url) {
     });
 }
 
+// --- tile pyramids of big Bridge originals (nodes/rgbyp_pyramid.py) ---
+const PYRAMID_PREVIEW_MAX = 1024;
+const PYRAMID_TILE_FETCHES = 4;
+
+function originalSha(fileName) {
+    const m = /^rgbyp_original_([0-9a-f]{8,64})\.png$/.exec(fileName || "");
+    return m ? m[1] : null;
+}
+
+// A Bridge keeps its editor state in RGBYP_<unique_id>.json whatever its
+// preview shows (its original is stored as rgbyp_original_<sha>.png, see
+// nodes/rgbyp_originals.py); other nodes name it after their image.
+function isBridgeNode(node) {
+    return (node?.type || node?.comfyClass) === "RGBYPMaskBridge";
+}
+
+function stateBaseName(node) {
+    if (isBridgeNode(node)) return "RGBYP";
+    const filename = getNodeImageFilename(node);
+    if (!filename) return null;
+    const dot = filename.lastIndexOf(".");
+    return dot >= 0 ? filename.slice(0, dot) : filename;
+}
+
+function loadPyramidTile(info, level, col, row) {
+    const url = api.apiURL(`/rgbyp/pyramid/${info.sha}/${level.level}/${col}_${row}.${info.format}`);
+    return loadImageFromUrl(url).then((img) => ({ img, col, row }));
+}
+
+function drawPyramidTile(ctx, info, level, tile) {
+    const sx = info.width / level.width;
+    const sy = info.height / level.height;
+    const x = tile.col * info.tile * sx;
+    const y = tile.row * info.tile * sy;
+    ctx.drawImage(tile.img, x, y, tile.img.width * sx, tile.img.height * sy);
+}
+
+// all tiles of the biggest level that fits PYRAMID_PREVIEW_MAX (a few requests)
+async function loadPyramidPreview(info) {
+    const level =
+        info.levels.find((l) => Math.max(l.width, l.height) <= PYRAMID_PREVIEW_MAX) ||
+        info.levels[info.levels.length - 1];
+    const jobs = [];
+    for (let row = 0; row < level.rows; row++) {
+        for (let col = 0; col < level.cols; col++) {
+            jobs.push(loadPyramidTile(info, level, col, row));
+        }
+    }
+    return { level, tiles: await Promise.all(jobs) };
+}
+
+// center of the visible part of the image, in image pixels
+function visibleCenter(state, info) {
+    const container = state.canvasContainer;
+    const panel = state.centralPanel || container?.parentElement;
+    if (!container || !panel) return { x: info.width / 2, y: info.height / 2 };
+    const c = container.getBoundingClientRect();
+    const p = panel.getBoundingClientRect();
+    if (!c.width || !c.height) return { x: info.width / 2, y: info.height / 2 };
+    return {
+        x: ((p.left + p.width / 2 - c.left) / c.width) * info.width,
+        y: ((p.top + p.height / 2 - c.top) / c.height) * info.height,
+    };
+}
+
+// full resolution tiles into the original canvas, the ones nearest to the
+// visible area first (re-evaluated per tile, so panning / zooming while
+// loading is followed). Stops when the editor closes.
+async function loadPyramidDetail(state, info) {
+    const canvas = state.originalCanvas;
+    const ctx = canvas.getContext("2d");
+    const level = info.levels[0];
+    const todo = [];
+    for (let row = 0; row < level.rows; row++) {
+        for (let col = 0; col < level.cols; col++) {
+            todo.push({ col, row });
+        }
+    }
+
+    const takeNearest = () => {
+        const center = visibleCenter(state, info);
+        let best = 0;
+        let bestDist = Infinity;
+        for (let i = 0; i < todo.length; i++) {
+            const dx = (todo[i].col + 0.5) * info.tile - center.x;
+            const dy = (todo[i].row + 0.5) * info.tile - center.y;
+            const dist = dx * dx + dy * dy;
+            if (dist < bestDist) {
+                bestDist = dist;
+                best = i;
+            }
+        }
+        return todo.splice(best, 1)[0];
+    };
+
+    let failed = 0;
+    const worker = async () => {
+        while (todo.length && state.originalCanvas === canvas) {
+            const { col, row } = takeNearest();
+            try {
+                const tile = await loadPyramidTile(info, level, col, row);
+                if (state.originalCanvas !== canvas) return;
+                drawPyramidTile(ctx, info, level, tile);
+            } catch (e) {
+                failed++;
+            }
+        }
+    };
+
+    const workers = [];
+    for (let i = 0; i < PYRAMID_TILE_FETCHES; i++) workers.push(worker());
+    await Promise.all(workers);
+    if (failed) {
+        console.warn(`[RGBYP] ${failed} full resolution tiles failed to load`);
+    }
+}
+
 export function initBaseImageAndCanvas() {
     const node = GP.baseNode;
     const state = getNodeState(node.id);
@@ -40,35 +159,21 @@ export function initBaseImageAndCanvas() {
     }
 
     (async () => {
-        const currentFilename = getNodeImageFilename(node) || "";
-        const dot = currentFilename.lastIndexOf(".");
-        const baseName = dot >= 0 ? currentFilename.slice(0, dot) : currentFilename;
+        const baseName = stateBaseName(node) || "";
 
         const metaFilename = `${baseName}_${node.id}.json`;
         let meta = null;
 
-        // --- 1. Try to read meta json from temp ---
-        try {
-            const metaUrl = `/view?filename=${encodeURIComponent(metaFilename)}&type=temp&_t=${Date.now()}`;
-            const resp = await api.fetchApi(metaUrl, { method: "GET" });
-            if (resp.ok) {
-                const text = await resp.text();
-                try {
-                    meta = JSON.parse(text);
-                    // console.log("[RGBYP] initBaseImageAndCanvas: loaded meta", meta);
-                } catch (e) {
-                    console.warn("[RGBYP] initBaseImageAndCanvas: cannot parse meta json", e);
-                    meta = null;
-                }
-            } else {
-                // console.log("[RGBYP] initBaseImageAndCanvas: meta not found, fallback to node image", resp.status);
-            }
-        } catch (e) {
-            console.warn("[RGBYP] initBaseImageAndCanvas: error loading meta", e);
+        // --- 1. Meta json + original + mask from temp, in one request ---
+        // (an original with a tile pyramid is left out, see step 3)
+        const bundle = await fetchBundle({ meta: metaFilename, parts: ["original", "mask"], pyramid: true });
+        if (bundle && bundle.meta) {
+            meta = bundle.meta;
         }
 
         // --- 2. If meta exists — check that it belongs to the current image ---
-        if (meta && typeof meta.original === "string") {
+        // (a Bridge rewrites meta.original with its input on every run)
+        if (meta && typeof meta.original === "string" && !isBridgeNode(node)) {
             const currentFilename = getNodeImageFilename(node) || "";
             const originalFilename = meta.original || "";
 
@@ -89,30 +194,53 @@ export function initBaseImageAndCanvas() {
                  */
                 meta = null;
             }
-        } else {
+        } else if (!meta || typeof meta.original !== "string") {
             // meta is missing or has no original — treat json as unusable
             meta = null;
         }
 
         let baseImg = null;
+        let baseBlob = null;
         let maskImg = null;
+        let pyramid = null;
+        let pyramidPreview = null;
+        let storedOriginal = null;
 
         // --- 3. If meta is valid and belongs to this image — take original/mask from temp ---
         if (meta && meta.original) {
-            try {
-                const originalUrl = `/view?filename=${encodeURIComponent(meta.original)}&type=temp&_t=${Date.now()}`;
-                baseImg = await loadImageFromUrl(originalUrl);
-            } catch (e) {
-                console.warn("[RGBYP] Failed to load original from meta, will fallback to node src", e);
-                baseImg = null;
+            // big originals: a coarse level now, full resolution tiles later
+            // (the server resolves the sha from the state's original)
+            const originalPart = bundle.parts.original;
+            const sha = originalPart?.pyramid?.sha || originalSha(meta.original);
+            if (sha && originalPart?.pyramid) {
+                pyramid = { ...originalPart.pyramid, sha };
+                try {
+                    pyramidPreview = await loadPyramidPreview(pyramid);
+                } catch (e) {
+                    console.warn("[RGBYP] Failed to load tile pyramid, loading the full original", e);
+                    pyramid = null;
+                }
+            }
+
+            if (!pyramid) {
+                try {
+                    const originalUrl = originalPart?.blob
+                        ? partUrl(originalPart)
+                        : `/view?filename=${encodeURIComponent(meta.original)}&type=temp&_t=${Date.now()}`;
+                    baseImg = await loadImageFromUrl(originalUrl);
+                    baseBlob = originalPart?.blob || null;
+                    storedOriginal = originalSha(meta.original) ? meta.original : null;
+                } catch (e) {
+                    console.warn("[RGBYP] Failed to load original from meta, will fallback to node src", e);
+                    baseImg = null;
+                }
             }
 
             // mask may be an empty string → in that case we start with a clean mask
-            const maskFile = (typeof meta.mask === "string" ? meta.mask.trim() : "");
-            if (maskFile) {
+            const maskPart = bundle.parts.mask;
+            if (maskPart?.blob) {
                 try {
-                    const maskUrl = `/view?filename=${encodeURIComponent(maskFile)}&type=temp&_t=${Date.now()}`;
-                    maskImg = await loadImageFromUrl(maskUrl);
+                    maskImg = await loadImageFromUrl(partUrl(maskPart));
                 } catch (e) {
                     console.warn("[RGBYP] Failed to load mask from meta, will start with empty mask", e);
                     maskImg = null;
@@ -124,7 +252,7 @@ export function initBaseImageAndCanvas() {
         }
 
         // --- 4. If baseImg is still not loaded — load from node as before ---
-        if (!baseImg) {
+        if (!baseImg && !pyramid) {
             try {
                 baseImg = await loadImageFromUrl(fallbackSrc);
             } catch (e) {
@@ -134,13 +262,21 @@ export function initBaseImageAndCanvas() {
         }
 
         // --- 5. Store in state ---
-        state.baseImg = baseImg;
+        // with a pyramid the original canvas is the base image; a stored
+        // original (rgbyp_original_<sha>.png) already exists in temp,
+        // saveMask reuses it
+        state.baseImg = pyramid ? state.originalCanvas : baseImg;
+        state.baseOriginal = pyramid ? meta.original : storedOriginal;
+        // bytes of meta.original as the server has them, for upload-if-absent
+        state.baseBlob = baseBlob;
+        state.baseSource = baseBlob ? meta.original : null;
+        state.baseReady = null;
         if (maskImg) {
             state.maskImg = maskImg;
         }
 
-        const imgW = baseImg.naturalWidth || baseImg.width;
-        const imgH = baseImg.naturalHeight || baseImg.height;
+        const imgW = pyramid ? pyramid.width : baseImg.naturalWidth || baseImg.width;
+        const imgH = pyramid ? pyramid.height : baseImg.naturalHeight || baseImg.height;
 
         // console.log("[RGBYP] Loaded base image size:", imgW, imgH);
 
@@ -166,7 +302,13 @@ export function initBaseImageAndCanvas() {
         // --- 6. Draw original ---
         const octx = state.originalCanvas.getContext("2d");
         octx.clearRect(0, 0, imgW, imgH);
-        octx.drawImage(baseImg, 0, 0);
+        if (pyramid) {
+            for (const tile of pyramidPreview.tiles) {
+                drawPyramidTile(octx, pyramid, pyramidPreview.level, tile);
+            }
+        } else {
+            octx.drawImage(baseImg, 0, 0);
+        }
 
         // --- 7. Draw mask if it exists; otherwise leave mask clean ---
         const mctx = state.maskCanvas.getContext("2d");
@@ -192,6 +334,11 @@ export function initBaseImageAndCanvas() {
             containerDiv.style.height = cssH + "px";
         }
 
+        // --- 9. Full resolution tiles, in the background ---
+        if (pyramid && pyramidPreview.level.level !== 0) {
+            state.baseReady = loadPyramidDetail(state, pyramid);
+        }
+
         // console.log("[RGBYP] baseImg + mask (if any) loaded, canvases resized and zoomed out");
     })().catch((e) => {
         console.error("[RGBYP] initBaseImageAndCanvas async error:", e);
@@ -300,15 +447,18 @@ export async function saveMask() {
         return;
     }
 
+    // the composite needs every full resolution tile
+    if (state.baseReady) {
+        await state.baseReady;
+    }
+
     // ---------- 1. Determine the name of the original image from the node ----------
-    const graphImageFilename = getNodeImageFilename(node);
-    if (!graphImageFilename) {
+    const baseName = stateBaseName(node);
+    if (!baseName) {
         console.warn("[RGBYP] saveMask: cannot determine graph image filename");
         return;
     }
 
-    const dot = graphImageFilename.lastIndexOf(".");
-    const baseName = dot >= 0 ? graphImageFilename.slice(0, dot) : graphImageFilename;
     const ext = ".png";
 
     // Default file names (for the new case)
@@ -351,7 +501,14 @@ export async function saveMask() {
     }
 
     // ---------- 4. Save original (only if this is a NEW set) ----------
-    if (!reuseExistingNames) {
+    if (!reuseExistingNames && state.baseOriginal) {
+        // opened from a stored original: it is already in temp
+        originalName = state.baseOriginal;
+    } else if (!reuseExistingNames && state.baseBlob) {
+        // the original's own bytes: the server copies them from its file
+        // instead of receiving them again
+        await uploadIfAbsent(state.baseBlob, originalName, { sources: [`temp/${state.baseSource}`] });
+    } else if (!reuseExistingNames) {
         const tmpCanvas = document.createElement("canvas");
         tmpCanvas.width = baseImg.naturalWidth || baseImg.width;
         tmpCanvas.height = baseImg.naturalHeight || baseImg.height;
@@ -359,9 +516,8 @@ export async function saveMask() {
         const tctx = tmpCanvas.getContext("2d");
         tctx.drawImage(baseImg, 0, 0);
 
-        const originalDataUrl = tmpCanvas.toDataURL("image/png");
-        const originalFile = dataURLtoFile(originalDataUrl, originalName);
-        await uploadComfyFile(originalFile, "temp");
+        // same pixels encode to the same bytes: repeated saves skip the upload
+        await uploadIfAbsent(await canvasToPngBlob(tmpCanvas), originalName);
 
         // ❌ REMOVED: SHA calculation
         // const sha = await computeSHA1FromImage(baseImg);
@@ -0,0 +1,54 @@
+// RGBYPMaskToRegularMasks.js
+// Keeps the "active_outputs" widget in sync with the connected outputs,
+// so the python node only computes (and grows/blurs) masks that are actually used.
+// The Bridge and RGBYPLoadImage use it to keep only the connected one of
+// rgbyp_mask / rgbyp_labels.
+
+import { app } from "../../../scripts/app.js";
+
+const NODE_NAMES = new Set(["RGBYPMaskToRegularMasks", "RGBYPMaskBridge", "RGBYPLoadImage"]);
+const WIDGET_NAME = "active_outputs";
+
+function syncActiveOutputs(node) {
+    if (!node || !Array.isArray(node.widgets)) return;
+
+    const widget = node.widgets.find((w) => w && w.name === WIDGET_NAME);
+    if (!widget) return;
+
+    const connected = [];
+    for (const output of node.outputs || []) {
+        if (output && Array.isArray(output.links) && output.links.length > 0) {
+            connected.push(output.name);
+        }
+    }
+
+    // nothing connected → empty value means "compute all"
+    const value = connected.join(",");
+    if (widget.value === value) return;
+
+    widget.value = value;
+    if (node.graph?.setDirtyCanvas) node.graph.setDirtyCanvas(true, true);
+}
+
+app.registerExtension({
+    name: "RGBYPMaskToRegularMasks.ActiveOutputs",
+
+    beforeRegisterNodeDef(nodeType, nodeData) {
+        if (!NODE_NAMES.has(nodeData?.name)) return;
+
+        const oldOnConnectionsChange = nodeType.prototype.onConnectionsChange;
+        nodeType.prototype.onConnectionsChange = function () {
+            const r = oldOnConnectionsChange ? oldOnConnectionsChange.apply(this, arguments) : undefined;
+            syncActiveOutputs(this);
+            return r;
+        };
+
+        const oldOnConfigure = nodeType.prototype.onConfigure;
+        nodeType.prototype.onConfigure = function () {
+            const r = oldOnConfigure ? oldOnConfigure.apply(this, arguments) : undefined;
+            // links are restored after configure → sync on the next tick
+            setTimeout(() => syncActiveOutputs(this), 0);
+            return r;
+        };
+    },
+});
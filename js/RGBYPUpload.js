@@ -0,0 +1,69 @@
+import { api } from "../../scripts/api.js";
+
+// Upload-if-absent (nodes/rgbyp_uploads.py): before uploading, send the
+// SHA-256 of the bytes and where they came from; the server replies whether it
+// already has them (or copied them from a source), so only missing files are
+// uploaded. Without crypto.subtle (plain http on a LAN address) it uploads.
+
+async function sha256Hex(blob) {
+    if (!globalThis.crypto?.subtle) return null;
+    try {
+        const digest = await crypto.subtle.digest("SHA-256", await blob.arrayBuffer());
+        return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+    } catch (e) {
+        return null;
+    }
+}
+
+async function isPresent(blob, target, sources) {
+    const sha256 = await sha256Hex(blob);
+    if (!sha256) return false;
+    try {
+        const resp = await api.fetchApi("/rgbyp/upload/check", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ files: [{ target, sha256, size: blob.size, sources }] }),
+        });
+        if (!resp.ok) return false;
+        const info = await resp.json();
+        return !!info?.files?.[0]?.present;
+    } catch (e) {
+        return false;
+    }
+}
+
+/**
+ * Make sure <type>/<subfolder>/<filename> holds blob, uploading only when the
+ * server does not have these bytes there or in one of sources
+ * ("<type>/<subfolder/name>" files the bytes were read from).
+ * Returns true when the file is in place.
+ */
+export async function uploadIfAbsent(blob, filename, { type = "temp", subfolder = "", sources = [] } = {}) {
+    const target = [type, subfolder, filename].filter(Boolean).join("/");
+    if (await isPresent(blob, target, sources.filter(Boolean))) {
+        return true;
+    }
+
+    const form = new FormData();
+    form.append("image", blob, filename);
+    form.append("type", type);
+    form.append("subfolder", subfolder);
+    form.append("overwrite", "true");
+    try {
+        const resp = await api.fetchApi("/upload/image", { method: "POST", body: form });
+        if (!resp.ok) {
+            console.warn("[RGBYP] upload failed", filename, resp.status);
+        }
+        return resp.ok;
+    } catch (e) {
+        console.warn("[RGBYP] upload failed", filename, e);
+        return false;
+    }
+}
+
+// canvas → PNG blob
+export function canvasToPngBlob(canvas) {
+    return new Promise((resolve, reject) => {
+        canvas.toBlob((blob) => (blob ? resolve(blob) : reject(new Error("Failed to create PNG blob"))), "image/png");
+    });
+}
@@ -1,7 +1,9 @@
 
 import torch
-import numpy as np
-from PIL import Image, ImageFilter
+
+from .rgbyp_box_blur import BLUR_MODES, DEFAULT_PASSES, MAX_PASSES
+from .rgbyp_feather import FEATHER_MODES, sdf_grow_blur
+from .rgbyp_grow_blur import apply_grow_blur
 
 class MaskGrowBlur:
     @classmethod
@@ -11,7 +13,19 @@ class MaskGrowBlur:
                 "mask": ("MASK",),
                 "grow_strength": ("INT", {"default": 0, "min": 0, "step": 1}),
                 "blur_strength": ("INT", {"default": 0, "min": 0, "step": 1}),
-            }
+            },
+            "optional": {
+                # 0 = process whole frames; >0 = process in tiles of this size (with halo)
+                "tile_size": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 64}),
+                # 0 = run in-process; >0 = spread batch frames across this many processes
+                "workers": ("INT", {"default": 0, "min": 0, "max": 256, "step": 1}),
+                # "sdf" = grow / blur from a cached distance field (cheap to sweep)
+                "feather_mode": (list(FEATHER_MODES), {"default": "filter"}),
+                # "box" = iterated box blur, same cost for any blur_strength
+                "blur_mode": (list(BLUR_MODES), {"default": "gaussian"}),
+                # box passes: 1 = box, 2 = tent, 3+ = close to Gaussian
+                "blur_passes": ("INT", {"default": DEFAULT_PASSES, "min": 1, "max": MAX_PASSES, "step": 1}),
+            },
         }
 
     RETURN_TYPES = ("MASK",)
@@ -19,7 +33,17 @@ class MaskGrowBlur:
     FUNCTION = "apply"
     CATEGORY = "AK/mask"
 
-    def apply(self, mask, grow_strength=0, blur_strength=0):
+    def apply(
+        self,
+        mask,
+        grow_strength=0,
+        blur_strength=0,
+        tile_size=0,
+        workers=0,
+        feather_mode="filter",
+        blur_mode="gaussian",
+        blur_passes=DEFAULT_PASSES,
+    ):
         if mask is None:
             return (None,)
 
@@ -29,53 +53,18 @@ class MaskGrowBlur:
             except Exception:
                 return (None,)
 
-        device = mask.device
-        dtype = mask.dtype
-
-        t = mask.detach().to("cpu").float()
-
-        if t.dim() == 2:
-            batch = [t]
-            batched = False
-        elif t.dim() == 3:
-            batch = [t[i] for i in range(t.shape[0])]
-            batched = True
-        elif t.dim() == 4:
-            batch = [t[i, 0] for i in range(t.shape[0])]
-            batched = True
-        else:
-            batch = [t.reshape(t.shape[-2], t.shape[-1])]
-            batched = False
-
-        gs = int(grow_strength) if grow_strength is not None else 0
-        bs = int(blur_strength) if blur_strength is not None else 0
-        gs = max(gs, 0)
-        bs = max(bs, 0)
-
-        out_list = []
-        for m in batch:
-            arr = m.numpy()
-            arr = np.clip(arr, 0.0, 1.0)
-            img = (arr * 255.0 + 0.5).astype(np.uint8)
-            pil = Image.fromarray(img, mode="L")
-
-            if gs > 0:
-                k = gs * 2 + 1
-                pil = pil.filter(ImageFilter.MaxFilter(size=k))
-
-            if bs > 0:
-                pil = pil.filter(ImageFilter.GaussianBlur(radius=bs))
-
-            out = torch.from_numpy(np.array(pil, dtype=np.float32) / 255.0)
-            out = torch.clamp(out, 0.0, 1.0)
-            out_list.append(out)
-
-        if batched:
-            out_t = torch.stack(out_list, dim=0)
-        else:
-            out_t = out_list[0]
-
-        out_t = out_t.to(device=device, dtype=dtype)
+        if feather_mode == "sdf":
+            return (sdf_grow_blur(mask, grow_strength, blur_strength),)
+
+        out_t = apply_grow_blur(
+            mask,
+            grow_strength,
+            blur_strength,
+            tile_size=tile_size,
+            workers=workers,
+            blur_mode=blur_mode,
+            blur_passes=blur_passes,
+        )
         return (out_t,)
 
 
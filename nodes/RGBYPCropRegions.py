@@ -0,0 +1,92 @@
+from .rgbyp_crops import CROPS_TYPE, RGBYPCrops, crop_regions, parse_colors, stitch_regions
+from .rgbyp_labels import LABELS_TYPE, as_labels
+
+
+class RGBYPCropRegions:
+    """
+    image (IMAGE) + rgbyp_mask (IMAGE) or rgbyp_labels (RGBYP_LABELS)
+        → crops (IMAGE batch), crop_masks (MASK batch), crop_info (RGBYP_CROPS)
+
+    One crop per frame and color present: the color's bounding box plus
+    padding. target_size = 0 keeps the pixels (all boxes widened to the
+    largest one), target_size > 0 resizes square boxes to that size.
+    Process the crops (e.g. inpaint with crop_masks), then put them back with
+    RGBYP Stitch Regions.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "image": ("IMAGE",),
+                "colors": ("STRING", {"default": "all"}),
+                "padding": ("INT", {"default": 32, "min": 0, "max": 4096, "step": 1}),
+                "target_size": ("INT", {"default": 0, "min": 0, "max": 8192, "step": 8}),
+            },
+            "optional": {
+                "rgbyp_mask": ("IMAGE",),
+                # used instead of rgbyp_mask when connected
+                "rgbyp_labels": (LABELS_TYPE,),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE", "MASK", CROPS_TYPE)
+    RETURN_NAMES = ("crops", "crop_masks", "crop_info")
+    FUNCTION = "crop"
+    CATEGORY = "AK/RGBYP"
+    DESCRIPTION = "Crops the bounding box (plus padding) of every RGBYP color into one image batch."
+
+    def crop(self, image, colors="all", padding=32, target_size=0, rgbyp_mask=None, rgbyp_labels=None):
+        labels = as_labels(rgbyp_labels if rgbyp_labels is not None else rgbyp_mask)
+        if labels is None:
+            raise ValueError("connect rgbyp_mask or rgbyp_labels")
+
+        crops, masks, info = crop_regions(
+            image, labels.labels, parse_colors(colors), padding=padding, target_size=target_size
+        )
+        print(f"[RGBYPCropRegions] {len(info)} crops of {info.crop_size[1]}x{info.crop_size[0]}")
+        return (crops, masks, info)
+
+
+class RGBYPStitchRegions:
+    """
+    image (IMAGE) + crops (IMAGE batch) + crop_info (RGBYP_CROPS) → image (IMAGE)
+
+    Resizes every crop back to its box and blends it into the image through
+    its region, grown and blurred by feather / 2 each, so pixels outside the
+    region stay as they were. Crops whose padding is too small for that get
+    a smaller feather, so the blend never ends in a hard edge at the box.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "image": ("IMAGE",),
+                "crops": ("IMAGE",),
+                "crop_info": (CROPS_TYPE,),
+                "feather": ("INT", {"default": 16, "min": 0, "max": 1024, "step": 1}),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("image",)
+    FUNCTION = "stitch"
+    CATEGORY = "AK/RGBYP"
+    DESCRIPTION = "Stitches processed RGBYP region crops back into the image with feathered region masks."
+
+    def stitch(self, image, crops, crop_info, feather=16):
+        if not isinstance(crop_info, RGBYPCrops):
+            raise TypeError(f"crop_info must be {CROPS_TYPE}, got {type(crop_info).__name__}")
+        return (stitch_regions(image, crops, crop_info, feather=feather),)
+
+
+NODE_CLASS_MAPPINGS = {
+    "RGBYPCropRegions": RGBYPCropRegions,
+    "RGBYPStitchRegions": RGBYPStitchRegions,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "RGBYPCropRegions": "RGBYP Crop Regions",
+    "RGBYPStitchRegions": "RGBYP Stitch Regions",
+}
@@ -0,0 +1,64 @@
+import torch
+
+from .rgbyp_labels import LABELS_TYPE, RGBYPLabels
+
+
+class RGBYPMaskToLabels:
+    """
+    rgbyp_mask (IMAGE, float32 (B, H, W, C)) → rgbyp_labels (RGBYP_LABELS, uint8 (B, H, W)).
+
+    Uses the same 0.5 thresholds as the splitters. Pixels that are not one of
+    the five RGBYP colors become label 0 (none).
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "rgbyp_mask": ("IMAGE",),
+            },
+        }
+
+    RETURN_TYPES = (LABELS_TYPE,)
+    RETURN_NAMES = ("rgbyp_labels",)
+    FUNCTION = "convert"
+    CATEGORY = "AK/RGBYP"
+    DESCRIPTION = "Converts an RGBYP mask IMAGE into compact uint8 RGBYP labels (16x less memory)."
+
+    def convert(self, rgbyp_mask):
+        return (RGBYPLabels.from_image(rgbyp_mask),)
+
+
+class RGBYPLabelsToMask:
+    """
+    rgbyp_labels (RGBYP_LABELS) → rgbyp_mask (IMAGE, float32 (B, H, W, 4)),
+    alpha = 1 on colored pixels (same format as the Bridge output).
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "rgbyp_labels": (LABELS_TYPE,),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("rgbyp_mask",)
+    FUNCTION = "convert"
+    CATEGORY = "AK/RGBYP"
+    DESCRIPTION = "Converts RGBYP labels back into an RGBYP mask IMAGE."
+
+    def convert(self, rgbyp_labels):
+        return (rgbyp_labels.to_rgb(alpha=True, dtype=torch.float32),)
+
+
+NODE_CLASS_MAPPINGS = {
+    "RGBYPMaskToLabels": RGBYPMaskToLabels,
+    "RGBYPLabelsToMask": RGBYPLabelsToMask,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "RGBYPMaskToLabels": "RGBYP Mask To Labels",
+    "RGBYPLabelsToMask": "RGBYP Labels To Mask",
+}
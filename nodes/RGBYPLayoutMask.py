@@ -0,0 +1,157 @@
+import torch
+
+from .rgbyp_resize import labels_to_rgb
+
+
+class RGBYPLayoutMask:
+    """
+    RGBYP Layout Mask
+
+    Generates RGBYP layout masks as tensors, without the editor.
+    The presets are the same as the editor's auto mask buttons:
+
+        Half    — R | G split at 1/2
+        1 to 2  — R | G split at 1/3
+        2 to 1  — R | G split at 2/3
+        Thirds  — R | G | B
+
+    Custom ratios:
+        ratios = "1,2,1" → three regions with widths 1:2:1 (R, G, B, Y, P, R, ...)
+
+    Grid:
+        grid_columns x grid_rows cells, colored R, G, B, Y, P, R, ... in reading order.
+
+    orientation:
+        columns — regions are side by side (split lines are vertical, like the editor)
+        rows    — regions are stacked (split lines are horizontal)
+
+    A pixel belongs to the region containing its center. Colors are computed for
+    one line of pixels and broadcast to the frame (grids gather one line per grid
+    row); the batch is then written out as one contiguous tensor, so every frame
+    has its own memory (B x H x W x 4 floats) and can be modified in place.
+
+    Output: rgbyp_mask (IMAGE) (B, H, W, 4), alpha = 1 on colored pixels.
+    """
+
+    LAYOUTS = ["Half", "1 to 2", "2 to 1", "Thirds", "Custom ratios", "Grid"]
+
+    PRESET_RATIOS = {
+        "Half": [1.0, 1.0],
+        "1 to 2": [1.0, 2.0],
+        "2 to 1": [2.0, 1.0],
+        "Thirds": [1.0, 1.0, 1.0],
+    }
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "width": ("INT", {"default": 1024, "min": 1, "max": 16384, "step": 1}),
+                "height": ("INT", {"default": 1024, "min": 1, "max": 16384, "step": 1}),
+                "batch_size": ("INT", {"default": 1, "min": 1, "max": 4096, "step": 1}),
+                "layout": (cls.LAYOUTS, {"default": "Half"}),
+                "orientation": (["columns", "rows"], {"default": "columns"}),
+                "ratios": ("STRING", {"default": "1,1,1", "multiline": False}),
+                "grid_columns": ("INT", {"default": 2, "min": 1, "max": 64, "step": 1}),
+                "grid_rows": ("INT", {"default": 2, "min": 1, "max": 64, "step": 1}),
+            },
+            "optional": {
+                # if connected, width / height / batch_size are taken from this image
+                "image": ("IMAGE",),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("rgbyp_mask",)
+    FUNCTION = "generate"
+    CATEGORY = "AK/RGBYP"
+    DESCRIPTION = "Generates RGBYP layout masks (editor auto mask presets, custom ratios, grids) at any size."
+
+    def _parse_ratios(self, v):
+        try:
+            ratios = [float(x) for x in str(v).replace(";", ",").split(",") if x.strip()]
+        except Exception:
+            ratios = []
+        ratios = [r for r in ratios if r > 0.0]
+        if not ratios:
+            print(f"[RGBYPLayoutMask] invalid ratios '{v}', using 1,1")
+            ratios = [1.0, 1.0]
+        return ratios
+
+    def _region_index(self, size, ratios, device):
+        """
+        Region index (int64) for every pixel along one axis of length size.
+        """
+        weights = torch.tensor(ratios, dtype=torch.float64, device=device)
+        edges = torch.cumsum(weights, 0)[:-1] / weights.sum() * size
+        centers = torch.arange(size, dtype=torch.float64, device=device) + 0.5
+        # edges[i-1] <= center < edges[i] → region i
+        return torch.bucketize(centers, edges, right=True)
+
+    def _colors(self, cells, dtype):
+        # region k → R, G, B, Y, P, R, ...
+        labels = (cells % 5 + 1).to(torch.uint8)
+        return labels_to_rgb(labels, alpha=True, dtype=dtype)
+
+    def generate(
+        self,
+        width,
+        height,
+        batch_size,
+        layout="Half",
+        orientation="columns",
+        ratios="1,1,1",
+        grid_columns=2,
+        grid_rows=2,
+        image=None,
+    ):
+        device = torch.device("cpu")
+        dtype = torch.float32
+
+        if isinstance(image, torch.Tensor) and image.dim() == 4:
+            batch_size, height, width = image.shape[0], image.shape[1], image.shape[2]
+            device = image.device
+            dtype = image.dtype if torch.is_floating_point(image) else torch.float32
+
+        w = max(int(width), 1)
+        h = max(int(height), 1)
+        b = max(int(batch_size), 1)
+
+        if layout == "Grid":
+            cols = max(int(grid_columns), 1)
+            rows = max(int(grid_rows), 1)
+            col_idx = self._region_index(w, [1.0] * cols, device)
+            row_idx = self._region_index(h, [1.0] * rows, device)
+            band = torch.arange(rows, device=device).unsqueeze(1)
+            if orientation == "rows":
+                # reading order goes down the columns first
+                cells = col_idx.unsqueeze(0) * rows + band
+            else:
+                cells = band * cols + col_idx.unsqueeze(0)
+            # one (W, 4) line per grid row, gathered into the frame
+            frame = self._colors(cells, dtype)[row_idx]
+        else:
+            if layout in self.PRESET_RATIOS:
+                parts = self.PRESET_RATIOS[layout]
+            else:
+                parts = self._parse_ratios(ratios)
+
+            if orientation == "rows":
+                frame = self._colors(self._region_index(h, parts, device), dtype)
+                frame = frame.unsqueeze(1).expand(h, w, 4)
+            else:
+                frame = self._colors(self._region_index(w, parts, device), dtype)
+                frame = frame.unsqueeze(0).expand(h, w, 4)
+
+        # broadcast views share memory between pixels and frames, so
+        # materialize the batch: downstream nodes may modify it in place
+        return (frame.unsqueeze(0).expand(b, h, w, 4).contiguous(),)
+
+
+NODE_CLASS_MAPPINGS = {
+    "RGBYPLayoutMask": RGBYPLayoutMask,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "RGBYPLayoutMask": "RGBYP Layout Mask",
+}
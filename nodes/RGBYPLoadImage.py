@@ -1,12 +1,16 @@
 import os
-import json
 import numpy as np
 import torch
-from PIL import Image
 
 import nodes
 import folder_paths
 
+from .rgbyp_io import load_rgba_u8, u8_to_float
+from .rgbyp_labels import LABELS_TYPE, RGBYPLabels, labels_only, mask_outputs
+from .rgbyp_resize import resize_rgbyp
+from .rgbyp_state import read_json
+from .rgbyp_storage import get_storage
+
 # print = lambda *a, **k: None  # Disable print statements for cleaner output
 
 def getSubfolderName(fileName: str) -> str:
@@ -92,6 +96,12 @@ class RGBYPLoadImage:
 
        - file_name (STRING):
             the raw original filename without extension (before any cleanup).
+
+       - rgbyp_labels (RGBYP_LABELS):
+            the same mask as rgbyp_mask, as compact uint8 labels.
+
+       rgbyp_mask and rgbyp_labels are only produced when connected
+       (active_outputs, filled by the frontend), otherwise they are None.
     """
 
     @classmethod
@@ -110,6 +120,12 @@ class RGBYPLoadImage:
         )
         base["required"] = required
 
+        optional = dict(base.get("optional", {}))
+        # Comma separated connected outputs, empty = all.
+        # Filled automatically by the frontend from connected outputs.
+        optional["active_outputs"] = ("STRING", {"default": "", "multiline": False})
+        base["optional"] = optional
+
         hidden = dict(base.get("hidden", {}))
         hidden["unique_id"] = "UNIQUE_ID"
         base["hidden"] = hidden
@@ -119,13 +135,14 @@ class RGBYPLoadImage:
     DESCRIPTION = "Loads an image, outputs RGBYP mask, and outputs helper file name and path."
     CATEGORY = "AK/RGBYP"
 
-    RETURN_TYPES = ("IMAGE", "IMAGE", "MASK", "STRING", "STRING")
+    RETURN_TYPES = ("IMAGE", "IMAGE", "MASK", "STRING", "STRING", LABELS_TYPE)
     RETURN_NAMES = (
         "image",
         "rgbyp_mask",
         "mask",
         "file_path",
         "file_name",
+        "rgbyp_labels",
     )
 
     OUTPUT_NODE = False
@@ -202,15 +219,15 @@ class RGBYPLoadImage:
             f"'{meta_filename}' at '{meta_path}'"
         )
 
-        if not os.path.isfile(meta_path):
+        storage = get_storage()
+        if storage.fetch(meta_path) is None:
             print(f"[RGBYPLoadImage] _read_meta_paths: meta json NOT FOUND at '{meta_path}'")
             return temp_dir, meta_path, None, None, None
 
-        try:
-            with open(meta_path, "r", encoding="utf-8") as f:
-                meta = json.load(f)
-        except Exception as e:
-            print(f"[RGBYPLoadImage] error reading meta json '{meta_path}': {e}")
+        # retried while the editor is still uploading it
+        meta, _ = read_json(meta_path)
+        if meta is None:
+            print(f"[RGBYPLoadImage] error reading meta json '{meta_path}'")
             return temp_dir, meta_path, None, None, None
 
         def resolve(key):
@@ -223,6 +240,9 @@ class RGBYPLoadImage:
         mask_path = resolve("mask")
         composite_path = resolve("composite")
 
+        # one batched lookup for all three in the shared storage
+        storage.fetch_many([p for p in (original_path, mask_path, composite_path) if p])
+
         print(
             "[RGBYPLoadImage] _read_meta_paths: "
             f"original='{original_path}', mask='{mask_path}', composite='{composite_path}'"
@@ -230,7 +250,7 @@ class RGBYPLoadImage:
 
         return temp_dir, meta_path, original_path, mask_path, composite_path
 
-    def _load_image_from_path(self, path, ref_tensor=None, label=""):
+    def _load_image_from_path(self, path, ref_tensor=None, label="", as_labels=False):
         """
         Loads an image file as an IMAGE tensor (1, H, W, C) in the [0,1] range.
 
@@ -238,9 +258,12 @@ class RGBYPLoadImage:
         If the PNG has no alpha channel, it becomes standard RGB.
 
         If ref_tensor is provided, device/dtype will match it,
-        and the size will be synchronized when possible.
+        and the size will be synchronized when possible. The file is expected
+        to be an RGBYP mask, so resizing keeps palette colors only.
 
         label — a string used for logging (e.g. 'original' or 'mask').
+        as_labels — return RGBYPLabels decoded from the uint8 pixels instead
+        of a float IMAGE.
         """
         if not path or not os.path.isfile(path):
             print(
@@ -251,29 +274,35 @@ class RGBYPLoadImage:
         print(f"[RGBYPLoadImage] _load_image_from_path: loading {label} from '{path}'")
 
         try:
-            img = Image.open(path).convert("RGBA")
+            tensor = load_rgba_u8(path)[None, ...]  # (1,H,W,C) uint8
 
             # translated comment
             if ref_tensor is not None:
                 try:
                     _, h, w, _ = ref_tensor.shape
-                    if img.size != (w, h):
+                    if tuple(tensor.shape[1:3]) != (h, w):
                         print(
                             f"[RGBYPLoadImage] _load_image_from_path: "
-                            f"resizing {label} from {img.size} to ({w}, {h})"
+                            f"resizing {label} from {tuple(tensor.shape[1:3])} to ({h}, {w})"
                         )
-                        img = img.resize((w, h), resample=Image.LANCZOS)
+                        # palette-exact label resize: no blended colors
+                        # that the splitters would misclassify
+                        tensor = resize_rgbyp(tensor, (h, w), mode="nearest")
                 except Exception as e:
                     print(
                         "[RGBYPLoadImage] _load_image_from_path: "
                         f"could not auto-resize {label} to ref_tensor shape: {e}"
                     )
 
-            arr = np.array(img).astype(np.float32) / 255.0
-            tensor = torch.from_numpy(arr)[None, ...]  # (1,H,W,C)
+            if as_labels:
+                device = getattr(ref_tensor, "device", "cpu")
+                return RGBYPLabels.from_image(tensor.to(device))
 
+            # single uint8 -> float conversion, directly on the target device
             if ref_tensor is not None:
-                tensor = tensor.to(device=ref_tensor.device, dtype=ref_tensor.dtype)
+                tensor = u8_to_float(tensor, device=ref_tensor.device, dtype=ref_tensor.dtype)
+            else:
+                tensor = u8_to_float(tensor)
 
             return tensor
 
@@ -297,7 +326,7 @@ class RGBYPLoadImage:
     # ------------------------------------------------------------------
     # translated comment
     # ------------------------------------------------------------------
-    def load_image(self, image, updater=0.0, unique_id=None):
+    def load_image(self, image, updater=0.0, active_outputs="", unique_id=None):
         print(
             f"[RGBYPLoadImage] load_image: image='{image}', "
             f"updater={updater}, unique_id='{unique_id}'"
@@ -320,6 +349,8 @@ class RGBYPLoadImage:
 
         # 1.1 Create variable outputMask = None
         outputMask = None
+        # only rgbyp_labels connected → the mask is decoded straight to labels
+        only_labels = labels_only(active_outputs)
 
         # 1.2 Build json file name as rgbyp_idNode
         temp_dir = folder_paths.get_temp_directory()
@@ -360,14 +391,13 @@ class RGBYPLoadImage:
         )
 
         # 2. Check if exists in temp json jsonFileName
-        if json_path is not None and os.path.isfile(json_path):
+        storage = get_storage()
+        if json_path is not None and storage.fetch(json_path) is not None:
             print(f"[RGBYPLoadImage] load_image: json exists at '{json_path}'")
-            try:
-                with open(json_path, "r", encoding="utf-8") as f:
-                    meta = json.load(f)
-            except Exception as e:
+            meta, _ = read_json(json_path)
+            if meta is None:
                 print(
-                    f"[RGBYPLoadImage] load_image: error reading json '{json_path}': {e}"
+                    f"[RGBYPLoadImage] load_image: error reading json '{json_path}'"
                 )
                 meta = {}
 
@@ -387,10 +417,11 @@ class RGBYPLoadImage:
                     f"resolved mask_path='{mask_path}'"
                 )
 
-                if os.path.isfile(mask_path):
+                if storage.fetch(mask_path) is not None:
                     # translated comment
                     outputMask = self._load_image_from_path(
-                        mask_path, ref_tensor=base_image, label="rgbyp_mask"
+                        mask_path, ref_tensor=base_image, label="rgbyp_mask",
+                        as_labels=only_labels,
                     )
                     if outputMask is None:
                         print(
@@ -424,17 +455,22 @@ class RGBYPLoadImage:
         # translated comment
         if outputMask is None:
             outputMask = self._make_black_64(base_image)
+            if only_labels:
+                outputMask = RGBYPLabels.from_image(outputMask)
 
         print(
             "[RGBYPLoadImage] load_image: done, returning base_image, outputMask, "
             "base_mask, filePath, fileName"
         )
+        # an unconnected rgbyp_mask / rgbyp_labels output is not kept (None)
+        outputMask, outputLabels = mask_outputs(outputMask, active_outputs)
         return (
             base_image,
             outputMask,
             base_mask,
             filePath,
             fileName,
+            outputLabels,
         )
     # ------------------------------------------------------------------
     # CHANGE DETECTION / VALIDATION
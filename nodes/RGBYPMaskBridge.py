@@ -1,10 +1,18 @@
 import os
-import json
+import shutil
 import torch
 import numpy as np
 from PIL import Image
 import folder_paths
 
+from .rgbyp_io import load_rgb_u8, load_rgba_u8, set_mask_alpha_u8_, tensor_to_u8, u8_to_float
+from .rgbyp_labels import LABELS_TYPE, RGBYPLabels, as_image, labels_only, mask_outputs
+from .rgbyp_originals import OriginalStore
+from .rgbyp_preview import preview_available, preview_composite, send_preview
+from .rgbyp_resize import resize_rgbyp
+from .rgbyp_state import read_json, replace_atomically, update_json
+from .rgbyp_storage import get_storage
+
 print = lambda *a, **k: None
 
 
@@ -32,6 +40,18 @@ class RGBYPMaskBridge:
                     },
                 ),
             },
+            "optional": {
+                # "websocket": send a downscaled preview straight to the browser,
+                # no composite files are written
+                "preview_mode": (["files", "websocket"], {"default": "files"}),
+                "preview_max_size": (
+                    "INT",
+                    {"default": 1024, "min": 64, "max": 8192, "step": 64},
+                ),
+                # Comma separated connected outputs, empty = all.
+                # Filled automatically by the frontend from connected outputs.
+                "active_outputs": ("STRING", {"default": "", "multiline": False}),
+            },
             "hidden": {
                 "unique_id": "UNIQUE_ID",
             },
@@ -39,8 +59,8 @@ class RGBYPMaskBridge:
 
     DESCRIPTION = "Takes an input image, lets you draw an RGBYP mask on it, and outputs both the image and the mask."
     CATEGORY = "AK/RGBYP"
-    RETURN_TYPES = ("IMAGE", "IMAGE")
-    RETURN_NAMES = ("image", "rgbyp_mask")
+    RETURN_TYPES = ("IMAGE", "IMAGE", LABELS_TYPE)
+    RETURN_NAMES = ("image", "rgbyp_mask", "rgbyp_labels")
     OUTPUT_NODE = True
     FUNCTION = "execute"
 
@@ -68,7 +88,7 @@ class RGBYPMaskBridge:
         Support both RGB and RGBA (if C>=4, preserve alpha).
         """
         try:
-            img0 = image_tensor[0].detach().cpu().clamp(0.0, 1.0)
+            img0 = image_tensor[0]
 
             # ensure at least 3 channels
             if img0.shape[-1] < 3:
@@ -76,49 +96,44 @@ class RGBYPMaskBridge:
                 img0 = torch.cat([img0, img0[..., :1].repeat(1, 1, pad)], dim=-1)
 
             if img0.shape[-1] >= 4:
-                rgba = img0[..., :4].numpy()
-                rgba_u8 = (rgba * 255.0).round().astype(np.uint8)
-                Image.fromarray(rgba_u8, mode="RGBA").save(path, format="PNG")
+                img = Image.fromarray(tensor_to_u8(img0[..., :4]), mode="RGBA")
             else:
-                rgb = img0[..., :3].numpy()
-                rgb_u8 = (rgb * 255.0).round().astype(np.uint8)
-                Image.fromarray(rgb_u8, mode="RGB").save(path, format="PNG")
+                img = Image.fromarray(tensor_to_u8(img0[..., :3]), mode="RGB")
+            with replace_atomically(path) as tmp_path:
+                img.save(tmp_path, format="PNG")
 
             print(f"[RGBYPMaskBridge] saved PNG: '{path}'")
         except Exception as e:
             print(f"[RGBYPMaskBridge] ERROR saving PNG '{path}': {e}")
 
-    def _load_mask_tensor(self, mask_path, target_hw, device):
+    def _load_mask_tensor(self, mask_path, target_hw, device, as_labels=False):
         """
         Load mask image from PNG and resize it to target_hw (H,W).
         Return a torch.Tensor of shape (1,H,W,4) in [0,1] with transparent background:
         - pixels where mask is black (RGB≈0) get alpha=0;
         - non-black (colored) mask pixels get alpha=1.
+        With as_labels=True return RGBYPLabels (1,H,W) decoded from the uint8
+        pixels instead, the float mask is never built.
         """
         try:
-            m = Image.open(mask_path).convert("RGBA")
-            w_t, h_t = target_hw[1], target_hw[0]
-            if m.size != (w_t, h_t):
-                m = m.resize((w_t, h_t), resample=Image.NEAREST)
+            # stays uint8 until the single float conversion at the end
+            rgba = load_rgba_u8(mask_path)
+            h_t, w_t = int(target_hw[0]), int(target_hw[1])
+            if tuple(rgba.shape[:2]) != (h_t, w_t):
+                # palette-exact label resize, only RGBYP colors survive
+                rgba = resize_rgbyp(rgba.unsqueeze(0), (h_t, w_t), mode="nearest")[0]
+
+            if as_labels:
+                labels = RGBYPLabels.from_image(rgba.to(device))
+                print(
+                    f"[RGBYPMaskBridge] loaded mask labels from '{mask_path}', shape={labels.shape}"
+                )
+                return labels
 
-            arr = np.array(m).astype(np.float32) / 255.0
-            if arr.ndim == 2:
-                # grayscale → replicate into RGB, alpha will be recomputed
-                arr = np.stack([arr, arr, arr, np.ones_like(arr)], axis=-1)
+            # alpha: 0 where RGB is black, otherwise 1
+            set_mask_alpha_u8_(rgba)
 
-            # ensure at least 3 channels
-            if arr.shape[-1] < 3:
-                pad = 3 - arr.shape[-1]
-                pad_arr = np.repeat(arr[..., :1], pad, axis=-1)
-                arr = np.concatenate([arr, pad_arr], axis=-1)
-
-            rgb = arr[..., :3]
-            # alpha: 0 where RGB is almost black, otherwise 1
-            mag = np.max(rgb, axis=-1)
-            alpha = (mag > 1e-3).astype(np.float32)
-            rgba = np.concatenate([rgb, alpha[..., None]], axis=-1)
-
-            t = torch.from_numpy(rgba).to(device=device, dtype=torch.float32).unsqueeze(0)
+            t = u8_to_float(rgba.unsqueeze(0), device=device)
             print(
                 f"[RGBYPMaskBridge] loaded mask tensor from '{mask_path}', shape={tuple(t.shape)}"
             )
@@ -137,54 +152,105 @@ class RGBYPMaskBridge:
         Return True/False.
         """
         try:
-            img0 = base_tensor[0].detach().cpu().clamp(0.0, 1.0)
-            base_arr = img0[..., :3].numpy()  # (H,W,3)
-            h, w, _ = base_arr.shape
+            img0 = base_tensor[0]
+            h, w = int(img0.shape[0]), int(img0.shape[1])
 
             if mask_path_or_none and os.path.isfile(mask_path_or_none):
-                mask_img = Image.open(mask_path_or_none).convert("RGB")
-                if mask_img.size != (w, h):
-                    mask_img = mask_img.resize((w, h), resample=Image.NEAREST)
-                mask_arr = np.array(mask_img).astype(np.float32) / 255.0
-                if mask_arr.ndim == 2:
-                    mask_arr = np.stack([mask_arr, mask_arr, mask_arr], axis=-1)
-                if mask_arr.shape[-1] != 3:
-                    mask_arr = mask_arr[..., :3]
+                mask_u8 = load_rgb_u8(mask_path_or_none)
+                if tuple(mask_u8.shape[:2]) != (h, w):
+                    # palette-exact label resize instead of a PIL round-trip
+                    mask_u8 = resize_rgbyp(mask_u8.unsqueeze(0), (h, w), mode="nearest")[0]
                 print(
-                    f"[RGBYPMaskBridge] baking with REAL mask '{mask_path_or_none}', size={mask_img.size}"
+                    f"[RGBYPMaskBridge] baking with REAL mask '{mask_path_or_none}', size={(w, h)}"
                 )
             else:
-                # empty transparent '1-pixel mask' → effectively zero mask
-                mask_arr = np.zeros((1, 1, 3), dtype=np.float32)
+                mask_u8 = None
                 print("[RGBYPMaskBridge] baking with EMPTY mask (no mask file)")
 
-            # resize the mask to match base size
-            if mask_arr.shape[0] != h or mask_arr.shape[1] != w:
-                mask_img = Image.fromarray(
-                    (np.clip(mask_arr, 0.0, 1.0) * 255.0).astype(np.uint8), mode="RGB"
-                )
-                mask_img = mask_img.resize((w, h), resample=Image.NEAREST)
-                mask_arr = np.array(mask_img).astype(np.float32) / 255.0
-
             # alpha_factor = float(max(0.0, min(1.0, updater / 100.0)))
             alpha_factor = float(max(0.0, min(1.0, updater)))
 
-            alpha = np.max(mask_arr, axis=2, keepdims=True) * alpha_factor  # (H,W,1)
+            # Blend in row chunks straight into the uint8 output,
+            # only chunk-sized float temporaries are created.
+            comp_u8 = np.empty((h, w, 3), dtype=np.uint8)
+            comp_t = torch.from_numpy(comp_u8)
+            for r0 in range(0, h, 256):
+                r1 = min(r0 + 256, h)
+                base = img0[r0:r1, :, :3].detach().to("cpu", dtype=torch.float32).clamp(0.0, 1.0)
+                if mask_u8 is None:
+                    comp = base
+                else:
+                    mask = mask_u8[r0:r1].to(torch.float32).div_(255.0)
+                    alpha = mask.amax(dim=-1, keepdim=True).mul_(alpha_factor)  # (rows,W,1)
+                    comp = base * (1.0 - alpha) + mask * alpha
+                comp_t[r0:r1].copy_(comp.clamp(0.0, 1.0).mul_(255.0).round_())
 
-            comp = base_arr * (1.0 - alpha) + mask_arr * alpha
-            comp = np.clip(comp, 0.0, 1.0)
-            comp_u8 = (comp * 255.0).round().astype(np.uint8)
             comp_img = Image.fromarray(comp_u8, mode="RGB")
-            comp_img.save(out_path, format="PNG")
+            with replace_atomically(out_path) as tmp_path:
+                comp_img.save(tmp_path, format="PNG")
             print(f"[RGBYPMaskBridge] baked composite to '{out_path}'")
             return True
         except Exception as e:
             print(f"[RGBYPMaskBridge] ERROR baking composite: {e}")
             return False
 
+    def _publish_composite(
+        self, base_tensor, mask_path_or_none, updater, temp_path, input_path, device, ws_preview
+    ):
+        """
+        Make the composite preview available to the browser.
+        ws_preview (max size) → downscaled composite sent over the websocket, no files.
+        Otherwise (or if sending fails) → bake to temp_path and copy into input/rgbyp.
+        Returns "websocket", "file" or None on failure.
+        """
+        if ws_preview:
+            try:
+                rgb = preview_composite(base_tensor, mask_path_or_none, updater, ws_preview)
+                if send_preview(rgb, ws_preview):
+                    print("[RGBYPMaskBridge] sent composite preview over websocket")
+                    return "websocket"
+            except Exception as e:
+                print(f"[RGBYPMaskBridge] ERROR building websocket preview, fallback to files: {e}")
+
+        if not self._bake_composite(base_tensor, mask_path_or_none, updater, temp_path, device):
+            return None
+        storage = get_storage()
+        storage.publish(temp_path)
+        try:
+            with replace_atomically(input_path) as tmp_path:
+                shutil.copyfile(temp_path, tmp_path)
+            storage.publish(input_path)
+            print(f"[RGBYPMaskBridge] copied composite to input/rgbyp: '{input_path}'")
+        except Exception as e:
+            print(f"[RGBYPMaskBridge] ERROR copying composite to input/rgbyp: {e}")
+        return "file"
+
+    def _fallback_original(self, originals, image, unique_id, imageOriginalName):
+        """
+        Original for the preview when the resolved preview file is missing:
+        the content-addressed original (re-encoded if it was deleted),
+        or a plain <name>_original.png if the store fails.
+        """
+        try:
+            return originals.store(image, unique_id)
+        except Exception as e:
+            print(f"[RGBYPMaskBridge] ERROR storing fallback original: {e}")
+        fallback_name = f"{imageOriginalName}_original.png"
+        self._save_tensor_as_png(image, os.path.join(originals.folder, fallback_name))
+        return fallback_name
+
     # ---------- main ----------
 
-    def execute(self, image, clear_on_size_change=True, updater=100.0, unique_id=None):
+    def execute(
+        self,
+        image,
+        clear_on_size_change=True,
+        updater=100.0,
+        preview_mode="files",
+        preview_max_size=1024,
+        active_outputs="",
+        unique_id=None,
+    ):
         device = image.device
         b, h, w, c = image.shape
 
@@ -221,30 +287,36 @@ class RGBYPMaskBridge:
         jsonFileName = f"RGBYP_{unique_id}.json"
         json_path = os.path.join(temp_dir, jsonFileName)
 
-        # 1.2 jsonTemp in memory
+        # 1.2 original in temp, named by pixel hash and shared by all Bridges
+        # that receive the same image (encoded only once)
+        originals = OriginalStore(temp_dir)
+        try:
+            original_name = originals.store(image, unique_id)
+        except Exception as e:
+            print(f"[RGBYPMaskBridge] ERROR saving original to temp: {e}")
+            original_name = f"{imageOriginalName}_original.png"
+            self._save_tensor_as_png(image, os.path.join(temp_dir, original_name))
+
+        # 1.3 jsonTemp in memory
         jsonTemp = {
-            "original": f"{imageOriginalName}_original.png",
+            "original": original_name,
             "mask": "",
             "composite": "",
             "width": int(w),
             "height": int(h),
         }
 
-        # 1.3 outputImage = input image
+        # 1.4 outputImage = input image
         outputImage = image
 
-        original_temp_path = os.path.join(temp_dir, jsonTemp["original"])
-        try:
-            self._save_tensor_as_png(outputImage, original_temp_path)
-        except Exception as e:
-            print(f"[RGBYPMaskBridge] ERROR saving original to temp: {e}")
-
-
-        # 1.4 outputMask = None
+        # 1.5 outputMask = None
         outputMask = None
+        # only rgbyp_labels connected → the mask is decoded straight to labels
+        only_labels = labels_only(active_outputs)
 
-        # 2. Check if json exists
-        json_exists = os.path.isfile(json_path)
+        # 2. Check if json exists (pulled from the shared storage if configured)
+        storage = get_storage()
+        json_exists = storage.fetch(json_path) is not None
         print(f"[RGBYPMaskBridge] json_exists={json_exists}, json_path='{json_path}'")
 
         # For preview
@@ -252,14 +324,20 @@ class RGBYPMaskBridge:
         preview_type = None
         preview_subfolder = ""
 
+        # websocket previews need a running PromptServer, otherwise use files
+        ws_preview = None
+        if preview_mode == "websocket" and preview_available():
+            ws_preview = int(preview_max_size or 1024)
+        baked = None
+
         if not json_exists:
             # --- JSON DOES NOT EXIST ---
             print("[RGBYPMaskBridge] JSON does not exist → create new")
 
-            # save jsonTemp
+            # save jsonTemp (merged if another worker / the editor created it meanwhile)
             try:
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(jsonTemp, f, ensure_ascii=False, indent=2)
+                update_json(json_path, None, jsonTemp)
+                storage.publish(json_path)
                 print(f"[RGBYPMaskBridge] wrote new json '{json_path}'")
             except Exception as e:
                 print(f"[RGBYPMaskBridge] ERROR writing new json: {e}")
@@ -275,11 +353,9 @@ class RGBYPMaskBridge:
 
         else:
             # --- JSON EXISTS ---
-            try:
-                with open(json_path, "r", encoding="utf-8") as f:
-                    existing = json.load(f)
-            except Exception as e:
-                print(f"[RGBYPMaskBridge] ERROR reading existing json: {e}")
+            existing, _ = read_json(json_path)
+            if existing is None:
+                print("[RGBYPMaskBridge] ERROR reading existing json, treating it as empty")
                 existing = {}
 
             # read previous width/height and mask fields
@@ -287,6 +363,8 @@ class RGBYPMaskBridge:
             old_h = int(existing.get("height", 0) or 0)
             mask_name = (existing.get("mask") or "").strip()
             isJsonMask = bool(mask_name)
+            if isJsonMask:
+                storage.fetch(os.path.join(temp_dir, mask_name))
             print(
                 f"[RGBYPMaskBridge] existing width={old_w}, height={old_h}, mask='{mask_name}', isJsonMask={isJsonMask}"
             )
@@ -313,28 +391,16 @@ class RGBYPMaskBridge:
                     print(
                         f"[RGBYPMaskBridge] sizes match & mask exists → bake composite with mask '{mask_path}'"
                     )
-                    baked = self._bake_composite(
-                        outputImage, mask_path, updater, composite_temp_path, device
+                    baked = self._publish_composite(
+                        outputImage, mask_path, updater, composite_temp_path, composite_input_path,
+                        device, ws_preview,
                     )
                     if baked:
-                        # Copy composite into input/rgbyp as well
-                        try:
-                            Image.open(composite_temp_path).save(
-                                composite_input_path, format="PNG"
-                            )
-                            print(
-                                f"[RGBYPMaskBridge] copied composite to input/rgbyp: '{composite_input_path}'"
-                            )
-                        except Exception as e:
-                            print(
-                                f"[RGBYPMaskBridge] ERROR copying composite to input/rgbyp: {e}"
-                            )
-
                         jsonData["composite"] = composite_name
 
                         # outputMask = the mask itself
                         outputMask = self._load_mask_tensor(
-                            mask_path, (int(h), int(w)), device
+                            mask_path, (int(h), int(w)), device, as_labels=only_labels
                         )
                         # preview from input/rgbyp
                         preview_filename = composite_name
@@ -353,22 +419,11 @@ class RGBYPMaskBridge:
                     print(
                         "[RGBYPMaskBridge] sizes match & mask is empty → bake composite with empty mask"
                     )
-                    baked = self._bake_composite(
-                        outputImage, None, updater, composite_temp_path, device
+                    baked = self._publish_composite(
+                        outputImage, None, updater, composite_temp_path, composite_input_path,
+                        device, ws_preview,
                     )
                     if baked:
-                        try:
-                            Image.open(composite_temp_path).save(
-                                composite_input_path, format="PNG"
-                            )
-                            print(
-                                f"[RGBYPMaskBridge] copied composite to input/rgbyp: '{composite_input_path}'"
-                            )
-                        except Exception as e:
-                            print(
-                                f"[RGBYPMaskBridge] ERROR copying composite to input/rgbyp: {e}"
-                            )
-
                         jsonData["mask"] = ""  # according to spec the mask field stays empty
                         jsonData["composite"] = composite_name
                         preview_filename = composite_name
@@ -387,17 +442,9 @@ class RGBYPMaskBridge:
                     print(
                         "[RGBYPMaskBridge] size mismatch & clear_on_size_change=True → reset jsonTemp & preview=input image"
                     )
-                    # jsonTemp already contains up-to-date width/height/original
+                    # jsonTemp already contains up-to-date width/height/original,
+                    # written below with the final json
                     jsonData = dict(jsonTemp)
-                    # save jsonTemp
-                    try:
-                        with open(json_path, "w", encoding="utf-8") as f:
-                            json.dump(jsonData, f, ensure_ascii=False, indent=2)
-                        print(f"[RGBYPMaskBridge] wrote reset json '{json_path}'")
-                    except Exception as e:
-                        print(
-                            f"[RGBYPMaskBridge] ERROR writing reset json (size mismatch, clear=True): {e}"
-                        )
                     # save original in temp
                     # original_temp_path = os.path.join(temp_dir, jsonTemp["original"])
                     # self._save_tensor_as_png(outputImage, original_temp_path)
@@ -415,22 +462,11 @@ class RGBYPMaskBridge:
                     # original_temp_path = os.path.join(temp_dir, jsonTemp["original"])
                     # self._save_tensor_as_png(outputImage, original_temp_path)
 
-                    baked = self._bake_composite(
-                        outputImage, mask_path, updater, composite_temp_path, device
+                    baked = self._publish_composite(
+                        outputImage, mask_path, updater, composite_temp_path, composite_input_path,
+                        device, ws_preview,
                     )
                     if baked:
-                        try:
-                            Image.open(composite_temp_path).save(
-                                composite_input_path, format="PNG"
-                            )
-                            print(
-                                f"[RGBYPMaskBridge] copied composite to input/rgbyp: '{composite_input_path}'"
-                            )
-                        except Exception as e:
-                            print(
-                                f"[RGBYPMaskBridge] ERROR copying composite to input/rgbyp: {e}"
-                            )
-
                         # save composite name and updated dimensions
                         jsonData["composite"] = composite_name
                         jsonData["width"] = int(w)
@@ -439,13 +475,14 @@ class RGBYPMaskBridge:
                         # outputMask = the mask itself, if present
                         if mask_path and os.path.isfile(mask_path):
                             outputMask = self._load_mask_tensor(
-                                mask_path, (int(h), int(w)), device
+                                mask_path, (int(h), int(w)), device, as_labels=only_labels
                             )
                             if outputMask is not None:
                                 # save mask in temp as imageOriginalName + _mask
                                 mask_output_name = f"{imageOriginalName}_mask.png"
                                 mask_output_path = os.path.join(temp_dir, mask_output_name)
-                                self._save_tensor_as_png(outputMask, mask_output_path)
+                                self._save_tensor_as_png(as_image(outputMask), mask_output_path)
+                                storage.publish(mask_output_path)
                                 jsonData["mask"] = mask_output_name
                             else:
                                 print(
@@ -470,10 +507,15 @@ class RGBYPMaskBridge:
                         preview_type = "temp"
                         preview_subfolder = ""
 
-            # in all cases after the branches → save jsonData
+            if baked == "websocket":
+                # no composite file was written this run
+                jsonData["composite"] = existing.get("composite", "")
+
+            # in all cases after the branches → save jsonData, merged with
+            # anything the editor wrote meanwhile (the editor wins on mask / composite)
             try:
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(jsonData, f, ensure_ascii=False, indent=2)
+                update_json(json_path, existing, jsonData)
+                storage.publish(json_path)
                 print(f"[RGBYPMaskBridge] wrote final json '{json_path}'")
             except Exception as e:
                 print(f"[RGBYPMaskBridge] ERROR writing final json: {e}")
@@ -484,14 +526,36 @@ class RGBYPMaskBridge:
             print(
                 "[RGBYPMaskBridge] outputMask is None → using default black 64x64 mask"
             )
-            mask_arr = np.zeros((64, 64, 3), dtype=np.float32)
-            outputMask = (
-                torch.from_numpy(mask_arr)
-                .to(device=device, dtype=torch.float32)
-                .unsqueeze(0)
-            )
+            if only_labels:
+                outputMask = RGBYPLabels(torch.zeros((1, 64, 64), dtype=torch.uint8, device=device))
+            else:
+                mask_arr = np.zeros((64, 64, 3), dtype=np.float32)
+                outputMask = (
+                    torch.from_numpy(mask_arr)
+                    .to(device=device, dtype=torch.float32)
+                    .unsqueeze(0)
+                )
+
+        # 3.2 rgbyp_labels: the same mask as compact uint8 labels; an
+        # unconnected rgbyp_mask / rgbyp_labels output is not kept (None)
+        outputMask, outputLabels = mask_outputs(outputMask, active_outputs)
+
+        # Preview over websocket: nothing for the browser to fetch from disk
+        if ws_preview and baked != "websocket":
+            # no composite was sent (new / cleared json, failed bake) → plain input image
+            try:
+                if send_preview(preview_composite(outputImage, None, 0.0, ws_preview), ws_preview):
+                    baked = "websocket"
+            except Exception as e:
+                print(f"[RGBYPMaskBridge] ERROR sending input preview over websocket: {e}")
+        if baked == "websocket":
+            # the composite went over the websocket; ui still points at the
+            # original already stored in temp (no extra write), so the editor
+            # and the redraw have a file to resolve
+            preview_filename = jsonTemp["original"]
+            preview_type = "temp"
+            preview_subfolder = ""
 
-        # Preview
         # Preview
         # Safety: if preview points to a non-existing file, fall back to the current input image
         ui = None
@@ -512,10 +576,8 @@ class RGBYPMaskBridge:
                         f"[RGBYPMaskBridge] WARNING: preview file not found "
                         f"('{preview_full_path}') → fallback to current input image"
                     )
-                    # Save current image as a fresh original preview in temp
-                    fallback_name = f"{imageOriginalName}_original.png"
-                    fallback_path = os.path.join(folder_paths.get_temp_directory(), fallback_name)
-                    self._save_tensor_as_png(outputImage, fallback_path)
+                    # Re-store the current image as the original preview in temp
+                    fallback_name = self._fallback_original(originals, outputImage, unique_id, imageOriginalName)
 
                     preview_filename = fallback_name
                     preview_type = "temp"
@@ -529,9 +591,7 @@ class RGBYPMaskBridge:
                     f"[RGBYPMaskBridge] ERROR while verifying preview file, "
                     f"fallback to current input image: {e}"
                 )
-                fallback_name = f"{imageOriginalName}_original.png"
-                fallback_path = os.path.join(folder_paths.get_temp_directory(), fallback_name)
-                self._save_tensor_as_png(outputImage, fallback_path)
+                fallback_name = self._fallback_original(originals, outputImage, unique_id, imageOriginalName)
 
                 preview_filename = fallback_name
                 preview_type = "temp"
@@ -555,10 +615,10 @@ class RGBYPMaskBridge:
 
         if ui is not None:
             print("[RGBYPMaskBridge] execute(): returning result with UI preview")
-            return {"result": (outputImage, outputMask), "ui": ui}
+            return {"result": (outputImage, outputMask, outputLabels), "ui": ui}
         else:
             print("[RGBYPMaskBridge] execute(): returning result without UI preview")
-            return {"result": (outputImage, outputMask)}
+            return {"result": (outputImage, outputMask, outputLabels)}
 
 
 NODE_CLASS_MAPPINGS = {"RGBYPMaskBridge": RGBYPMaskBridge}
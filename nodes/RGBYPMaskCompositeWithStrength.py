@@ -1,12 +1,17 @@
 import torch
-import torch.nn.functional as F
 from typing import List, Optional, Tuple
 
+from .rgbyp_labels import LABELS_TYPE, RGBYPLabels
+from .rgbyp_resize import resize_mask
+
 
 class RGBYPMaskCompositeWithStrength:
     """
     Composite up to 5 RGBYP masks with per-channel strengths.
 
+    The color masks can also come straight from rgbyp_labels (RGBYP_LABELS):
+    every color mask input that is not connected is taken from the labels.
+
     Logic:
     - For each input mask:
       - Normalize to float [0, 1].
@@ -37,18 +42,21 @@ class RGBYPMaskCompositeWithStrength:
 
         return {
             "required": {
-                "red_mask": ("MASK",),
-                "green_mask": ("MASK",),
-                "blue_mask": ("MASK",),
-                "yellow_mask": ("MASK",),
-                "pink_mask": ("MASK",),
                 "red_strength": ("FLOAT", float_cfg),
                 "green_strength": ("FLOAT", float_cfg),
                 "blue_strength": ("FLOAT", float_cfg),
                 "yellow_strength": ("FLOAT", float_cfg),
                 "pink_strength": ("FLOAT", float_cfg),
                 "invert": ("BOOLEAN", {"default": False}),
-            }
+            },
+            "optional": {
+                "red_mask": ("MASK",),
+                "green_mask": ("MASK",),
+                "blue_mask": ("MASK",),
+                "yellow_mask": ("MASK",),
+                "pink_mask": ("MASK",),
+                "rgbyp_labels": (LABELS_TYPE,),
+            },
         }
 
     RETURN_TYPES = ("MASK",)
@@ -82,7 +90,9 @@ class RGBYPMaskCompositeWithStrength:
     @staticmethod
     def _resize_to_shape(mask: torch.Tensor, target_shape: torch.Size) -> torch.Tensor:
         """
-        Resize mask to match target_shape using bilinear interpolation.
+        Resize mask to match target_shape.
+        Hard (two-level) masks keep their exact values (area-weighted label resize),
+        soft masks use bilinear interpolation.
         Expects shapes like [1, H, W] or [H, W]. Returns a tensor with the same rank as input.
         """
         if mask.shape == target_shape:
@@ -97,17 +107,8 @@ class RGBYPMaskCompositeWithStrength:
                 f"RGBYPMaskCompositeWithStrength: unsupported mask shape {mask.shape} for resize."
             )
 
-        b, h, w = mask.shape
-        _, target_h, target_w = target_shape
-
-        mask_4d = mask.unsqueeze(1)  # [B, 1, H, W]
-        resized = F.interpolate(
-            mask_4d,
-            size=(target_h, target_w),
-            mode="bilinear",
-            align_corners=False,
-        )
-        resized = resized.squeeze(1)  # [B, H, W]
+        target_h, target_w = target_shape[-2], target_shape[-1]
+        resized = resize_mask(mask, (target_h, target_w), mode="auto")  # [B, H, W]
 
         if original_dim == 2:
             resized = resized.squeeze(0)
@@ -116,25 +117,32 @@ class RGBYPMaskCompositeWithStrength:
 
     def composite(
         self,
-        red_mask: torch.Tensor,
-        green_mask: torch.Tensor,
-        blue_mask: torch.Tensor,
-        yellow_mask: torch.Tensor,
-        pink_mask: torch.Tensor,
-        red_strength: float,
-        green_strength: float,
-        blue_strength: float,
-        yellow_strength: float,
-        pink_strength: float,
-        invert: bool,
+        red_mask: Optional[torch.Tensor] = None,
+        green_mask: Optional[torch.Tensor] = None,
+        blue_mask: Optional[torch.Tensor] = None,
+        yellow_mask: Optional[torch.Tensor] = None,
+        pink_mask: Optional[torch.Tensor] = None,
+        red_strength: float = 0.5,
+        green_strength: float = 0.5,
+        blue_strength: float = 0.5,
+        yellow_strength: float = 0.5,
+        pink_strength: float = 0.5,
+        invert: bool = False,
+        rgbyp_labels: Optional[RGBYPLabels] = None,
     ) -> Tuple[torch.Tensor]:
-        masks: List[torch.Tensor] = [
+        masks: List[Optional[torch.Tensor]] = [
             red_mask,
             green_mask,
             blue_mask,
             yellow_mask,
             pink_mask,
         ]
+        if rgbyp_labels is not None:
+            # unconnected color inputs come from the labels
+            masks = [
+                (rgbyp_labels.labels == idx + 1).float() if mask is None else mask
+                for idx, mask in enumerate(masks)
+            ]
         strengths: List[float] = [
             red_strength,
             green_strength,
@@ -147,6 +155,9 @@ class RGBYPMaskCompositeWithStrength:
         base_shape: Optional[torch.Size] = None
 
         for idx, (mask, strength) in enumerate(zip(masks, strengths)):
+            if mask is None:
+                continue
+
             # Normalize to float [0, 1]
             mask = self._ensure_float_mask(mask)
 
@@ -0,0 +1,245 @@
+import torch
+import torch.nn.functional as F
+
+from .rgbyp_labels import LABELS_TYPE, RGBYPLabels, as_labels
+from .rgbyp_resize import resize_labels
+from .rgbyp_sdf import signed_distance
+
+
+class RGBYPMaskKeyframes:
+    """
+    RGBYP Mask Keyframes
+
+    Builds a mask for every frame of a video batch from a few keyframe masks.
+
+    Inputs:
+        rgbyp_mask (IMAGE) or rgbyp_labels (RGBYP_LABELS) — K keyframe masks
+        frame_indices — frame of every keyframe, e.g. "0, 24, 60".
+            Empty → keyframes are spread evenly over length.
+        length — number of output frames, 0 = last keyframe index + 1
+
+    Modes:
+        sdf morph     — every color morphs from one keyframe shape into the next
+                        (linear blend of the per-color signed distance fields).
+                        A blend of two shapes that do not overlap is empty
+                        half way, so a color whose shapes in the two keyframes
+                        do not overlap is held like "nearest" instead
+        nearest       — every frame copies the nearest keyframe
+        hold previous — every frame copies the last keyframe at or before it
+
+    Frames before the first / after the last keyframe hold that keyframe,
+    frames on a keyframe are an exact copy of it.
+
+    Distance fields are computed once per keyframe at sdf_size (longest side,
+    0 = full resolution) and upsampled per frame. Frames are generated
+    chunk_size at a time straight into the uint8 output, so only one chunk of
+    float data exists at a time.
+
+    Output: rgbyp_labels (RGBYP_LABELS) (B, H, W).
+    Use "RGBYP Labels To Mask" for an IMAGE.
+    """
+
+    MODES = ["sdf morph", "nearest", "hold previous"]
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "frame_indices": ("STRING", {"default": "", "multiline": False}),
+                "length": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1}),
+                "mode": (cls.MODES, {"default": "sdf morph"}),
+                "sdf_size": ("INT", {"default": 256, "min": 0, "max": 16384, "step": 16}),
+                "chunk_size": ("INT", {"default": 8, "min": 1, "max": 4096, "step": 1}),
+            },
+            "optional": {
+                "rgbyp_mask": ("IMAGE",),
+                # used instead of rgbyp_mask when connected
+                "rgbyp_labels": (LABELS_TYPE,),
+            },
+        }
+
+    RETURN_TYPES = (LABELS_TYPE,)
+    RETURN_NAMES = ("rgbyp_labels",)
+    FUNCTION = "interpolate"
+    CATEGORY = "AK/RGBYP"
+    DESCRIPTION = "Interpolates a few keyframe RGBYP masks into a mask for every frame (SDF morph or hold)."
+
+    def _parse_indices(self, text, count, length):
+        parts = [p.strip() for p in str(text or "").replace(";", ",").split(",") if p.strip()]
+        if not parts:
+            if count == 1:
+                return [0]
+            last = (length - 1) if length > 1 else (count - 1)
+            return [round(i * last / (count - 1)) for i in range(count)]
+
+        try:
+            indices = [max(int(float(p)), 0) for p in parts]
+        except ValueError:
+            raise ValueError(f"[RGBYPMaskKeyframes] invalid frame_indices: '{text}'")
+
+        if len(indices) != count:
+            raise ValueError(
+                f"[RGBYPMaskKeyframes] {count} keyframes but {len(indices)} frame indices: '{text}'"
+            )
+        return indices
+
+    def _sdf_size(self, h, w, sdf_size):
+        sdf_size = int(sdf_size or 0)
+        if sdf_size <= 0 or max(h, w) <= sdf_size:
+            return h, w
+        scale = sdf_size / float(max(h, w))
+        return max(int(round(h * scale)), 1), max(int(round(w * scale)), 1)
+
+    def _keyframe_sdf(self, labels, size):
+        """
+        (5, h, w) signed distances of the five colors of one keyframe.
+        """
+        if tuple(labels.shape) != tuple(size):
+            labels = resize_labels(labels, size, mode="majority")
+        masks = torch.stack([labels == k for k in range(1, 6)])
+        return signed_distance(masks)
+
+    def _disjoint(self, sdf_a, sdf_b):
+        """
+        Colors (list of channel indices) present in both keyframes whose
+        shapes do not overlap. Blending their distance fields would make the
+        color vanish mid-way, so they are held instead of morphed.
+        """
+        inside_a, inside_b = sdf_a < 0, sdf_b < 0
+        return [
+            c for c in range(5)
+            if bool(inside_a[c].any()) and bool(inside_b[c].any())
+            and not bool((inside_a[c] & inside_b[c]).any())
+        ]
+
+    def _classify(self, sdf, size):
+        """
+        sdf: (n, 5, h, w) → uint8 labels (n, H, W): the color with the
+        smallest negative distance, 0 where no color is inside.
+        """
+        n = sdf.shape[0]
+        best = None
+        labels = torch.zeros((n,) + tuple(size), dtype=torch.uint8, device=sdf.device)
+        for c in range(5):
+            d = sdf[:, c : c + 1]
+            if tuple(d.shape[-2:]) != tuple(size):
+                d = F.interpolate(d, size=size, mode="bilinear", align_corners=False)
+            d = d[:, 0]
+            if best is None:
+                best = torch.minimum(d, torch.zeros_like(d))
+                labels.masked_fill_(d < 0, c + 1)
+            else:
+                better = d < best
+                best = torch.where(better, d, best)
+                labels.masked_fill_(better, c + 1)
+            del d
+        return labels
+
+    def interpolate(
+        self,
+        frame_indices="",
+        length=0,
+        mode="sdf morph",
+        sdf_size=256,
+        chunk_size=8,
+        rgbyp_mask=None,
+        rgbyp_labels=None,
+    ):
+        keys = as_labels(rgbyp_labels if rgbyp_labels is not None else rgbyp_mask)
+        if keys is None:
+            raise ValueError("connect rgbyp_mask or rgbyp_labels")
+
+        key_labels = keys.labels
+        count, h, w = key_labels.shape
+        device = key_labels.device
+        length = int(length or 0)
+
+        indices = self._parse_indices(frame_indices, count, length)
+
+        # sort by frame, the later keyframe wins on duplicate indices
+        by_frame = {}
+        for k, idx in enumerate(indices):
+            by_frame[idx] = k
+        frames_sorted = sorted(by_frame)
+        order = [by_frame[f] for f in frames_sorted]
+
+        total = length if length > 0 else frames_sorted[-1] + 1
+        out = torch.empty((total, h, w), dtype=torch.uint8, device=device)
+
+        key_frames = torch.tensor(frames_sorted, dtype=torch.float64, device=device)
+        order_t = torch.tensor(order, dtype=torch.long, device=device)
+        n_keys = len(frames_sorted)
+
+        sdf_hw = self._sdf_size(h, w, sdf_size)
+        sdf_cache = {}
+        disjoint_seg, disjoint = None, []
+        chunk_size = max(int(chunk_size or 1), 1)
+
+        for start in range(0, total, chunk_size):
+            end = min(start + chunk_size, total)
+            frames = torch.arange(start, end, dtype=torch.float64, device=device)
+
+            # prev = last keyframe at or before the frame (-1 = before the first)
+            prev = torch.bucketize(frames, key_frames, right=True) - 1
+            prev_c = prev.clamp(min=0)
+            nxt = (prev + 1).clamp(max=n_keys - 1)
+
+            if mode == "hold previous":
+                out[start:end] = key_labels[order_t[prev_c]]
+                continue
+
+            if mode == "nearest":
+                d_prev = (frames - key_frames[prev_c]).abs()
+                d_next = (key_frames[nxt] - frames).abs()
+                pick = torch.where((prev >= 0) & (d_prev <= d_next), prev_c, nxt)
+                out[start:end] = key_labels[order_t[pick]]
+                continue
+
+            # sdf morph: exact keyframes and held frames are copies
+            on_key = (prev >= 0) & (frames == key_frames[prev_c])
+            outside = (prev < 0) | (prev >= n_keys - 1)
+            copy = on_key | outside
+            if bool(copy.any()):
+                src = torch.where(prev < 0, nxt, prev_c)
+                rows = copy.nonzero()[:, 0]
+                out[start + rows] = key_labels[order_t[src[rows]]]
+
+            between = ~copy
+            if not bool(between.any()):
+                continue
+
+            for a in torch.unique(prev[between]).tolist():
+                rows = (between & (prev == a)).nonzero()[:, 0]
+                b = a + 1
+
+                # keep only the two keyframes of the current segment
+                for k in list(sdf_cache):
+                    if k not in (a, b):
+                        del sdf_cache[k]
+                for k in (a, b):
+                    if k not in sdf_cache:
+                        sdf_cache[k] = self._keyframe_sdf(key_labels[order[k]], sdf_hw)
+                if disjoint_seg != a:
+                    disjoint = self._disjoint(sdf_cache[a], sdf_cache[b])
+                    disjoint_seg = a
+
+                t = (frames[rows] - key_frames[a]) / (key_frames[b] - key_frames[a])
+                t = t.to(torch.float32).view(-1, 1, 1, 1)
+                sdf = sdf_cache[a].unsqueeze(0) * (1.0 - t) + sdf_cache[b].unsqueeze(0) * t
+                for c in disjoint:
+                    # nearest keyframe, the earlier one on a tie (as "nearest")
+                    sdf[:, c] = torch.where(t[:, 0] <= 0.5, sdf_cache[a][c], sdf_cache[b][c])
+
+                out[start + rows] = self._classify(sdf, (h, w))
+                del sdf
+
+        return (RGBYPLabels(out, keys.palette, keys.names),)
+
+
+NODE_CLASS_MAPPINGS = {
+    "RGBYPMaskKeyframes": RGBYPMaskKeyframes,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "RGBYPMaskKeyframes": "RGBYP Mask Keyframes",
+}
@@ -1,5 +1,15 @@
 import json
 
+from .rgbyp_strength import (
+    BLUR_KEYS,
+    GROW_KEYS,
+    STRENGTH_KEYS,
+    parse_grow_blur_text,
+    parse_schedule,
+    schedule_to_json,
+)
+
+
 class RGBYPMaskStrength:
     @classmethod
     def INPUT_TYPES(cls):
@@ -17,7 +27,17 @@ class RGBYPMaskStrength:
                 "yellow_strength": ("FLOAT", float_cfg),
                 "pink_strength": ("FLOAT", float_cfg),
                 "combined_strength": ("FLOAT", float_cfg),
-            }
+            },
+            "optional": {
+                # per-frame schedules, one line per color, overriding the widget value:
+                #   red: 0:0.2, 15:1.0      keyframes (linear in between)
+                #   green: 0.1, 0.5, 0.9    one value per frame
+                "schedule": ("STRING", {"default": "", "multiline": True}),
+                # per-color grow / blur for RGBYPMaskToRegularMasks, one line per color:
+                #   red: 16, 40             grow, blur
+                #   combined: , 8           blur only
+                "grow_blur": ("STRING", {"default": "", "multiline": True}),
+            },
         }
 
     RETURN_TYPES = ("STRING",)
@@ -25,7 +45,39 @@ class RGBYPMaskStrength:
     FUNCTION = "build"
     CATEGORY = "AK/RGBYP"
 
-    def build(self, red_strength, green_strength, blue_strength, yellow_strength, pink_strength, combined_strength):
+    def _parse_schedule_text(self, text):
+        schedules = {}
+        if not isinstance(text, str):
+            return schedules
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#") or ":" not in line:
+                continue
+            name, spec = line.split(":", 1)
+            name = name.strip().lower()
+            if not name.endswith("_strength"):
+                name = name + "_strength"
+            if name not in STRENGTH_KEYS:
+                print(f"[RGBYPMaskStrength] unknown color in schedule: '{line}'")
+                continue
+            schedule = parse_schedule(spec)
+            if schedule is None:
+                print(f"[RGBYPMaskStrength] invalid schedule: '{line}'")
+                continue
+            schedules[name] = schedule_to_json(schedule)
+        return schedules
+
+    def build(
+        self,
+        red_strength,
+        green_strength,
+        blue_strength,
+        yellow_strength,
+        pink_strength,
+        combined_strength,
+        schedule="",
+        grow_blur="",
+    ):
         settings = {
             "ak_id": "mask_strength_settings",
             "red_strength": red_strength,
@@ -35,6 +87,12 @@ class RGBYPMaskStrength:
             "pink_strength": pink_strength,
             "combined_strength": combined_strength,
         }
+        settings.update(self._parse_schedule_text(schedule))
+        for i, (grow, blur) in parse_grow_blur_text(grow_blur).items():
+            if grow is not None:
+                settings[GROW_KEYS[i]] = grow
+            if blur is not None:
+                settings[BLUR_KEYS[i]] = blur
         return (json.dumps(settings, ensure_ascii=False),)
 
 
@@ -1,4 +1,5 @@
-import json
+from .rgbyp_strength import parse_strength_settings
+
 
 class RGBYPMaskStrengthOut:
     @classmethod
@@ -6,7 +7,11 @@ class RGBYPMaskStrengthOut:
         return {
             "required": {
                 "strength_settings": ("STRING", {"default": "", "multiline": False, "forceInput": True}),
-            }
+            },
+            "optional": {
+                # frame of a per-frame strength schedule to output
+                "frame": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1}),
+            },
         }
 
     RETURN_TYPES = ("FLOAT", "FLOAT", "FLOAT", "FLOAT", "FLOAT", "FLOAT")
@@ -21,46 +26,13 @@ class RGBYPMaskStrengthOut:
     FUNCTION = "extract"
     CATEGORY = "AK/RGBYP"
 
-    def _to_float(self, v, default=0.0):
-        try:
-            if v is None:
-                return default
-            return float(v)
-        except Exception:
-            return default
-
-    def _parse_json(self, s):
-        if s is None:
-            return None
-        if isinstance(s, dict):
-            return s
-        if isinstance(s, str):
-            st = s.strip()
-            if st == "":
-                return None
-            try:
-                return json.loads(st)
-            except Exception:
-                return None
-        return None
-
-    def extract(self, strength_settings):
-        data = self._parse_json(strength_settings)
-
-        if not isinstance(data, dict):
-            return (None, None, None, None, None, None)
+    def extract(self, strength_settings, frame=0):
+        settings = parse_strength_settings(strength_settings)
 
-        if str(data.get("ak_id", "")).strip() != "mask_strength_settings":
+        if settings is None:
             return (None, None, None, None, None, None)
 
-        return (
-            self._to_float(data.get("red_strength", 0.0)),
-            self._to_float(data.get("green_strength", 0.0)),
-            self._to_float(data.get("blue_strength", 0.0)),
-            self._to_float(data.get("yellow_strength", 0.0)),
-            self._to_float(data.get("pink_strength", 0.0)),
-            self._to_float(data.get("combined_strength", 0.0)),
-        )
+        return settings.frame(frame, default=0.0)
 
 
 NODE_CLASS_MAPPINGS = {
@@ -1,5 +1,7 @@
 import torch
-import json
+
+from .rgbyp_labels import LABELS_TYPE, RGBYPLabels
+from .rgbyp_strength import NO_SETTINGS, parse_strength_settings
 
 
 class RGBYPMaskToList:
@@ -9,6 +11,9 @@ class RGBYPMaskToList:
     Input:
         rgbyp_mask (IMAGE) — color mask from the RGBYP editor,
             expected format (B, H, W, C), float32 in [0..1]
+        or
+        rgbyp_labels (RGBYP_LABELS) — the same mask as uint8 labels (B, H, W),
+            used instead of rgbyp_mask when connected
 
     Colors:
         R = (255,   0,   0)
@@ -29,11 +34,12 @@ class RGBYPMaskToList:
     @classmethod
     def INPUT_TYPES(cls):
         return {
-            "required": {
-                "rgbyp_mask": ("IMAGE",),
-            },
+            "required": {},
             "optional": {
+                "rgbyp_mask": ("IMAGE",),
                 "strength_settings": ("STRING", {"forceInput": True}),
+                # used instead of rgbyp_mask when connected
+                "rgbyp_labels": (LABELS_TYPE,),
             },
         }
 
@@ -44,96 +50,68 @@ class RGBYPMaskToList:
     FUNCTION = "convert"
     OUTPUT_IS_LIST = (True,)
 
-    def convert(self, rgbyp_mask, strength_settings=None):
+    def convert(self, rgbyp_mask=None, strength_settings=None, rgbyp_labels=None):
         """
-        rgbyp_mask: torch.Tensor, shape (B, H, W, C), values [0..1]
+        rgbyp_mask:   torch.Tensor, shape (B, H, W, C), values [0..1]
+        rgbyp_labels: RGBYPLabels, used instead of rgbyp_mask when given
         """
+        if isinstance(rgbyp_mask, RGBYPLabels) and rgbyp_labels is None:
+            rgbyp_labels = rgbyp_mask
+
+        if rgbyp_labels is None:
+            if rgbyp_mask is None:
+                raise ValueError("connect rgbyp_mask or rgbyp_labels")
+
+            if not isinstance(rgbyp_mask, torch.Tensor):
+                raise TypeError("rgbyp_mask must be a torch.Tensor")
+
+            if rgbyp_mask.ndim != 4 or rgbyp_mask.shape[-1] < 3:
+                raise ValueError(
+                    f"rgbyp_mask must have shape (B, H, W, C>=3), got {tuple(rgbyp_mask.shape)}"
+                )
 
-        if not isinstance(rgbyp_mask, torch.Tensor):
-            raise TypeError("rgbyp_mask must be a torch.Tensor")
+        source = rgbyp_labels.labels if rgbyp_labels is not None else rgbyp_mask
+        device = source.device
+        B, H, W = source.shape[:3]
 
-        if rgbyp_mask.ndim != 4 or rgbyp_mask.shape[-1] < 3:
-            raise ValueError(
-                f"rgbyp_mask must have shape (B, H, W, C>=3), got {tuple(rgbyp_mask.shape)}"
+        # (5, B, 1, 1) per-frame strengths, parsed once per settings string
+        settings = parse_strength_settings(strength_settings) or NO_SETTINGS
+        strengths = settings.resolve(B)[:5].to(device).view(5, B, 1, 1)
+
+        if rgbyp_labels is not None:
+            labels = rgbyp_labels.labels
+            red_bool, green_bool, blue_bool, yellow_bool, pink_bool = (
+                labels == k for k in range(1, 6)
             )
+        else:
+            # Extract R, G, B channels
+            r = rgbyp_mask[..., 0]
+            g = rgbyp_mask[..., 1]
+            b = rgbyp_mask[..., 2]
+
+            # Soft threshold to avoid floating-point mismatches
+            thr_hi = 0.5
+            thr_lo = 0.5
+
+            # R: R=1, G=0, B=0
+            red_bool = (r > thr_hi) & (g < thr_lo) & (b < thr_lo)
+
+            # G: R=0, G=1, B=0
+            green_bool = (g > thr_hi) & (r < thr_lo) & (b < thr_lo)
+
+            # B: R=0, G=0, B=1
+            blue_bool = (b > thr_hi) & (r < thr_lo) & (g < thr_lo)
+
+            # Y: R=1, G=1, B=0
+            yellow_bool = (r > thr_hi) & (g > thr_hi) & (b < thr_lo)
+
+            # P: R=1, G=0, B=1
+            pink_bool = (r > thr_hi) & (g < thr_lo) & (b > thr_hi)
 
-        device = rgbyp_mask.device
-        B, H, W, C = rgbyp_mask.shape
-
-        def _parse_strength_settings(v):
-            if v is None:
-                return None
-            if isinstance(v, str):
-                s = v.strip()
-                if not s:
-                    return None
-                try:
-                    return json.loads(s)
-                except Exception:
-                    return None
-            if isinstance(v, dict):
-                return v
-            return None
-
-        settings = _parse_strength_settings(strength_settings)
-        use_settings = isinstance(settings, dict) and settings.get("ak_id") == "mask_strength_settings"
-
-        def _get_strength(key):
-            if not use_settings:
-                return 1.0
-            try:
-                val = float(settings.get(key, 1.0))
-            except Exception:
-                val = 1.0
-            if val < 0.0:
-                val = 0.0
-            if val > 1.0:
-                val = 1.0
-            return val
-
-        red_strength = _get_strength("red_strength")
-        green_strength = _get_strength("green_strength")
-        blue_strength = _get_strength("blue_strength")
-        yellow_strength = _get_strength("yellow_strength")
-        pink_strength = _get_strength("pink_strength")
-
-        # Extract R, G, B channels
-        r = rgbyp_mask[..., 0]
-        g = rgbyp_mask[..., 1]
-        b = rgbyp_mask[..., 2]
-
-        # Soft threshold to avoid floating-point mismatches
-        thr_hi = 0.5
-        thr_lo = 0.5
-
-        # R: R=1, G=0, B=0
-        red_bool = (r > thr_hi) & (g < thr_lo) & (b < thr_lo)
-
-        # G: R=0, G=1, B=0
-        green_bool = (g > thr_hi) & (r < thr_lo) & (b < thr_lo)
-
-        # B: R=0, G=0, B=1
-        blue_bool = (b > thr_hi) & (r < thr_lo) & (g < thr_lo)
-
-        # Y: R=1, G=1, B=0
-        yellow_bool = (r > thr_hi) & (g > thr_hi) & (b < thr_lo)
-
-        # P: R=1, G=0, B=1
-        pink_bool = (r > thr_hi) & (g < thr_lo) & (b > thr_hi)
-
-        # Convert to float masks (B, H, W)
-        red_mask = red_bool.float()
-        green_mask = green_bool.float()
-        blue_mask = blue_bool.float()
-        yellow_mask = yellow_bool.float()
-        pink_mask = pink_bool.float()
-
-        # Apply strengths (same logic as RGBYPMaskToRegularMasks)
-        red_mask = red_mask * red_strength
-        green_mask = green_mask * green_strength
-        blue_mask = blue_mask * blue_strength
-        yellow_mask = yellow_mask * yellow_strength
-        pink_mask = pink_mask * pink_strength
+        # Convert to float masks (5, B, H, W) and apply all strengths at once
+        stacked = torch.stack([red_bool, green_bool, blue_bool, yellow_bool, pink_bool])
+        stacked = stacked.to(torch.float32).mul_(strengths)
+        red_mask, green_mask, blue_mask, yellow_mask, pink_mask = stacked.unbind(0)
 
         # If mask has no non-zero pixels, replace with (B, 64, 64) black mask
         def ensure_non_empty_or_64x64(mask):
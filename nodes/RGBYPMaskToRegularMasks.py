@@ -1,7 +1,12 @@
 import torch
-import json
-import numpy as np
-from PIL import Image, ImageFilter
+import torch.nn.functional as F
+
+from .rgbyp_box_blur import BLUR_MODES, DEFAULT_PASSES, MAX_PASSES
+from .rgbyp_feather import FEATHER_MODES, sdf_grow_blur
+from .rgbyp_grow_blur import apply_grow_blur, float_to_u8, grow_blur_u8, halo_for, iter_tiles
+from .rgbyp_labels import LABELS_TYPE, RGBYPLabels
+from .rgbyp_resize import rgb_to_labels
+from .rgbyp_strength import NO_SETTINGS, parse_grow_blur_text, parse_strength_settings, resolve_grow_blur
 
 
 class RGBYPMaskToRegularMasks:
@@ -11,6 +16,9 @@ class RGBYPMaskToRegularMasks:
     Input:
         rgbyp_mask (IMAGE) — color mask from the RGBYP editor,
             expected format (B, H, W, C), float32 in [0..1]
+        or
+        rgbyp_labels (RGBYP_LABELS) — the same mask as uint8 labels (B, H, W),
+            used instead of rgbyp_mask when connected
 
     Colors:
         R = (255,   0,   0)
@@ -33,25 +41,86 @@ class RGBYPMaskToRegularMasks:
         If any mask contains no white pixels (fully black),
         it is replaced with a black mask of size 64x64,
         preserving the batch size (B, 64, 64).
+
+    Only the outputs listed in active_outputs are computed (split, scaled and
+    grown/blurred). The others return the black (B, 64, 64) placeholder.
+
+    Tiled mode (tile_size > 0):
+        The mask is split, scaled and grown/blurred tile by tile (with a halo
+        covering the grow/blur footprint) and stitched into preallocated
+        outputs, so peak memory depends on the tile size, not the image size.
+
+    Latent resolution (latent_factor > 1):
+        The masks come out already reduced to latent size (H // factor,
+        W // factor): every latent pixel is the share of its factor x factor
+        block covered by the color (area pooling of the label map), so edges
+        stay soft. grow_strength / blur_strength keep their meaning in image
+        pixels and are divided by the factor, so grow / blur run at latent
+        size. tile_size is not used.
+
+        latent_levels > 1 also fills latent_pyramid: a list with one MASK per
+        level (factor, 2 * factor, 4 * factor, ...), each (6 * B, h, w) with
+        the six outputs one after another (red frames, green frames, ...,
+        combined frames). With latent_levels = 1 latent_pyramid is an empty
+        list, and a ValueError is raised when it is the only connected output.
+
+    SDF feathering (feather_mode = "sdf"):
+        grow / blur become a pointwise ramp over a signed distance field that
+        is computed once per color mask and cached (see rgbyp_feather), so
+        changing grow_strength / blur_strength on the same mask is cheap.
+        With own_strength_in_combined the combined mask is the maximum of the
+        feathered colors. tile_size is not used.
+
+    Box blur (blur_mode = "box"):
+        blur_strength is applied as blur_passes box blurs over summed-area
+        tables (see rgbyp_box_blur), so a wide blur costs the same as a narrow
+        one. tile_size is not used.
+
+    Per-color grow / blur:
+        grow_strength / blur_strength apply to every output unless a color
+        has its own values, from the grow_blur widget ("red: 16, 40", one line
+        per color, see rgbyp_strength) or from strength_settings
+        (red_grow / red_blur ...); the widget wins. The masks to filter are
+        stacked into one (n * B, H, W) batch per distinct (grow, blur) pair,
+        so the usual case is a single filter call for all six outputs.
     """
 
     @classmethod
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "rgbyp_mask": ("IMAGE",),
                 "own_strength_in_combined": ("BOOLEAN", {"default": False}),
                 "grow_strength": ("INT", {"default": 0, "min": 0, "step": 1}),
                 "blur_strength": ("INT", {"default": 0, "min": 0, "step": 1}),
             },
             "optional": {
+                "rgbyp_mask": ("IMAGE",),
                 "strength_settings": ("STRING", {"forceInput": True}),
+                # 0 = process whole frames; >0 = process in tiles of this size (with halo)
+                "tile_size": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 64}),
+                # Comma separated output names to compute, empty = all.
+                # Filled automatically by the frontend from connected outputs.
+                "active_outputs": ("STRING", {"default": "", "multiline": False}),
+                # used instead of rgbyp_mask when connected
+                "rgbyp_labels": (LABELS_TYPE,),
+                # 1 = image resolution; 8 = SD / SDXL / Flux latents
+                "latent_factor": ("INT", {"default": 1, "min": 1, "max": 64, "step": 1}),
+                # >1 = also output latent_pyramid with this many levels
+                "latent_levels": ("INT", {"default": 1, "min": 1, "max": 6, "step": 1}),
+                # "sdf" = grow / blur from a cached distance field (cheap to sweep)
+                "feather_mode": (list(FEATHER_MODES), {"default": "filter"}),
+                # "box" = iterated box blur, same cost for any blur_strength
+                "blur_mode": (list(BLUR_MODES), {"default": "gaussian"}),
+                # box passes: 1 = box, 2 = tent, 3+ = close to Gaussian
+                "blur_passes": ("INT", {"default": DEFAULT_PASSES, "min": 1, "max": MAX_PASSES, "step": 1}),
+                # per-color grow / blur, one line per color: "red: 16, 40"
+                "grow_blur": ("STRING", {"default": "", "multiline": True}),
             },
         }
 
     DESCRIPTION = "Splits an RGBYP mask into separate masks for each color channel."
     CATEGORY = "AK/RGBYP"
-    RETURN_TYPES = ("MASK", "MASK", "MASK", "MASK", "MASK", "MASK")
+    RETURN_TYPES = ("MASK", "MASK", "MASK", "MASK", "MASK", "MASK", "MASK")
     RETURN_NAMES = (
         "red_mask",
         "green_mask",
@@ -59,7 +128,9 @@ class RGBYPMaskToRegularMasks:
         "yellow_mask",
         "pink_mask",
         "combined_mask",
+        "latent_pyramid",
     )
+    OUTPUT_IS_LIST = (False, False, False, False, False, False, True)
     FUNCTION = "convert"
 
     # @classmethod
@@ -67,34 +138,49 @@ class RGBYPMaskToRegularMasks:
     #     return float("nan")
 
     def _parse_strength_settings(self, v):
-        if v is None:
-            return None
-        if isinstance(v, str):
-            s = v.strip()
-            if not s:
-                return None
-            try:
-                return json.loads(s)
-            except Exception:
-                return None
-        if isinstance(v, dict):
-            return v
-        return None
-
-    def _get_strength(self, settings, use_settings, key):
-        if not use_settings:
-            return 1.0
-        try:
-            val = float(settings.get(key, 1.0))
-        except Exception:
-            val = 1.0
-        if val < 0.0:
-            val = 0.0
-        if val > 1.0:
-            val = 1.0
-        return val
-
-    def _apply_grow_blur(self, mask, grow_strength, blur_strength):
+        """
+        strength_settings → StrengthSettings (parsed once per string, see rgbyp_strength).
+        Without valid settings every strength is 1.0.
+        """
+        settings = parse_strength_settings(v)
+        return settings if settings is not None else NO_SETTINGS
+
+    def _parse_active_outputs(self, v):
+        """
+        Returns one bool per RETURN_NAMES entry telling which outputs to compute.
+        Accepts names with or without the "_mask" suffix: "red,combined_mask".
+        Empty / "all" / unknown names only → everything is computed.
+        """
+        count = len(self.RETURN_NAMES)
+        if not isinstance(v, str):
+            return [True] * count
+
+        names = [n.strip().lower() for n in v.replace(";", ",").split(",")]
+        names = [n for n in names if n]
+        if not names or "all" in names:
+            return [True] * count
+
+        wanted = [False] * count
+        for n in names:
+            if n not in self.RETURN_NAMES and not n.endswith("_mask"):
+                n = n + "_mask"
+            if n in self.RETURN_NAMES:
+                wanted[self.RETURN_NAMES.index(n)] = True
+
+        if not any(wanted):
+            return [True] * count
+        return wanted
+
+    def _apply_grow_blur(
+        self,
+        mask,
+        grow_strength,
+        blur_strength,
+        tile_size=0,
+        feather_mode="filter",
+        blur_mode="gaussian",
+        blur_passes=DEFAULT_PASSES,
+    ):
         if mask is None:
             return None
 
@@ -106,79 +192,65 @@ class RGBYPMaskToRegularMasks:
         if gs == 0 and bs == 0:
             return mask
 
-        device = mask.device
-        dtype = mask.dtype
-
-        t = mask.detach().to("cpu").float()
-
-        if t.dim() == 2:
-            batch = [t]
-            batched = False
-        elif t.dim() == 3:
-            batch = [t[i] for i in range(t.shape[0])]
-            batched = True
-        else:
-            batch = [t.reshape(t.shape[-2], t.shape[-1])]
-            batched = False
-
-        out_list = []
-        for m in batch:
-            arr = m.numpy()
-            arr = np.clip(arr, 0.0, 1.0)
-            img = (arr * 255.0 + 0.5).astype(np.uint8)
-            pil = Image.fromarray(img, mode="L")
-
-            if gs > 0:
-                k = gs * 2 + 1
-                pil = pil.filter(ImageFilter.MaxFilter(size=k))
-
-            if bs > 0:
-                pil = pil.filter(ImageFilter.GaussianBlur(radius=bs))
-
-            out = torch.from_numpy(np.array(pil, dtype=np.float32) / 255.0)
-            out = torch.clamp(out, 0.0, 1.0)
-            out_list.append(out)
-
-        if batched:
-            out_t = torch.stack(out_list, dim=0)
-        else:
-            out_t = out_list[0]
-
-        out_t = out_t.to(device=device, dtype=dtype)
-        return out_t
+        if feather_mode == "sdf":
+            return sdf_grow_blur(mask, gs, bs)
+        return apply_grow_blur(
+            mask, gs, bs, tile_size=tile_size, blur_mode=blur_mode, blur_passes=blur_passes
+        )
 
-    def convert(
-        self,
-        rgbyp_mask,
-        own_strength_in_combined=False,
-        grow_strength=0,
-        blur_strength=0,
-        strength_settings=None,
-    ):
+    def _grow_blur_params(self, settings, grow_blur, grow_strength, blur_strength):
         """
-        rgbyp_mask: torch.Tensor, shape (B, H, W, C), values [0..1]
+        Six (grow, blur) pairs (R, G, B, Y, P, combined): the widget text
+        overrides strength_settings, which overrides grow / blur_strength.
         """
-
-        if not isinstance(rgbyp_mask, torch.Tensor):
-            raise TypeError("rgbyp_mask must be a torch.Tensor")
-
-        if rgbyp_mask.ndim != 4 or rgbyp_mask.shape[-1] < 3:
-            raise ValueError(
-                f"rgbyp_mask must have shape (B, H, W, C>=3), got {tuple(rgbyp_mask.shape)}"
+        overrides = dict(settings.grow_blur_overrides)
+        for i, (grow, blur) in parse_grow_blur_text(grow_blur).items():
+            old_grow, old_blur = overrides.get(i, (None, None))
+            overrides[i] = (
+                old_grow if grow is None else grow,
+                old_blur if blur is None else blur,
             )
+        return resolve_grow_blur(overrides, grow_strength, blur_strength)
 
-        device = rgbyp_mask.device
-        B, H, W, C = rgbyp_mask.shape
-
-        settings = self._parse_strength_settings(strength_settings)
-        use_settings = isinstance(settings, dict) and settings.get("ak_id") == "mask_strength_settings"
+    def _grow_blur_many(self, masks, params, **feather):
+        """
+        masks: list of (B, H, W) masks (None = skip), params: one (grow, blur)
+        pair per mask. Masks sharing a pair are stacked into one (n * B, H, W)
+        batch and filtered by a single _apply_grow_blur call.
+        """
+        out = list(masks)
+        groups = {}
+        for i, (mask, pair) in enumerate(zip(masks, params)):
+            if mask is not None and pair != (0, 0):
+                groups.setdefault(pair, []).append(i)
+
+        for (gs, bs), idx in groups.items():
+            B = masks[idx[0]].shape[0]
+            stack = torch.cat([masks[i] for i in idx]) if len(idx) > 1 else masks[idx[0]]
+            res = self._apply_grow_blur(stack, gs, bs, **feather)
+            for j, i in enumerate(idx):
+                out[i] = res[j * B : (j + 1) * B]
+        return out
+
+    def _feather_parts(self, parts, grow_strength, blur_strength):
+        """
+        SDF mode, own_strength_in_combined: the combined mask is the maximum
+        of the feathered color masks (parts, each (B, H, W) with its strength).
+        """
+        parts = [p for p in parts if p.sum() > 0]
+        if not parts:
+            return None
+        return torch.stack([
+            self._apply_grow_blur(p, grow_strength, blur_strength, feather_mode="sdf") for p in parts
+        ]).amax(dim=0)
 
-        red_strength = self._get_strength(settings, use_settings, "red_strength")
-        green_strength = self._get_strength(settings, use_settings, "green_strength")
-        blue_strength = self._get_strength(settings, use_settings, "blue_strength")
-        yellow_strength = self._get_strength(settings, use_settings, "yellow_strength")
-        pink_strength = self._get_strength(settings, use_settings, "pink_strength")
-        combined_strength = self._get_strength(settings, use_settings, "combined_strength")
+    def _split_colors(self, rgbyp_mask, labels=None):
+        """
+        Returns five bool tensors (red, green, blue, yellow, pink)
+        with the shape of rgbyp_mask[..., 0] (or of labels, if given).
+        """
+        if labels is not None:
+            return tuple(labels == k for k in range(1, 6))
 
         # Extract R, G, B channels
         r = rgbyp_mask[..., 0]
@@ -204,64 +276,309 @@ class RGBYPMaskToRegularMasks:
         # P: R=1, G=0, B=1
         pink_bool = (r > thr_hi) & (g < thr_lo) & (b > thr_hi)
 
-        # Convert to float masks (B, H, W)
-        red_mask = red_bool.float()
-        green_mask = green_bool.float()
-        blue_mask = blue_bool.float()
-        yellow_mask = yellow_bool.float()
-        pink_mask = pink_bool.float()
-
-        red_mask_raw = red_mask
-        green_mask_raw = green_mask
-        blue_mask_raw = blue_mask
-        yellow_mask_raw = yellow_mask
-        pink_mask_raw = pink_mask
-
-        red_mask = red_mask * red_strength
-        green_mask = green_mask * green_strength
-        blue_mask = blue_mask * blue_strength
-        yellow_mask = yellow_mask * yellow_strength
-        pink_mask = pink_mask * pink_strength
-
-        if own_strength_in_combined:
-            combined_mask = red_mask + green_mask + blue_mask + yellow_mask + pink_mask
-        else:
-            combined_mask = (
-                red_mask_raw
-                + green_mask_raw
-                + blue_mask_raw
-                + yellow_mask_raw
-                + pink_mask_raw
-            ) * combined_strength
-
-        # If mask has no non-zero pixels, replace with (B, 64, 64) black mask
-        def ensure_non_empty_or_64x64(mask):
-            if mask.sum() == 0:
-                return torch.zeros((B, 64, 64), device=device, dtype=mask.dtype)
-            return mask
+        return red_bool, green_bool, blue_bool, yellow_bool, pink_bool
+
+    def _latent_masks(
+        self, coverage, strengths, own_strength_in_combined, wanted, grow_blur, scale, feather=None
+    ):
+        """
+        coverage = (5, B, h, w) color coverage at 1 / scale of the image size.
+        Returns 6 masks (B, h, w), None where not wanted or empty, scaled by
+        strengths and grown / blurred with the grow_blur pairs converted to this size.
+        feather: feather_mode / blur_mode / blur_passes for _apply_grow_blur.
+        """
+        feather = feather or {}
+        B = coverage.shape[1]
+        scaled = coverage * strengths[:5].view(5, B, 1, 1)
+
+        masks = [scaled[i] if wanted[i] else None for i in range(5)]
+        combined = None
+        if wanted[5]:
+            if own_strength_in_combined:
+                combined = scaled.sum(dim=0)
+            else:
+                # colors never overlap → the sum is the "any color" coverage
+                combined = coverage.sum(dim=0) * strengths[5].view(B, 1, 1)
+        masks.append(combined)
+
+        def at_scale(v):
+            return max(int(round(v / scale)), 1) if v > 0 else 0
+
+        params = [(at_scale(gs), at_scale(bs)) for gs, bs in grow_blur]
+        masks = [m if m is not None and m.sum() > 0 else None for m in masks]
+
+        sdf_combined = (
+            masks[5] is not None and own_strength_in_combined and feather.get("feather_mode") == "sdf"
+        )
+        result = self._grow_blur_many(masks[:5] + [None if sdf_combined else masks[5]], params, **feather)
+        if sdf_combined:
+            result[5] = self._feather_parts(scaled, *params[5])
+        return result
+
+    def _convert_latent(
+        self,
+        rgbyp_mask,
+        strengths,
+        own_strength_in_combined,
+        grow_blur,
+        factor,
+        levels,
+        wanted,
+        labels=None,
+        feather=None,
+    ):
+        """
+        convert() at latent resolution, see the class docstring.
+        Returns the 6 masks and the latent_pyramid list.
+        """
+        if labels is None:
+            labels = rgb_to_labels(rgbyp_mask[..., :3])
+        device = labels.device
+        B, H, W = labels.shape
+        if H < factor or W < factor:
+            raise ValueError(f"latent_factor {factor} is larger than the mask ({H}x{W})")
+
+        strengths = strengths.to(device)
+
+        # area pooling, one color at a time: peak memory is one float
+        # (B, H, W) frame batch, not six
+        coverage = torch.stack([
+            F.avg_pool2d((labels == k).unsqueeze(1).to(torch.float32), factor, stride=factor)[:, 0]
+            for k in range(1, 6)
+        ])
+
+        levels = max(int(levels or 1), 1) if wanted[6] else 1
+        pyramid = []
+        result = None
+        scale = factor
+        for level in range(levels):
+            if level > 0:
+                if min(coverage.shape[-2:]) < 2:
+                    break
+                coverage = F.avg_pool2d(coverage, 2, stride=2)
+                scale *= 2
+
+            # pyramid levels hold all six masks
+            level_wanted = [True] * 6 if levels > 1 else list(wanted[:6])
+            masks = self._latent_masks(
+                coverage, strengths, own_strength_in_combined, level_wanted, grow_blur, scale, feather
+            )
+            h, w = coverage.shape[-2:]
+            if level == 0:
+                result = [
+                    m if m is not None and wanted[i] else torch.zeros((B, 64, 64), device=device)
+                    for i, m in enumerate(masks)
+                ]
+            if levels > 1:
+                pyramid.append(torch.cat([
+                    m if m is not None else torch.zeros((B, h, w), device=device)
+                    for m in masks
+                ]))
+
+        return tuple(result) + (pyramid,)
+
+    def _convert_tiled(
+        self,
+        rgbyp_mask,
+        strengths,
+        own_strength_in_combined,
+        grow_blur,
+        tile_size,
+        wanted,
+        labels=None,
+    ):
+        """
+        Tiled variant of convert(). strengths = (6, B) tensor (R, G, B, Y, P, combined).
+        grow_blur = six (grow, blur) pairs, see _grow_blur_params().
+        wanted = 6 bools, see _parse_active_outputs().
+        labels = optional uint8 (B, H, W), used instead of rgbyp_mask.
+        Returns 6 masks (B, H, W) on the device of the input.
+        """
+        source = labels if labels is not None else rgbyp_mask
+        device = source.device
+        B, H, W = source.shape[:3]
+
+        # one halo wide enough for the widest wanted grow / blur
+        halo = max(halo_for(gs, bs) for gs, bs in grow_blur)
+
+        outs = [
+            torch.zeros((B, H, W), dtype=torch.float32) if wanted[idx] else None
+            for idx in range(6)
+        ]
+        has_pixels = [False] * 6
+
+        for bi in range(B):
+            frame_strengths = strengths[:, bi].tolist()
+            combined_strength = frame_strengths[5]
+            for y0, y1, x0, x1, hy0, hy1, hx0, hx1 in iter_tiles(H, W, tile_size, halo):
+                if labels is not None:
+                    bools = self._split_colors(None, labels[bi, hy0:hy1, hx0:hx1])
+                else:
+                    bools = self._split_colors(rgbyp_mask[bi, hy0:hy1, hx0:hx1, :3])
+                raw = [m.float() for m in bools]
+                scaled = [m * s for m, s in zip(raw, frame_strengths)]
+
+                if own_strength_in_combined:
+                    combined = scaled[0] + scaled[1] + scaled[2] + scaled[3] + scaled[4]
+                else:
+                    combined = (raw[0] + raw[1] + raw[2] + raw[3] + raw[4]) * combined_strength
+
+                cy0, cy1 = y0 - hy0, y1 - hy0
+                cx0, cx1 = x0 - hx0, x1 - hx0
+
+                for idx, m in enumerate(scaled + [combined]):
+                    if not wanted[idx]:
+                        continue
+                    m = m.detach().to("cpu")
+                    if not has_pixels[idx] and bool(m[cy0:cy1, cx0:cx1].any()):
+                        has_pixels[idx] = True
+
+                    dst = outs[idx][bi, y0:y1, x0:x1]
+                    gs, bs = grow_blur[idx]
+                    if gs == 0 and bs == 0:
+                        dst.copy_(m[cy0:cy1, cx0:cx1])
+                        continue
+
+                    res = grow_blur_u8(float_to_u8(m.numpy()), gs, bs)
+                    dst.copy_(torch.from_numpy(res[cy0:cy1, cx0:cx1].copy()))
+                    dst.div_(255.0)
+
+        result = []
+        for idx, out in enumerate(outs):
+            if out is None or not has_pixels[idx]:
+                out = torch.zeros((B, 64, 64), dtype=torch.float32)
+            result.append(out.to(device=device))
+        return tuple(result)
+
+    def convert(
+        self,
+        rgbyp_mask=None,
+        own_strength_in_combined=False,
+        grow_strength=0,
+        blur_strength=0,
+        strength_settings=None,
+        tile_size=0,
+        active_outputs="",
+        rgbyp_labels=None,
+        latent_factor=1,
+        latent_levels=1,
+        feather_mode="filter",
+        blur_mode="gaussian",
+        blur_passes=DEFAULT_PASSES,
+        grow_blur="",
+    ):
+        """
+        rgbyp_mask:   torch.Tensor, shape (B, H, W, C), values [0..1]
+        rgbyp_labels: RGBYPLabels, used instead of rgbyp_mask when given
+        """
+        if isinstance(rgbyp_mask, RGBYPLabels) and rgbyp_labels is None:
+            rgbyp_labels = rgbyp_mask
+
+        labels = rgbyp_labels.labels if rgbyp_labels is not None else None
+
+        if labels is None:
+            if rgbyp_mask is None:
+                raise ValueError("connect rgbyp_mask or rgbyp_labels")
+
+            if not isinstance(rgbyp_mask, torch.Tensor):
+                raise TypeError("rgbyp_mask must be a torch.Tensor")
+
+            if rgbyp_mask.ndim != 4 or rgbyp_mask.shape[-1] < 3:
+                raise ValueError(
+                    f"rgbyp_mask must have shape (B, H, W, C>=3), got {tuple(rgbyp_mask.shape)}"
+                )
+
+        source = labels if labels is not None else rgbyp_mask
+        device = source.device
+        B, H, W = source.shape[:3]
+
+        # (6, B): per-frame strengths of R, G, B, Y, P and combined
+        settings = self._parse_strength_settings(strength_settings)
+        strengths = settings.resolve(B)
+        params = self._grow_blur_params(settings, grow_blur, grow_strength, blur_strength)
+
+        wanted = self._parse_active_outputs(active_outputs)
+        feather = {"feather_mode": feather_mode, "blur_mode": blur_mode, "blur_passes": blur_passes}
+
+        latent_factor = max(int(latent_factor or 1), 1)
+        latent_levels = max(int(latent_levels or 1), 1)
+        if latent_levels == 1 and not any(wanted[:6]):
+            # only latent_pyramid is connected, but there is no pyramid at one level
+            raise ValueError(
+                "latent_pyramid needs latent_levels > 1 (got 1), "
+                "set latent_levels to the number of pyramid levels"
+            )
+
+        if latent_factor > 1 or latent_levels > 1:
+            return self._convert_latent(
+                rgbyp_mask,
+                strengths,
+                own_strength_in_combined,
+                params,
+                latent_factor,
+                latent_levels,
+                wanted,
+                labels=labels,
+                feather=feather,
+            )
 
-        red_mask = ensure_non_empty_or_64x64(red_mask)
-        green_mask = ensure_non_empty_or_64x64(green_mask)
-        blue_mask = ensure_non_empty_or_64x64(blue_mask)
-        yellow_mask = ensure_non_empty_or_64x64(yellow_mask)
-        pink_mask = ensure_non_empty_or_64x64(pink_mask)
-        combined_mask = ensure_non_empty_or_64x64(combined_mask)
-
-        red_mask = self._apply_grow_blur(red_mask, grow_strength, blur_strength)
-        green_mask = self._apply_grow_blur(green_mask, grow_strength, blur_strength)
-        blue_mask = self._apply_grow_blur(blue_mask, grow_strength, blur_strength)
-        yellow_mask = self._apply_grow_blur(yellow_mask, grow_strength, blur_strength)
-        pink_mask = self._apply_grow_blur(pink_mask, grow_strength, blur_strength)
-        combined_mask = self._apply_grow_blur(combined_mask, grow_strength, blur_strength)
-
-        return (
-            red_mask,
-            green_mask,
-            blue_mask,
-            yellow_mask,
-            pink_mask,
-            combined_mask,
+        tile_size = int(tile_size or 0)
+        filter_tiles = feather_mode != "sdf" and blur_mode != "box"
+        if tile_size > 0 and (H > tile_size or W > tile_size) and filter_tiles:
+            return self._convert_tiled(
+                rgbyp_mask,
+                strengths,
+                own_strength_in_combined,
+                params,
+                tile_size,
+                wanted,
+                labels=labels,
+            ) + ([],)
+
+        bools = self._split_colors(rgbyp_mask, labels)
+
+        # Raw masks are only needed for wanted colors,
+        # or for all colors when combined is wanted
+        colors = [i for i in range(5) if wanted[i] or wanted[5]]
+        strengths = strengths.to(device)
+
+        # (N, B, H, W) float masks of the needed colors, one allocation
+        stacked = torch.stack([bools[i] for i in colors]).to(torch.float32)
+        del bools
+
+        combined_mask = None
+        if wanted[5] and not own_strength_in_combined:
+            # colors never overlap → the sum is the 0/1 "any color" mask
+            combined_mask = stacked.sum(dim=0) * strengths[5].view(B, 1, 1)
+
+        # one broadcast multiply by the (N, B, 1, 1) strengths
+        stacked.mul_(strengths[colors].view(len(colors), B, 1, 1))
+
+        if wanted[5] and own_strength_in_combined:
+            combined_mask = stacked.sum(dim=0)
+
+        masks = [None] * 5
+        for j, i in enumerate(colors):
+            if wanted[i]:
+                masks[i] = stacked[j]
+        masks.append(combined_mask)
+
+        # empty masks are not filtered, they become the (B, 64, 64) placeholder
+        masks = [m if m is not None and m.sum() > 0 else None for m in masks]
+
+        # all masks to filter in one stacked call per (grow, blur) pair
+        sdf_combined = masks[5] is not None and own_strength_in_combined and feather_mode == "sdf"
+        masks = self._grow_blur_many(
+            masks[:5] + [None if sdf_combined else masks[5]], params, **feather
         )
+        if sdf_combined:
+            masks[5] = self._feather_parts(stacked, *params[5])
+
+        result = [
+            m if m is not None else torch.zeros((B, 64, 64), device=device, dtype=torch.float32)
+            for m in masks
+        ]
+        return tuple(result) + ([],)
 
 
 NODE_CLASS_MAPPINGS = {
@@ -1,16 +1,27 @@
 import os
+import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import torch
 from PIL import Image
 import folder_paths
 
+from .rgbyp_io import tensor_to_u8
+from .rgbyp_labels import LABELS_TYPE, RGBYPLabels
+from .rgbyp_mask_store import INDEX_NAME, content_hash, open_store
+from .rgbyp_resize import LABEL_NAMES, PALETTE_U8, labels_to_rgb, rgb_to_labels
+from .rgbyp_storage import get_storage
+
+# max threads used to convert / encode frames of a batch
+MAX_SAVE_THREADS = 8
+
 
 class RGBYPSaveMask:
     @classmethod
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "rgbyp_mask": ("IMAGE",),
                 "file_path": ("STRING", {"multiline": False, "default": ""}),
                 "file_name": ("STRING", {"multiline": False, "default": ""}),
                 "add_postfix": (
@@ -26,10 +37,19 @@ class RGBYPSaveMask:
                     {
                         "default": True,
                         "label_on": "Override last mask",
-                        "label_off": "Increment 01..99",
+                        "label_off": "Increment 01, 02, ...",
                     },
                 ),
             },
+            "optional": {
+                "rgbyp_mask": ("IMAGE",),
+                # used instead of rgbyp_mask when connected
+                "rgbyp_labels": (LABELS_TYPE,),
+                # frames = one PNG per frame (_f000, _f001, ...; a single frame keeps the plain name)
+                # npz    = all frames in one .npz label stack (uint8 labels + palette)
+                # apng   = all frames in one animated PNG
+                "batch_mode": (["frames", "npz", "apng"], {"default": "frames"}),
+            },
             "hidden": {
                 "unique_id": "UNIQUE_ID",
             },
@@ -39,29 +59,184 @@ class RGBYPSaveMask:
     RETURN_NAMES = ("rgbyp_mask",)
     FUNCTION = "save"
     CATEGORY = "AK/RGBYP"
-    DESCRIPTION = "Saves rgbyp_mask PNG to a folder with optional postfix and versioning."
+    DESCRIPTION = "Saves rgbyp_mask to a folder with optional postfix and versioning. Batches are saved as one PNG per frame, an .npz label stack or an APNG. Unchanged masks are not written again."
     OUTPUT_NODE = True
 
-    def _save_tensor_as_png(self, image_tensor, path):
+    def _frame_to_u8(self, frame):
+        """
+        One frame of IMAGE (H,W,C) -> (uint8 array, PIL mode).
+        """
+        if frame.shape[-1] < 3:
+            pad = 3 - frame.shape[-1]
+            frame = torch.cat([frame, frame[..., :1].repeat(1, 1, pad)], dim=-1)
+
+        if frame.shape[-1] >= 4:
+            return tensor_to_u8(frame[..., :4]), "RGBA"
+        return tensor_to_u8(frame[..., :3]), "RGB"
+
+    def _frame_hash(self, arr_u8, mode):
+        """
+        Version key of one frame. A frame made of palette colors only is keyed
+        by its labels, so the same mask gets the same key from rgbyp_mask
+        (RGB or RGBA) and from rgbyp_labels; any other frame by its pixels.
+        """
+        frame = torch.from_numpy(arr_u8)
+        labels = rgb_to_labels(frame)
+        if torch.equal(labels_to_rgb(labels, alpha=mode == "RGBA", dtype=torch.uint8), frame):
+            return content_hash(labels.numpy(), "labels")
+        return content_hash(arr_u8, mode)
+
+    def _map_parallel(self, fn, items):
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(it) for it in items]
+        workers = max(1, min(len(items), os.cpu_count() or 1, MAX_SAVE_THREADS))
+        # PIL encoding, zlib and hashlib release the GIL → real parallelism
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, items))
+
+    def _write_png(self, arr_u8, mode, path):
         try:
-            img0 = image_tensor[0].detach().cpu().clamp(0.0, 1.0)
+            Image.fromarray(arr_u8, mode=mode).save(path, format="PNG")
+        except Exception as e:
+            print(f"[RGBYPSaveMask] ERROR saving PNG '{path}': {e}")
 
-            if img0.shape[-1] < 3:
-                pad = 3 - img0.shape[-1]
-                img0 = torch.cat([img0, img0[..., :1].repeat(1, 1, pad)], dim=-1)
+    def _write_apng(self, frames, path):
+        try:
+            images = [Image.fromarray(arr, mode=mode) for arr, mode in frames]
+            images[0].save(path, format="PNG", save_all=True, append_images=images[1:])
+        except Exception as e:
+            print(f"[RGBYPSaveMask] ERROR saving APNG '{path}': {e}")
 
-            if img0.shape[-1] >= 4:
-                rgba = img0[..., :4].numpy()
-                rgba_u8 = (rgba * 255.0).round().astype(np.uint8)
-                Image.fromarray(rgba_u8, mode="RGBA").save(path, format="PNG")
-            else:
-                rgb = img0[..., :3].numpy()
-                rgb_u8 = (rgb * 255.0).round().astype(np.uint8)
-                Image.fromarray(rgb_u8, mode="RGB").save(path, format="PNG")
+    def _write_npz(self, labels, path):
+        try:
+            # np.savez appends ".npz" to names without it → write through a file object
+            with open(path, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    labels=labels,
+                    palette=PALETTE_U8.numpy(),
+                    label_names=np.array(LABEL_NAMES),
+                )
         except Exception as e:
-            print(f"[RGBYPSaveMask] ERROR saving PNG '{path}': {e}")
+            print(f"[RGBYPSaveMask] ERROR saving NPZ '{path}': {e}")
+
+    def _build_outputs(self, rgbyp_mask, batch_mode, rgbyp_labels=None):
+        """
+        Returns a list of (file_suffix, sha, writer) for the batch,
+        writer(path) writes that one file. rgbyp_labels is used instead of
+        rgbyp_mask when given.
+        """
+        source = rgbyp_labels.labels if rgbyp_labels is not None else rgbyp_mask
+        batch = int(source.shape[0])
+
+        if batch_mode == "npz":
+            if rgbyp_labels is not None:
+                labels = rgbyp_labels.labels.cpu().numpy()
+            else:
+                labels = rgb_to_labels(rgbyp_mask.detach()).cpu().numpy()
+            sha = content_hash(labels, "labels")
+            return [(".npz", sha, lambda path: self._write_npz(labels, path))]
+
+        def convert(i):
+            if rgbyp_labels is not None:
+                # labels → RGBA uint8 directly, no float frame
+                arr_u8 = rgbyp_labels.select(slice(i, i + 1)).to_rgb(alpha=True, dtype=torch.uint8)
+                arr_u8, mode = arr_u8[0].cpu().numpy(), "RGBA"
+            else:
+                arr_u8, mode = self._frame_to_u8(rgbyp_mask[i])
+            return arr_u8, mode, self._frame_hash(arr_u8, mode)
+
+        frames = self._map_parallel(convert, range(batch))
+
+        if batch_mode == "apng" and batch > 1:
+            h = hashlib.blake2b(digest_size=16)
+            for _, _, frame_sha in frames:
+                h.update(frame_sha.encode("ascii"))
+            pairs = [(arr, mode) for arr, mode, _ in frames]
+            return [(".png", "apng:" + h.hexdigest(), lambda path: self._write_apng(pairs, path))]
+
+        if batch == 1:
+            arr, mode, sha = frames[0]
+            return [(".png", sha, lambda path: self._write_png(arr, mode, path))]
+
+        width = max(3, len(str(batch - 1)))
+        outputs = []
+        for i, (arr, mode, sha) in enumerate(frames):
+            outputs.append(
+                (
+                    f"_f{i:0{width}d}.png",
+                    sha,
+                    lambda path, arr=arr, mode=mode: self._write_png(arr, mode, path),
+                )
+            )
+        return outputs
+
+    def _write_outputs(self, folder, name, outputs):
+        """
+        Writes every output as <name><suffix> in parallel.
+        Returns the list of file names that exist afterwards (None if any is missing).
+        """
+        files = [name + suffix for suffix, _, _ in outputs]
+        self._map_parallel(
+            lambda item: item[0](os.path.join(folder, item[1])),
+            [(writer, f) for (_, _, writer), f in zip(outputs, files)],
+        )
+        for f in files:
+            if not os.path.isfile(os.path.join(folder, f)):
+                print(f"[RGBYPSaveMask] ERROR: file not found after save attempt: {os.path.join(folder, f)}")
+                return None
+        storage = get_storage()
+        for f in files:
+            storage.publish(os.path.join(folder, f))
+        return files
+
+    def _remove_stale(self, folder, stem, files, store):
+        """
+        Override mode: delete the files of the previous save under stem
+        (<stem>.png, <stem>.npz, <stem>_f000.png, ...) that are not in files,
+        e.g. the extra frames of a longer batch.
+        """
+        pattern = re.compile(re.escape(stem) + r"(?:_f\d{3,}\.png|\.png|\.npz)")
+        keep = set(files or ())
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return
+        storage = get_storage()
+        for name in names:
+            if name in keep or not pattern.fullmatch(name):
+                continue
+            path = os.path.join(folder, name)
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"[RGBYPSaveMask] ERROR removing stale file '{path}': {e}")
+                continue
+            storage.remove(path)
+            store.forget_file(name)
+
+    def save(
+        self,
+        file_path,
+        file_name,
+        add_postfix=True,
+        override=True,
+        rgbyp_mask=None,
+        rgbyp_labels=None,
+        batch_mode="frames",
+        unique_id=None,
+    ):
+        if isinstance(rgbyp_mask, RGBYPLabels) and rgbyp_labels is None:
+            rgbyp_labels, rgbyp_mask = rgbyp_mask, None
+
+        if rgbyp_mask is None and rgbyp_labels is None:
+            print("[RGBYPSaveMask] ERROR: connect rgbyp_mask or rgbyp_labels")
+            return (None,)
+
+        if rgbyp_mask is None:
+            rgbyp_mask = rgbyp_labels.to_rgb(alpha=True)
 
-    def save(self, rgbyp_mask, file_path, file_name, add_postfix=True, override=True, unique_id=None):
         if not isinstance(file_path, str) or not isinstance(file_name, str):
             return (rgbyp_mask,)
 
@@ -89,89 +264,86 @@ class RGBYPSaveMask:
 
         base_name = file_name
 
+        # name without the version suffix
         if add_postfix:
-            base_with_suffix = f"{base_name}_rgbyp_mask"
-
-            if override:
-                if unique_id is not None:
-                    final_name = f"{base_with_suffix}_{unique_id}"
-                else:
-                    final_name = base_with_suffix
-            else:
-                if unique_id is not None:
-                    base_with_suffix_node = f"{base_with_suffix}_{unique_id}"
-                else:
-                    base_with_suffix_node = base_with_suffix
-
-                max_index = 0
-                try:
-                    for existing in os.listdir(folder):
-                        if not existing.lower().endswith(".png"):
-                            continue
-
-                        name_no_ext, _ = os.path.splitext(existing)
-                        prefix = base_with_suffix_node + "_"
-
-                        if not name_no_ext.startswith(prefix):
-                            continue
-
-                        tail = name_no_ext[len(prefix):]
-                        if len(tail) == 2 and tail.isdigit():
-                            idx = int(tail)
-                            if 1 <= idx <= 99 and idx > max_index:
-                                max_index = idx
-                except Exception as e:
-                    print(f"[RGBYPSaveMask] ERROR scanning folder '{folder}' for mask indexes: {e}")
-                    max_index = 0
-
-                next_index = max_index + 1
-                if next_index > 99:
-                    next_index = 99
-
-                final_name = f"{base_with_suffix_node}_{next_index:02d}"
+            stem = f"{base_name}_rgbyp_mask"
+            if unique_id is not None:
+                stem = f"{stem}_{unique_id}"
         else:
-            if override:
-                final_name = base_name
-            else:
-                max_index = 0
-                try:
-                    for existing in os.listdir(folder):
-                        if not existing.lower().endswith(".png"):
-                            continue
-
-                        name_no_ext, _ = os.path.splitext(existing)
-                        prefix = base_name + "_"
-                        if not name_no_ext.startswith(prefix):
-                            continue
-
-                        tail = name_no_ext[len(prefix):]
-                        if len(tail) == 2 and tail.isdigit():
-                            idx = int(tail)
-                            if 1 <= idx <= 99 and idx > max_index:
-                                max_index = idx
-                except Exception as e:
-                    print(f"[RGBYPSaveMask] ERROR scanning folder '{folder}' for mask indexes: {e}")
-                    max_index = 0
-
-                next_index = max_index + 1
-                if next_index > 99:
-                    next_index = 99
-
-                final_name = f"{base_name}_{next_index:02d}"
-
-        full_path = os.path.join(folder, final_name + ".png")
+            stem = base_name
 
+        # one all-black check for the whole batch, on the tensor's device
         try:
-            arr = rgbyp_mask[0].detach().cpu().numpy()
-            if arr.max() <= 1e-6:
+            source = rgbyp_labels.labels if rgbyp_labels is not None else rgbyp_mask.detach()
+            if source.numel() == 0 or float(source.max()) <= 1e-6:
                 return (rgbyp_mask,)
         except Exception as e:
             print(f"[RGBYPSaveMask] ERROR checking mask for black: {e}")
 
-        self._save_tensor_as_png(rgbyp_mask, full_path)
+        try:
+            outputs = self._build_outputs(rgbyp_mask, batch_mode, rgbyp_labels)
+        except Exception as e:
+            print(f"[RGBYPSaveMask] ERROR converting mask: {e}")
+            return (rgbyp_mask,)
 
-        if not os.path.isfile(full_path):
-            print(f"[RGBYPSaveMask] ERROR: file not found after save attempt: {full_path}")
+        if len(outputs) == 1:
+            sha = outputs[0][1]
+        else:
+            h = hashlib.blake2b(digest_size=16)
+            for _, frame_sha, _ in outputs:
+                h.update(frame_sha.encode("ascii"))
+            sha = "frames:" + h.hexdigest()
+
+        # versions saved by other workers (shared storage)
+        storage = get_storage()
+        index_path = os.path.join(folder, INDEX_NAME)
+        storage.fetch(index_path)
+        store = open_store(folder)
+
+        if override:
+            files = [stem + suffix for suffix, _, _ in outputs]
+            if not all(store.file_matches(f, o[1]) for f, o in zip(files, outputs)):
+                files = self._write_outputs(folder, stem, outputs)
+                if files:
+                    for f, (_, frame_sha, _) in zip(files, outputs):
+                        store.record_file(f, frame_sha)
+            # else: same pixels are already in these files → nothing to write
+            if files:
+                self._remove_stale(folder, stem, files, store)
+            if not store.dirty:
+                return (rgbyp_mask,)
+        else:
+            _, latest = store.latest(stem)
+            latest_files = latest.get("files") or ([latest["file"]] if latest.get("file") else [])
+            latest_shas = latest.get("shas") or [latest.get("sha")]
+            if (
+                latest.get("sha") == sha
+                and len(latest_files) == len(outputs)
+                and all(store.file_matches(f, fs) for f, fs in zip(latest_files, latest_shas))
+            ):
+                # unchanged since the last version → nothing to write
+                store.save()
+                return (rgbyp_mask,)
+
+            version = store.next_version(stem)
+            existing_file = store.file_for(sha) if len(outputs) == 1 else None
+
+            if existing_file:
+                # identical content is stored already → only record a reference
+                store.add_version(stem, version, existing_file, sha)
+            else:
+                files = self._write_outputs(folder, f"{stem}_{version:02d}", outputs)
+                if files:
+                    frame_shas = [frame_sha for _, frame_sha, _ in outputs]
+                    for f, frame_sha in zip(files, frame_shas):
+                        store.record_file(f, frame_sha)
+                    store.add_version(stem, version, files, sha, frame_shas)
+
+        try:
+            store.save()
+            storage.publish(index_path)
+        except Exception as e:
+            print(f"[RGBYPSaveMask] ERROR writing mask index in '{folder}': {e}")
 
         return (rgbyp_mask,)
 
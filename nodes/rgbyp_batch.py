@@ -0,0 +1,368 @@
+"""
+Headless bulk processing of RGBYP masks, without ComfyUI running.
+
+Reads a folder of RGBYP masks (optionally paired with a folder of images)
+and writes regular per-color masks, using the same code as the nodes:
+
+    RGBYPMaskToRegularMasks.convert    — split, strengths, grow / blur
+    RGBYPMaskCompositeWithStrength     — optional composite mask
+
+Usage (from the ComfyUI-RGBYP-Mask-Editor folder):
+
+    python -m nodes.rgbyp_batch --masks <dir> --out <dir> [options]
+    python -m nodes.rgbyp_batch --help
+
+Pairing with --images: for every image "name.ext" the mask is looked up as
+"name_rgbyp_mask.png", then "name.png" in the masks folder. Masks with a
+different size are resized to the image size (palette-exact, like the Bridge).
+Without --images every PNG in the masks folder is processed.
+
+Pipeline:
+    Every file goes through decode -> convert -> encode on a thread pool.
+    At most --queue files are in flight, so memory stays bounded no matter
+    how large the folder is. Torch ops, PIL filters and PNG encoding release
+    the GIL, so the stages of different files overlap.
+
+Resume:
+    Finished files are appended to PROGRESS_NAME in the output folder,
+    together with the source size / mtime and the settings they were made
+    with. A rerun skips everything already done with the same settings;
+    --restart ignores the progress file.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import torch
+from PIL import Image
+
+from .RGBYPMaskCompositeWithStrength import RGBYPMaskCompositeWithStrength
+from .RGBYPMaskToRegularMasks import RGBYPMaskToRegularMasks
+from .rgbyp_io import load_rgba_u8, tensor_to_u8, u8_to_float
+from .rgbyp_resize import resize_rgbyp
+
+
+PROGRESS_NAME = ".rgbyp_batch_progress.jsonl"
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff")
+
+COLOR_NAMES = ("red", "green", "blue", "yellow", "pink")
+
+
+def _parse_floats(text, count, name):
+    try:
+        values = [float(v) for v in text.replace(";", ",").split(",") if v.strip()]
+    except ValueError:
+        raise SystemExit(f"[rgbyp_batch] ERROR: {name} must be {count} comma separated numbers")
+    if len(values) == 1:
+        values = values * count
+    if len(values) != count:
+        raise SystemExit(f"[rgbyp_batch] ERROR: {name} must be {count} comma separated numbers")
+    return values
+
+
+def find_jobs(masks_dir, images_dir=None):
+    """
+    Returns a sorted list of (name, mask_path, image_path or None).
+    """
+    jobs = []
+
+    if images_dir:
+        for entry in sorted(os.listdir(images_dir)):
+            stem, ext = os.path.splitext(entry)
+            if ext.lower() not in IMAGE_EXTENSIONS:
+                continue
+            for candidate in (f"{stem}_rgbyp_mask.png", f"{stem}.png"):
+                mask_path = os.path.join(masks_dir, candidate)
+                if os.path.isfile(mask_path):
+                    jobs.append((stem, mask_path, os.path.join(images_dir, entry)))
+                    break
+        return jobs
+
+    for entry in sorted(os.listdir(masks_dir)):
+        stem, ext = os.path.splitext(entry)
+        if ext.lower() != ".png":
+            continue
+        path = os.path.join(masks_dir, entry)
+        if os.path.isfile(path):
+            if stem.endswith("_rgbyp_mask"):
+                stem = stem[: -len("_rgbyp_mask")]
+            jobs.append((stem, path, None))
+    return jobs
+
+
+class Progress:
+    """
+    Append-only progress log, one JSON line per finished file.
+    """
+
+    def __init__(self, out_dir, settings_key, restart=False):
+        self.path = os.path.join(out_dir, PROGRESS_NAME)
+        self.settings_key = settings_key
+        self.done = {}
+        self._lock = threading.Lock()
+
+        if restart:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        else:
+            self._load()
+
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except Exception:
+                        # a half-written last line after a crash
+                        continue
+                    if isinstance(rec, dict) and rec.get("settings") == self.settings_key:
+                        self.done[rec.get("name")] = rec.get("source")
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def source_stamp(paths):
+        stamp = []
+        for p in paths:
+            if p:
+                st = os.stat(p)
+                stamp.append([st.st_size, st.st_mtime_ns])
+        return stamp
+
+    def is_done(self, name, stamp):
+        return self.done.get(name) == stamp
+
+    def mark_done(self, name, stamp):
+        rec = {"name": name, "source": stamp, "settings": self.settings_key}
+        with self._lock:
+            self._file.write(json.dumps(rec) + "\n")
+            self._file.flush()
+            self.done[name] = stamp
+
+    def close(self):
+        self._file.close()
+
+
+class BatchProcessor:
+    def __init__(self, args):
+        self.args = args
+        self.splitter = RGBYPMaskToRegularMasks()
+        self.compositor = RGBYPMaskCompositeWithStrength()
+
+        strengths = _parse_floats(args.strengths, 5, "--strengths")
+        self.strength_settings = json.dumps(
+            {
+                "ak_id": "mask_strength_settings",
+                **{f"{c}_strength": s for c, s in zip(COLOR_NAMES, strengths)},
+                "combined_strength": float(args.combined_strength),
+            }
+        )
+        self.composite_strengths = (
+            _parse_floats(args.composite, 5, "--composite") if args.composite else None
+        )
+
+        self.wanted = self.splitter._parse_active_outputs(args.outputs)
+        if self.composite_strengths is not None:
+            # the composite needs all five color masks
+            self.wanted = [True] * 5 + list(self.wanted[5:])
+
+    def settings_key(self):
+        a = self.args
+        key = json.dumps(
+            [
+                self.strength_settings,
+                self.composite_strengths,
+                bool(a.invert),
+                self.wanted,
+                bool(a.own_strength_in_combined),
+                int(a.grow),
+                int(a.blur),
+            ]
+        )
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+    def _decode(self, mask_path, image_path):
+        rgba = load_rgba_u8(mask_path)
+        if image_path:
+            with Image.open(image_path) as img:
+                w, h = img.size
+            if tuple(rgba.shape[:2]) != (h, w):
+                rgba = resize_rgbyp(rgba.unsqueeze(0), (h, w), mode="nearest")[0]
+        return rgba
+
+    def _write_mask(self, mask, path):
+        arr = tensor_to_u8(mask)
+        tmp_path = path + ".tmp"
+        Image.fromarray(arr, mode="L").save(tmp_path, format="PNG")
+        # never leave a half-written PNG behind that a resumed run would trust
+        os.replace(tmp_path, path)
+
+    def process(self, name, mask_path, image_path):
+        a = self.args
+        rgba = self._decode(mask_path, image_path)
+        h, w = int(rgba.shape[0]), int(rgba.shape[1])
+        image = u8_to_float(rgba[..., :3].unsqueeze(0), device=a.device)
+        del rgba
+
+        results = self.splitter.convert(
+            image,
+            own_strength_in_combined=bool(a.own_strength_in_combined),
+            grow_strength=int(a.grow),
+            blur_strength=int(a.blur),
+            strength_settings=self.strength_settings,
+            tile_size=int(a.tile_size),
+            active_outputs=",".join(
+                n for n, on in zip(self.splitter.RETURN_NAMES, self.wanted) if on
+            ),
+        )
+        del image
+
+        # empty outputs come back as (B, 64, 64) placeholders → full size black
+        masks = []
+        for mask in results[:6]:
+            if tuple(mask.shape[-2:]) != (h, w):
+                mask = torch.zeros((1, h, w), dtype=torch.float32, device=mask.device)
+            masks.append(mask)
+
+        for out_name, mask, on in zip(self.splitter.RETURN_NAMES, masks, self.wanted):
+            if on:
+                self._write_mask(mask[0], os.path.join(a.out, f"{name}_{out_name}.png"))
+
+        if self.composite_strengths is not None:
+            (composite,) = self.compositor.composite(
+                *masks[:5], *self.composite_strengths, bool(a.invert)
+            )
+            self._write_mask(composite[0], os.path.join(a.out, f"{name}_composite_mask.png"))
+
+        return name
+
+
+def run(args):
+    if not os.path.isdir(args.masks):
+        print(f"[rgbyp_batch] ERROR: masks folder not found: {args.masks}")
+        return 2
+    if args.images and not os.path.isdir(args.images):
+        print(f"[rgbyp_batch] ERROR: images folder not found: {args.images}")
+        return 2
+
+    os.makedirs(args.out, exist_ok=True)
+
+    processor = BatchProcessor(args)
+    progress = Progress(args.out, processor.settings_key(), restart=args.restart)
+
+    jobs = find_jobs(args.masks, args.images)
+    pending = []
+    skipped = 0
+    for name, mask_path, image_path in jobs:
+        stamp = Progress.source_stamp((mask_path, image_path))
+        if progress.is_done(name, stamp):
+            skipped += 1
+        else:
+            pending.append((name, mask_path, image_path, stamp))
+
+    workers = int(args.workers) if args.workers > 0 else min(os.cpu_count() or 1, 8)
+    max_in_flight = max(int(args.queue), workers)
+
+    print(
+        f"[rgbyp_batch] {len(jobs)} files, {skipped} already done, "
+        f"{len(pending)} to process with {workers} workers"
+    )
+
+    started = time.time()
+    finished = 0
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        it = iter(pending)
+        exhausted = False
+
+        while in_flight or not exhausted:
+            # keep the pipeline filled, but never more than max_in_flight files
+            while not exhausted and len(in_flight) < max_in_flight:
+                job = next(it, None)
+                if job is None:
+                    exhausted = True
+                    break
+                name, mask_path, image_path, stamp = job
+                fut = pool.submit(processor.process, name, mask_path, image_path)
+                in_flight[fut] = (name, stamp)
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, stamp = in_flight.pop(fut)
+                try:
+                    fut.result()
+                    progress.mark_done(name, stamp)
+                    finished += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"[rgbyp_batch] ERROR processing '{name}': {e}")
+
+            if not args.quiet:
+                elapsed = max(time.time() - started, 1e-6)
+                print(
+                    f"[rgbyp_batch] {finished + failed}/{len(pending)} "
+                    f"({finished / elapsed:.1f} files/s)",
+                    end="\r",
+                    flush=True,
+                )
+
+    progress.close()
+    if not args.quiet:
+        print()
+    print(f"[rgbyp_batch] done: {finished} written, {skipped} skipped, {failed} failed")
+    return 1 if failed else 0
+
+
+def build_parser():
+    p = argparse.ArgumentParser(
+        prog="python -m nodes.rgbyp_batch",
+        description="Split folders of RGBYP masks into regular per-color masks.",
+    )
+    p.add_argument("--masks", required=True, help="folder with RGBYP mask PNGs")
+    p.add_argument("--out", required=True, help="output folder")
+    p.add_argument("--images", default="", help="optional folder with the matching images")
+    p.add_argument("--outputs", default="", help="outputs to write, e.g. red,combined (default: all)")
+    p.add_argument("--strengths", default="1.0", help="R,G,B,Y,P strengths (or one value for all)")
+    p.add_argument("--combined-strength", type=float, default=1.0)
+    p.add_argument("--own-strength-in-combined", action="store_true")
+    p.add_argument("--grow", type=int, default=0, help="grow_strength")
+    p.add_argument("--blur", type=int, default=0, help="blur_strength")
+    p.add_argument("--tile-size", type=int, default=0, help="process in tiles of this size (0 = off)")
+    p.add_argument(
+        "--composite",
+        default="",
+        help="also write a composite mask with these R,G,B,Y,P strengths",
+    )
+    p.add_argument("--invert", action="store_true", help="invert mode of the composite")
+    p.add_argument("--workers", type=int, default=0, help="worker threads (0 = auto)")
+    p.add_argument("--queue", type=int, default=16, help="max files in flight")
+    p.add_argument("--device", default="cpu", help="torch device for the split, e.g. cuda")
+    p.add_argument("--restart", action="store_true", help="ignore the progress of earlier runs")
+    p.add_argument("--quiet", action="store_true")
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Gaussian-like blur whose cost does not depend on the radius, in torch.
+
+PIL's GaussianBlur (rgbyp_grow_blur) gets slower with the radius; soft
+regional blending uses radii of 50-200 px. box_blur() instead runs a few box
+blurs in a row. Every box blur is a row pass and a column pass over
+summed-area tables (prefix sums): each output pixel is the difference of two
+table entries, whatever the box width. The tables are built for the whole
+(N, H, W) batch at once, on the tensor's device.
+
+passes sets how closely the result follows a true Gaussian of standard
+deviation sigma (what PIL calls the radius):
+
+    1     plain box blur (hard-edged falloff)
+    2     tent, like a stack blur
+    3     close to Gaussian (PIL itself uses 3 boxes), the default
+    4-6   closer still, a little slower
+
+The box widths for a given sigma and number of passes follow the usual
+"Gaussian from boxes" scheme: widths wl and wl + 2 chosen so the summed
+variance matches sigma^2. Image edges are extended (replicate), like PIL.
+"""
+
+import math
+
+import torch
+import torch.nn.functional as F
+
+
+BLUR_MODES = ("gaussian", "box")
+
+DEFAULT_PASSES = 3
+MAX_PASSES = 6
+
+
+def box_radii(sigma, passes=DEFAULT_PASSES):
+    """
+    Radii of `passes` box blurs whose combined variance is about sigma^2.
+    """
+    passes = min(max(int(passes or DEFAULT_PASSES), 1), MAX_PASSES)
+    sigma = float(sigma)
+    if sigma <= 0:
+        return []
+
+    w_ideal = math.sqrt(12.0 * sigma * sigma / passes + 1.0)
+    wl = int(math.floor(w_ideal))
+    if wl % 2 == 0:
+        wl -= 1
+    wl = max(wl, 1)
+    wu = wl + 2
+
+    m_ideal = (12.0 * sigma * sigma - passes * wl * wl - 4 * passes * wl - 3 * passes) / (-4.0 * wl - 4.0)
+    m = min(max(int(round(m_ideal)), 0), passes)
+
+    radii = [(wl - 1) // 2] * m + [(wu - 1) // 2] * (passes - m)
+    return [r for r in radii if r > 0]
+
+
+def _box_pass(x, radius):
+    """
+    One box blur of width 2 * radius + 1 along the rows of x (N, 1, H, W).
+    """
+    length = x.shape[-1]
+    width = 2 * radius + 1
+
+    # table[..., i] = sum of the first i pixels of the row extended by radius
+    # edge pixels on both sides; filled in place, then summed in place
+    table = x.new_empty(x.shape[:-1] + (length + width,))
+    table[..., 0] = 0.0
+    table[..., 1 : radius + 1] = x[..., :1]
+    table[..., radius + 1 : radius + 1 + length] = x
+    table[..., radius + 1 + length :] = x[..., -1:]
+    table[..., 1:].cumsum_(dim=-1)
+
+    hi = table.narrow(-1, width, length)
+    lo = table.narrow(-1, 0, length)
+    return (hi - lo).div_(width)
+
+
+def box_blur(frames, sigma, passes=DEFAULT_PASSES):
+    """
+    frames: float (N, H, W) or (H, W). Returns the blurred frames, same shape,
+    dtype float32, on the same device.
+    """
+    radii = box_radii(sigma, passes)
+    squeeze = frames.dim() == 2
+    x = frames.reshape(-1, 1, frames.shape[-2], frames.shape[-1]).to(torch.float32)
+    if not radii:
+        out = x.clone()
+    else:
+        # box blurs along different axes commute: all row passes, then all
+        # column passes on the transposed frames (prefix sums along
+        # contiguous memory are several times faster than across it)
+        out = x
+        for r in radii:
+            out = _box_pass(out, r)
+        out = out.transpose(-1, -2).contiguous()
+        for r in radii:
+            out = _box_pass(out, r)
+        out = out.transpose(-1, -2).contiguous()
+    out = out[:, 0]
+    return out[0] if squeeze else out
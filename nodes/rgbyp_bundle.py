@@ -0,0 +1,186 @@
+"""
+One-request bundles of editor session files, served by /rgbyp/bundle.
+
+Opening the editor used to take a request for the state JSON, then one per
+image (original, mask), and the Bridge redraw fetched every composite twice
+with cache busting. A bundle packs a state JSON and the files it references
+(and / or any other files in temp / input / output) into one response:
+
+    uint32 big endian    header length
+    header               JSON, utf-8
+    bodies               the file bytes, back to back
+
+    header = {
+        "meta":  {...} | null,          the state JSON, if one was asked for
+        "parts": [{
+            "key":    "original" | "mask" | "composite" | "<type>/<path>",
+            "name":   file name,
+            "etag":   part version (name + mtime + size),
+            "offset": start in the bodies,
+            "length": body length (0 if cached / missing / pyramid /
+                      head=1, which only lists the parts),
+            "cached": the client listed etag in have=, body left out,
+            "missing": the file does not exist,
+            "pyramid": info.json of the original's tile pyramid plus its
+                       "sha", body left out (the editor loads tiles instead)
+        }, ...]
+    }
+
+The bundle ETag is a hash of the header, and Last-Modified is the newest
+file time, so an unchanged bundle is answered with 304 by the route.
+Parts the client already holds are named in have= and are only listed.
+"""
+
+import hashlib
+import json
+import os
+import struct
+
+from .rgbyp_originals import sha_from_name
+from .rgbyp_pyramid import pyramid_dir
+from .rgbyp_state import read_json
+from .rgbyp_storage import get_storage
+
+
+META_PARTS = ("original", "mask", "composite")
+FOLDER_TYPES = ("temp", "input", "output")
+
+
+def _inside(root, rel):
+    """
+    Absolute path of rel inside root, None if it escapes root.
+    """
+    root = os.path.abspath(root)
+    path = os.path.abspath(os.path.join(root, rel))
+    if os.path.commonpath((root, path)) != root or path == root:
+        return None
+    return path
+
+
+def resolve_file(folders, entry):
+    """
+    Absolute path of "<temp|input|output>/<subfolder/name>". Raises ValueError
+    for unknown folders and names outside them.
+    """
+    folder_type, _, rel = str(entry).partition("/")
+    path = _inside(folders[folder_type], rel) if folder_type in FOLDER_TYPES and rel else None
+    if path is None:
+        raise ValueError(f"invalid file '{entry}'")
+    return path
+
+
+def _part_etag(name, stamp):
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"{name}:{stamp[0]}:{stamp[1]}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _pyramid_info(temp_dir, name):
+    sha = sha_from_name(name)
+    if not sha:
+        return None
+    try:
+        with open(os.path.join(pyramid_dir(temp_dir, sha), "info.json"), "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return dict(info, sha=sha)
+
+
+def collect(folders, meta_name=None, parts=META_PARTS, files=(), have=(), pyramid=False, bodies=True):
+    """
+    Resolve a bundle request. folders maps "temp" / "input" / "output" to
+    directories. Returns (header, paths, stamp): paths are the files whose
+    bodies follow the header, in order; stamp is the newest mtime_ns.
+    bodies=False lists the parts (etags) only. Raises ValueError on names
+    outside the folders.
+    """
+    temp_dir = folders["temp"]
+    have = set(have or ())
+    wanted = []  # (key, name, path)
+
+    meta = None
+    meta_path = None
+    if meta_name:
+        meta_path = _inside(temp_dir, meta_name)
+        if meta_path is None:
+            raise ValueError(f"invalid state json name '{meta_name}'")
+
+    for entry in files or ():
+        path = resolve_file(folders, entry)
+        wanted.append((str(entry), os.path.basename(path), path))
+
+    storage = get_storage()
+    if meta_path:
+        storage.fetch(meta_path)
+        meta, _ = read_json(meta_path)
+        for key in parts or ():
+            if key not in META_PARTS or not meta:
+                continue
+            name = meta.get(key)
+            if not isinstance(name, str) or not name.strip():
+                continue
+            path = _inside(temp_dir, name)
+            if path is not None:
+                wanted.append((key, name, path))
+
+    storage.fetch_many([p for _, _, p in wanted])
+
+    meta_stamp = _stamp(meta_path) if meta_path else None
+    newest = meta_stamp[0] if meta_stamp else 0
+    header_parts = []
+    paths = []
+    offset = 0
+    for key, name, path in wanted:
+        part = {"key": key, "name": name, "offset": offset, "length": 0}
+        stamp = _stamp(path)
+        if stamp is None:
+            part["missing"] = True
+            header_parts.append(part)
+            continue
+
+        newest = max(newest, stamp[0])
+        part["etag"] = _part_etag(name, stamp)
+        info = _pyramid_info(temp_dir, name) if pyramid and key == "original" else None
+        if info is not None:
+            part["pyramid"] = info
+        elif part["etag"] in have:
+            part["cached"] = True
+        elif bodies:
+            part["length"] = stamp[1]
+            paths.append(path)
+            offset += stamp[1]
+        header_parts.append(part)
+
+    header = {"meta": meta, "parts": header_parts}
+    return header, paths, newest
+
+
+def bundle_etag(header):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps(header, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return f'"{h.hexdigest()}"'
+
+
+def pack(header, paths):
+    """
+    The bundle bytes for collect()'s header and paths.
+    """
+    head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    chunks = [struct.pack(">I", len(head)), head]
+    for part, path in zip([p for p in header["parts"] if p["length"]], paths):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) != part["length"]:
+            # rewritten between stat and read: the etag would lie
+            raise OSError(f"'{path}' changed while bundling")
+        chunks.append(data)
+    return b"".join(chunks)
@@ -0,0 +1,271 @@
+"""
+Per-color crops of an image, and stitching processed crops back.
+
+Inpainting one RGBYP region at a time used to mean sampling the full frame
+for every color. crop_regions() cuts the bounding box of every color (plus
+padding) out of every frame and batches the crops; stitch_regions() pastes
+the processed crops back, blended with a feathered version of the region, so
+only the region changes.
+
+All crops of one call have the same size, so they form one IMAGE batch:
+
+    target_size = 0   every box is widened (not resampled) to the largest box
+    target_size > 0   every box is widened to a square and resized to
+                      target_size x target_size (near the image borders a box
+                      may stay non-square and is stretched; stitching undoes it)
+
+RGBYPCrops (socket type RGBYP_CROPS) remembers where every crop came from.
+"""
+
+import torch
+import torch.nn.functional as F
+
+from .rgbyp_grow_blur import apply_grow_blur
+from .rgbyp_resize import LABEL_NAMES
+
+
+CROPS_TYPE = "RGBYP_CROPS"
+
+
+class RGBYPCrops:
+    """
+    size:      (B, H, W) of the cropped image
+    crop_size: (h, w) of every crop
+    boxes:     per crop (frame, label, y0, y1, x0, x1) in the image
+    regions:   per crop uint8 (y1 - y0, x1 - x0) on the CPU, 1 = the label's pixels
+    """
+
+    __slots__ = ("size", "crop_size", "boxes", "regions")
+
+    def __init__(self, size, crop_size, boxes, regions):
+        self.size = tuple(size)
+        self.crop_size = tuple(crop_size)
+        self.boxes = list(boxes)
+        self.regions = list(regions)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __repr__(self):
+        return f"RGBYPCrops(count={len(self)}, crop_size={self.crop_size}, size={self.size})"
+
+
+def parse_colors(value):
+    """
+    "red, yellow" / "r,y" / "" (all) → sorted label ids 1..5.
+    """
+    names = [n.strip().lower() for n in str(value or "").replace(";", ",").split(",")]
+    names = [n for n in names if n]
+    if not names or "all" in names:
+        return [1, 2, 3, 4, 5]
+    labels = set()
+    for n in names:
+        for k in range(1, 6):
+            if n in (LABEL_NAMES[k], LABEL_NAMES[k][0]):
+                labels.add(k)
+                break
+        else:
+            raise ValueError(f"unknown RGBYP color '{n}'")
+    return sorted(labels)
+
+
+def _first_last(any_mask):
+    """
+    any_mask: bool (N, L) → (first, last + 1) index per row, (0, 0) if empty.
+    """
+    n, length = any_mask.shape
+    idx = torch.arange(length, device=any_mask.device)
+    first = torch.where(any_mask, idx, length).amin(dim=1)
+    last = torch.where(any_mask, idx, -1).amax(dim=1) + 1
+    empty = ~any_mask.any(dim=1)
+    first[empty] = 0
+    last[empty] = 0
+    return first, last
+
+
+def _fit(start, end, size, limit):
+    """
+    Widen [start, end) to size (capped at limit), centered, shifted inside [0, limit).
+    """
+    size = min(size, limit)
+    start -= (size - (end - start)) // 2
+    start = max(0, min(start, limit - size))
+    return start, start + size
+
+
+def find_boxes(labels, frames, colors, padding):
+    """
+    labels: uint8 (Bm, H, W); frames: image batch size (mask frame =
+    min(frame, Bm - 1)). Returns [(frame, label, y0, y1, x0, x1)] of the
+    padded bounding boxes of every color present.
+    """
+    bm, h, w = labels.shape
+    found = {}
+    for k in colors:
+        m = labels == k
+        y0, y1 = _first_last(m.any(dim=2))
+        x0, x1 = _first_last(m.any(dim=1))
+        for mf, box in enumerate(zip(y0.tolist(), y1.tolist(), x0.tolist(), x1.tolist())):
+            if box[1] > box[0]:
+                found[(mf, k)] = box
+
+    boxes = []
+    for frame in range(frames):
+        mf = min(frame, bm - 1)
+        for k in colors:
+            box = found.get((mf, k))
+            if box is None:
+                continue
+            y0, y1, x0, x1 = box
+            boxes.append((
+                frame, k,
+                max(y0 - padding, 0), min(y1 + padding, h),
+                max(x0 - padding, 0), min(x1 + padding, w),
+            ))
+    return boxes
+
+
+def _resize(chw, size, mode):
+    if tuple(chw.shape[-2:]) == tuple(size):
+        return chw
+    if mode == "nearest":
+        return F.interpolate(chw.unsqueeze(0), size=size, mode="nearest-exact")[0]
+    return F.interpolate(
+        chw.unsqueeze(0), size=size, mode="bilinear", align_corners=False, antialias=True
+    )[0]
+
+
+def crop_regions(image, labels, colors=(1, 2, 3, 4, 5), padding=32, target_size=0):
+    """
+    image: IMAGE (B, H, W, C); labels: uint8 (Bm, H, W).
+    Returns (crops (N, h, w, C), crop masks (N, h, w), RGBYPCrops).
+    Without any region, the first frame is returned as one crop with an
+    empty mask, which stitching leaves untouched.
+    """
+    B, H, W, C = image.shape
+    if tuple(labels.shape[-2:]) != (H, W):
+        raise ValueError(
+            f"mask size {tuple(labels.shape[-2:])} does not match image size {(H, W)}"
+        )
+    labels = labels.to(image.device)
+    bm = labels.shape[0]
+
+    boxes = find_boxes(labels, B, colors, max(int(padding), 0))
+    if not boxes:
+        boxes = [(0, 0, 0, H, 0, W)]
+
+    target_size = int(target_size or 0)
+    if target_size > 0:
+        fitted = []
+        for frame, k, y0, y1, x0, x1 in boxes:
+            side = max(y1 - y0, x1 - x0)
+            fy0, fy1 = _fit(y0, y1, side, H)
+            fx0, fx1 = _fit(x0, x1, side, W)
+            fitted.append((frame, k, fy0, fy1, fx0, fx1))
+        crop_size = (target_size, target_size)
+    else:
+        ch = max(b[3] - b[2] for b in boxes)
+        cw = max(b[5] - b[4] for b in boxes)
+        fitted = []
+        for frame, k, y0, y1, x0, x1 in boxes:
+            fy0, fy1 = _fit(y0, y1, ch, H)
+            fx0, fx1 = _fit(x0, x1, cw, W)
+            fitted.append((frame, k, fy0, fy1, fx0, fx1))
+        crop_size = (ch, cw)
+
+    crops = torch.empty((len(fitted), crop_size[0], crop_size[1], C), dtype=image.dtype, device=image.device)
+    masks = torch.empty((len(fitted), crop_size[0], crop_size[1]), dtype=torch.float32, device=image.device)
+    regions = []
+    for i, (frame, k, y0, y1, x0, x1) in enumerate(fitted):
+        region = labels[min(frame, bm - 1), y0:y1, x0:x1] == k
+        if k == 0:
+            region = torch.zeros_like(region)
+        regions.append(region.to("cpu", torch.uint8))
+
+        patch = image[frame, y0:y1, x0:x1].permute(2, 0, 1)
+        crops[i] = _resize(patch, crop_size, "bilinear").permute(1, 2, 0)
+        masks[i] = _resize(region.to(torch.float32).unsqueeze(0), crop_size, "nearest")[0]
+
+    return crops.clamp_(0.0, 1.0), masks, RGBYPCrops((B, H, W), crop_size, fitted, regions)
+
+
+def feather_region(region, feather):
+    """
+    uint8 (h, w) region → float alpha (h, w): grown by feather / 2 and blurred
+    by feather / 2, so the blend fades out over about feather pixels
+    outside the region.
+    """
+    alpha = region.to(torch.float32)
+    feather = max(int(feather or 0), 0)
+    if feather == 0:
+        return alpha
+    return apply_grow_blur(alpha, feather // 2, (feather + 1) // 2)
+
+
+def fit_feather(region, box, size, feather):
+    """
+    Largest feather <= feather whose grow + blur footprint around region
+    stays inside its crop box, so the blend is 0 where the box ends. Box
+    sides on the image border do not count, nothing is pasted past them.
+    box: (frame, label, y0, y1, x0, x1); size: (H, W) of the image.
+    """
+    feather = max(int(feather or 0), 0)
+    _, _, y0, y1, x0, x1 = box
+    rows = region.any(dim=1).nonzero()
+    cols = region.any(dim=0).nonzero()
+    if feather == 0 or len(rows) == 0:
+        return feather
+    margins = []
+    if y0 > 0:
+        margins.append(int(rows[0]))
+    if y1 < size[0]:
+        margins.append(y1 - y0 - 1 - int(rows[-1]))
+    if x0 > 0:
+        margins.append(int(cols[0]))
+    if x1 < size[1]:
+        margins.append(x1 - x0 - 1 - int(cols[-1]))
+    if not margins:
+        return feather
+    margin = min(margins)
+    # grow + 3 sigma of the blur, past that the alpha is below 0.2 %
+    while feather > 0 and feather // 2 + 3 * ((feather + 1) // 2) > margin:
+        feather -= 1
+    return feather
+
+
+def stitch_regions(image, crops, info, feather=16):
+    """
+    Paste processed crops (N, h, w, C) back into a copy of image at the boxes
+    of info (RGBYPCrops), blended by the feathered regions. Where the padding
+    is too small for feather, the crop gets a smaller feather (fit_feather)
+    instead of a hard edge at its box.
+    """
+    if len(crops) != len(info):
+        raise ValueError(f"got {len(crops)} crops for {len(info)} regions")
+    B, H, W, C = image.shape
+    if (B, H, W) != info.size:
+        raise ValueError(f"image size {(B, H, W)} does not match the cropped image {info.size}")
+
+    out = image.clone()
+    channels = min(C, crops.shape[-1])
+    reduced = []
+    for i, (frame, k, y0, y1, x0, x1) in enumerate(info.boxes):
+        region = info.regions[i]
+        if k == 0 or not bool(region.any()):
+            continue
+        fitted = fit_feather(region, info.boxes[i], (H, W), feather)
+        if fitted < feather:
+            reduced.append(fitted)
+        alpha = feather_region(region, fitted).to(image.device, image.dtype).unsqueeze(-1)
+        patch = crops[i, ..., :channels].to(image.device, image.dtype).permute(2, 0, 1)
+        patch = _resize(patch, (y1 - y0, x1 - x0), "bilinear").permute(1, 2, 0).clamp(0.0, 1.0)
+
+        dst = out[frame, y0:y1, x0:x1, :channels]
+        dst.mul_(1.0 - alpha).add_(patch * alpha)
+
+    if reduced:
+        print(
+            f"[RGBYPStitchRegions] WARNING: padding too small for feather {feather}, "
+            f"{len(reduced)} crop(s) feathered by {min(reduced)}..{max(reduced)}"
+        )
+    return out
@@ -0,0 +1,318 @@
+"""
+Shared grow / blur engine for RGBYP mask nodes.
+
+grow  = MaxFilter of size (2 * grow_strength + 1)
+blur  = GaussianBlur with radius = blur_strength
+        (blur_mode "box": iterated box blur, see rgbyp_box_blur)
+
+Masks are processed as 8-bit grayscale frames, exactly like the original
+per-node implementations, so results stay bit-identical.
+
+Tiled mode (tile_size > 0):
+    Each frame is processed in fixed-size tiles. Every tile is read with a
+    halo wide enough for the grow and blur footprint, filtered, cropped back
+    to the tile and written into a preallocated output. Peak temporary memory
+    is bounded by the tile size instead of the frame size.
+
+Parallel mode (workers > 0):
+    Frames of a (B, H, W) batch are spread across a process pool. Frames are
+    converted to uint8 once into a shared memory block, workers attach to it
+    by name and filter their frame in place, so no frame data is pickled.
+    Workers are started from a forkserver, not forked from the (threaded,
+    CUDA-initialized) ComfyUI process. They are started without the path of
+    ComfyUI's main.py, so they do not re-import it (and torch / CUDA / the
+    custom nodes with it) as __mp_main__, and only load workers/
+    rgbyp_pool_worker.py (numpy + PIL). Batches below PARALLEL_MIN_PIXELS
+    and platforms without forkserver (Windows) run in-process. A pool whose
+    worker died is dropped and rebuilt on the next call.
+"""
+
+import atexit
+import contextlib
+import importlib.util
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import torch
+import numpy as np
+
+from .rgbyp_box_blur import box_blur
+
+
+# folder of the standalone worker module, on sys.path of the pool processes only
+WORKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workers")
+WORKER_MODULE = "rgbyp_pool_worker"
+
+
+def _load_worker_module():
+    """
+    rgbyp_pool_worker loaded once, under its top-level name, so pool jobs are
+    pickled as rgbyp_pool_worker.grow_blur_shared_worker, which the workers
+    can import without the package.
+    """
+    module = sys.modules.get(WORKER_MODULE)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            WORKER_MODULE, os.path.join(WORKER_DIR, WORKER_MODULE + ".py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[WORKER_MODULE] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+_worker = _load_worker_module()
+_sanitize_strength = _worker._sanitize_strength
+float_to_u8 = _worker.float_to_u8
+grow_blur_u8 = _worker.grow_blur_u8
+halo_for = _worker.halo_for
+iter_tiles = _worker.iter_tiles
+
+
+def grow_blur_frame(frame, grow_strength=0, blur_strength=0, out=None):
+    """
+    frame: torch.Tensor (H, W) float on CPU, values [0..1]
+    out:   optional preallocated torch.Tensor (H, W) float32 on CPU
+
+    Returns the filtered frame as float32 [0..1].
+    """
+    arr = frame.numpy()
+    res = grow_blur_u8(float_to_u8(arr), grow_strength, blur_strength)
+
+    if out is None:
+        out = torch.empty(res.shape, dtype=torch.float32)
+    out.copy_(torch.from_numpy(res))
+    out.div_(255.0)
+    return out
+
+
+def grow_blur_frame_tiled(frame, grow_strength=0, blur_strength=0, tile_size=0, out=None):
+    """
+    Tiled version of grow_blur_frame(). Produces the same result, but never
+    converts more than one (tile + halo) region at a time.
+    """
+    h, w = frame.shape[-2], frame.shape[-1]
+
+    if out is None:
+        out = torch.empty((h, w), dtype=torch.float32)
+
+    if tile_size is None or int(tile_size) <= 0 or (h <= tile_size and w <= tile_size):
+        return grow_blur_frame(frame, grow_strength, blur_strength, out=out)
+
+    halo = halo_for(grow_strength, blur_strength)
+    for y0, y1, x0, x1, hy0, hy1, hx0, hx1 in iter_tiles(h, w, tile_size, halo):
+        region = frame[hy0:hy1, hx0:hx1].numpy()
+        res = grow_blur_u8(float_to_u8(region), grow_strength, blur_strength)
+        core = res[y0 - hy0 : y1 - hy0, x0 - hx0 : x1 - hx0]
+        dst = out[y0:y1, x0:x1]
+        dst.copy_(torch.from_numpy(np.ascontiguousarray(core)))
+        dst.div_(255.0)
+
+    return out
+
+
+# ---------- parallel backend ----------
+
+# Batches with fewer pixels (frames x height x width) run in-process: below
+# this, copying into shared memory and waking the workers costs about as
+# much as filtering the frames one after another
+PARALLEL_MIN_PIXELS = 8 * 1024 * 1024
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_start_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _worker_start_env():
+    """
+    While a worker process starts: no main module path, so neither the
+    forkserver nor the worker re-imports ComfyUI's main.py as __mp_main__,
+    and WORKER_DIR on sys.path, which the forkserver and the worker copy.
+    """
+    main = sys.modules.get("__main__")
+    with _start_lock:
+        if main is not None:
+            saved = {k: main.__dict__[k] for k in ("__file__", "__spec__") if k in main.__dict__}
+            main.__dict__.pop("__file__", None)
+            main.__spec__ = None
+        added = WORKER_DIR not in sys.path
+        if added:
+            sys.path.append(WORKER_DIR)
+        try:
+            yield
+        finally:
+            if added and WORKER_DIR in sys.path:
+                sys.path.remove(WORKER_DIR)
+            if main is not None:
+                main.__dict__.update(saved)
+
+
+def _pool_context():
+    try:
+        if "forkserver" not in multiprocessing.get_all_start_methods():
+            return None
+        ctx = multiprocessing.get_context("forkserver")
+    except Exception:
+        return None
+    # the forkserver loads the worker module once, the workers fork from it
+    ctx.set_forkserver_preload([WORKER_MODULE])
+    return ctx
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is not None and _pool_workers == workers:
+            return _pool
+
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+        ctx = _pool_context()
+        if ctx is None:
+            return None
+
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+        _pool_workers = workers
+        return _pool
+
+
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(_shutdown_pool)
+
+
+def grow_blur_frames_parallel(frames, grow_strength=0, blur_strength=0, tile_size=0, workers=0):
+    """
+    frames: torch.Tensor (N, H, W) float on CPU, values [0..1]
+
+    Returns float32 (N, H, W), or None when the parallel backend cannot be
+    used (the caller then falls back to in-process execution).
+    """
+    n, h, w = frames.shape
+    workers = min(int(workers or 0), n)
+    if workers < 2 or n * h * w < PARALLEL_MIN_PIXELS:
+        return None
+
+    pool = _get_pool(workers)
+    if pool is None:
+        return None
+    worker = _worker.grow_blur_shared_worker
+
+    shm = shared_memory.SharedMemory(create=True, size=n * h * w)
+    try:
+        buf = np.ndarray((n, h, w), dtype=np.uint8, buffer=shm.buf)
+        for i in range(n):
+            buf[i] = float_to_u8(frames[i].numpy())
+
+        jobs = [
+            (shm.name, (n, h, w), i, grow_strength, blur_strength, tile_size)
+            for i in range(n)
+        ]
+        try:
+            # a forkserver pool starts its workers on submit, all jobs are
+            # submitted here
+            with _worker_start_env():
+                results = pool.map(worker, jobs)
+            for _ in results:
+                pass
+        except BrokenProcessPool:
+            # a worker died: drop the pool, the next call starts a new one
+            _shutdown_pool()
+            raise
+
+        out_t = torch.empty((n, h, w), dtype=torch.float32)
+        src = torch.from_numpy(buf)
+        out_t.copy_(src)
+        out_t.div_(255.0)
+        del src, buf
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return out_t
+
+
+def apply_grow_blur(
+    mask, grow_strength=0, blur_strength=0, tile_size=0, workers=0, blur_mode="gaussian", blur_passes=3
+):
+    """
+    Apply grow + blur to a MASK tensor.
+
+    mask: torch.Tensor, shape (H, W), (B, H, W) or (B, 1, H, W)
+    workers: > 0 spreads the frames across a process pool (see module docstring)
+    blur_mode: "box" blurs with blur_passes box blurs on the mask's device
+        (rgbyp_box_blur), whose cost does not depend on blur_strength; grow
+        and tiling still apply to the grow step
+    Returns a tensor with shape (H, W) or (B, H, W) on the input device/dtype.
+    """
+    if mask is None:
+        return None
+
+    if blur_mode == "box" and _sanitize_strength(blur_strength) > 0:
+        grown = mask
+        if _sanitize_strength(grow_strength) > 0:
+            grown = apply_grow_blur(mask, grow_strength, 0, tile_size=tile_size, workers=workers)
+        elif grown.dim() == 4:
+            grown = grown[:, 0]
+        out_t = box_blur(grown.detach(), _sanitize_strength(blur_strength), blur_passes)
+        return out_t.clamp_(0.0, 1.0).to(device=mask.device, dtype=mask.dtype)
+
+    device = mask.device
+    dtype = mask.dtype
+
+    t = mask.detach().to("cpu").float()
+
+    if t.dim() == 2:
+        frames = t.unsqueeze(0)
+        batched = False
+    elif t.dim() == 3:
+        frames = t
+        batched = True
+    elif t.dim() == 4:
+        frames = t[:, 0]
+        batched = True
+    else:
+        frames = t.reshape(1, t.shape[-2], t.shape[-1])
+        batched = False
+
+    n, h, w = frames.shape
+    out_t = None
+
+    if workers:
+        try:
+            out_t = grow_blur_frames_parallel(
+                frames, grow_strength, blur_strength, tile_size=tile_size, workers=workers
+            )
+        except Exception as e:
+            print(f"[rgbyp_grow_blur] parallel backend failed, running in-process: {e}")
+            out_t = None
+
+    if out_t is None:
+        out_t = torch.empty((n, h, w), dtype=torch.float32)
+        for i in range(n):
+            grow_blur_frame_tiled(
+                frames[i], grow_strength, blur_strength, tile_size=tile_size, out=out_t[i]
+            )
+
+    out_t = torch.clamp(out_t, 0.0, 1.0)
+
+    if not batched:
+        out_t = out_t[0]
+
+    return out_t.to(device=device, dtype=dtype)
@@ -0,0 +1,223 @@
+"""
+Import-time benchmark for the package, run in CI.
+
+Every run imports the package (__init__.py) in a fresh interpreter, the way
+ComfyUI loads a custom node folder. It reports the median import time and
+fails when:
+
+    - the median is above --max-ms
+    - startup imported a node module or a heavy dependency (torch, numpy,
+      PIL, ComfyUI's nodes / folder_paths), i.e. registration is no longer lazy
+
+--check also verifies the NODES table in __init__.py against the
+NODE_CLASS_MAPPINGS / NODE_DISPLAY_NAME_MAPPINGS of every node module. The
+modules are read with ast, so neither torch nor ComfyUI has to be installed.
+
+Usage (from the ComfyUI-RGBYP-Mask-Editor folder):
+
+    python -m nodes.rgbyp_import_bench [--runs 15] [--max-ms 50] [--check]
+
+--eager measures the old import-everything startup (RGBYP_EAGER_IMPORT=1) for
+comparison; it needs torch and ComfyUI on the path (--comfy-path).
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "rgbyp_mask_editor"
+
+# must not be imported just by loading the package
+HEAVY_MODULES = ("torch", "numpy", "PIL", "nodes", "folder_paths")
+
+_PROBE = r"""
+import importlib.util, json, sys, time
+root, name = sys.argv[1], sys.argv[2]
+before = set(sys.modules)
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location(
+    name, root + "/__init__.py", submodule_search_locations=[root]
+)
+pkg = importlib.util.module_from_spec(spec)
+sys.modules[name] = pkg
+spec.loader.exec_module(pkg)
+ms = (time.perf_counter() - t0) * 1000.0
+print(json.dumps({
+    "ms": ms,
+    "nodes": len(pkg.NODE_CLASS_MAPPINGS),
+    "modules": sorted(set(sys.modules) - before),
+}))
+"""
+
+
+def probe(eager=False, comfy_path=""):
+    env = dict(os.environ)
+    env.pop("RGBYP_EAGER_IMPORT", None)
+    if eager:
+        env["RGBYP_EAGER_IMPORT"] = "1"
+    if comfy_path:
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (comfy_path, env.get("PYTHONPATH", "")) if p)
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, ROOT, PACKAGE_NAME],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"importing the package failed:\n{out.stderr.strip()}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def heavy_imports(modules):
+    node_prefix = f"{PACKAGE_NAME}.nodes."
+    allowed = {f"{node_prefix}rgbyp_lazy", f"{node_prefix}rgbyp_routes"}
+    found = []
+    for m in modules:
+        top = m.split(".", 1)[0]
+        if top in HEAVY_MODULES or (m.startswith(node_prefix) and m not in allowed):
+            found.append(m)
+    return found
+
+
+def _literal_mapping(tree, name):
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == name for t in node.targets
+        ):
+            if isinstance(node.value, ast.Dict):
+                return node.value
+    return None
+
+
+def module_mappings(path):
+    """
+    (node names, {node name: display name}) of a node module, read with ast.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    classes = _literal_mapping(tree, "NODE_CLASS_MAPPINGS")
+    display = _literal_mapping(tree, "NODE_DISPLAY_NAME_MAPPINGS")
+    if classes is None:
+        return None, {}
+    names = [ast.literal_eval(k) for k in classes.keys]
+    names_display = {}
+    if display is not None:
+        for k, v in zip(display.keys, display.values):
+            names_display[ast.literal_eval(k)] = ast.literal_eval(v)
+    return names, names_display
+
+
+def registry_table():
+    with open(os.path.join(ROOT, "__init__.py"), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "NODES" for t in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    raise RuntimeError("NODES table not found in __init__.py")
+
+
+def check_registry():
+    """
+    Returns a list of problems, empty when the NODES table matches the modules.
+    """
+    problems = []
+    table = registry_table()
+    registered = {}
+    for module, node_name, display_name in table:
+        registered[node_name] = (module, display_name)
+
+    nodes_dir = os.path.join(ROOT, "nodes")
+    for file_name in sorted(os.listdir(nodes_dir)):
+        if not file_name.endswith(".py"):
+            continue
+        module = ".nodes." + file_name[:-3]
+        names, display = module_mappings(os.path.join(nodes_dir, file_name))
+        if names is None:
+            continue
+        for node_name in names:
+            entry = registered.pop(node_name, None)
+            if entry is None:
+                problems.append(f"{node_name} ({module}) is not registered in __init__.NODES")
+                continue
+            if entry[0] != module:
+                problems.append(f"{node_name}: registered from {entry[0]}, defined in {module}")
+            if node_name in display and display[node_name] != entry[1]:
+                problems.append(
+                    f"{node_name}: display name '{entry[1]}' in __init__.NODES, "
+                    f"'{display[node_name]}' in {module}"
+                )
+
+    for node_name, (module, _) in registered.items():
+        problems.append(f"{node_name}: registered from {module}, but not found there")
+    return problems
+
+
+def build_parser():
+    p = argparse.ArgumentParser(
+        prog="python -m nodes.rgbyp_import_bench",
+        description="Measure (and guard) the import time of the RGBYP node package.",
+    )
+    p.add_argument("--runs", type=int, default=15, help="fresh interpreters to import in")
+    p.add_argument("--max-ms", type=float, default=50.0, help="fail above this median (0 = no limit)")
+    p.add_argument("--check", action="store_true", help="also verify the NODES table")
+    p.add_argument("--eager", action="store_true", help="measure RGBYP_EAGER_IMPORT=1 (no limits)")
+    p.add_argument("--comfy-path", default="", help="ComfyUI folder, needed for --eager")
+    return p
+
+
+def run(args):
+    failed = False
+
+    if args.check:
+        problems = check_registry()
+        for problem in problems:
+            print(f"[rgbyp_import_bench] registry: {problem}")
+        if problems:
+            failed = True
+        else:
+            print("[rgbyp_import_bench] registry: NODES table matches the node modules")
+
+    times = []
+    result = None
+    for _ in range(max(int(args.runs), 1)):
+        result = probe(eager=args.eager, comfy_path=args.comfy_path)
+        times.append(result["ms"])
+
+    median = statistics.median(times)
+    mode = "eager" if args.eager else "lazy"
+    print(
+        f"[rgbyp_import_bench] {mode} import: median {median:.1f} ms, "
+        f"min {min(times):.1f} ms, max {max(times):.1f} ms over {len(times)} runs, "
+        f"{result['nodes']} nodes registered"
+    )
+
+    if args.eager:
+        return 1 if failed else 0
+
+    heavy = heavy_imports(result["modules"])
+    if heavy:
+        print(f"[rgbyp_import_bench] FAIL: startup imported {', '.join(heavy)}")
+        failed = True
+    if args.max_ms > 0 and median > args.max_ms:
+        print(f"[rgbyp_import_bench] FAIL: median {median:.1f} ms > limit {args.max_ms:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
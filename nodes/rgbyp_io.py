@@ -0,0 +1,93 @@
+"""
+uint8-native image decode / encode helpers for RGBYP nodes.
+
+Images stay uint8 from PNG decode until the very last step. Alpha is derived
+with integer ops, and there is at most one conversion to float, written into
+a preallocated tensor on the target device. For accelerators the uint8 data
+goes through pinned memory, so the host->device copy is asynchronous and only
+a quarter of the bytes of a float32 copy.
+
+Encoding (float IMAGE -> uint8) is done in row chunks, so only a chunk-sized
+float temporary exists at a time.
+"""
+
+import numpy as np
+import torch
+from PIL import Image
+
+
+# rows converted per step in tensor_to_u8()
+ROW_CHUNK = 256
+
+
+def load_rgba_u8(path):
+    """
+    Decode an image file as a writable uint8 torch tensor (H, W, 4).
+    """
+    with Image.open(path) as img:
+        arr = np.array(img.convert("RGBA"), dtype=np.uint8)
+    return torch.from_numpy(arr)
+
+
+def load_rgb_u8(path):
+    """
+    Decode an image file as a writable uint8 torch tensor (H, W, 3).
+    """
+    with Image.open(path) as img:
+        arr = np.array(img.convert("RGB"), dtype=np.uint8)
+    return torch.from_numpy(arr)
+
+
+def set_mask_alpha_u8_(rgba_u8):
+    """
+    In place: alpha = 255 where any RGB channel is non-zero, else 0.
+    rgba_u8: uint8 tensor (..., 4)
+    """
+    rgb = rgba_u8[..., :3]
+    alpha = rgba_u8[..., 3]
+    torch.amax(rgb, dim=-1, out=alpha)
+    alpha.clamp_(max=1).mul_(255)
+    return rgba_u8
+
+
+def u8_to_float(u8, device="cpu", dtype=torch.float32):
+    """
+    Convert a uint8 tensor to dtype in [0..1] on device with a single
+    float allocation (the output tensor).
+    """
+    device = torch.device(device)
+    out = torch.empty(tuple(u8.shape), dtype=dtype, device=device)
+
+    if device.type != "cpu":
+        src = u8
+        if src.device.type == "cpu":
+            try:
+                src = src.pin_memory()
+                src = src.to(device=device, non_blocking=True)
+            except Exception:
+                src = u8.to(device=device)
+        out.copy_(src)
+    else:
+        out.copy_(u8)
+
+    out.div_(255.0)
+    return out
+
+
+def tensor_to_u8(image, out=None):
+    """
+    float tensor (H, W, C) in [0..1] -> uint8 numpy array (H, W, C),
+    rounding like (x * 255).round(). Converted in row chunks.
+    """
+    h = image.shape[0]
+    if out is None:
+        out = np.empty(tuple(image.shape), dtype=np.uint8)
+    out_t = torch.from_numpy(out)
+
+    for r0 in range(0, h, ROW_CHUNK):
+        r1 = min(r0 + ROW_CHUNK, h)
+        chunk = image[r0:r1].detach().to("cpu", dtype=torch.float32)
+        chunk = chunk.clamp(0.0, 1.0).mul_(255.0).round_()
+        out_t[r0:r1].copy_(chunk)
+
+    return out
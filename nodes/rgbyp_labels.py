@@ -0,0 +1,146 @@
+"""
+Compact RGBYP_LABELS socket type.
+
+An RGBYP mask holds one of six labels per pixel (see rgbyp_resize), but as an
+IMAGE it travels as float32 (B, H, W, 4): 16 bytes per pixel. RGBYP_LABELS
+carries the same mask as a uint8 label tensor (B, H, W) — 1 byte per pixel —
+plus the palette that maps labels back to colors.
+
+Nodes accept either form through as_labels() / as_image(), so an IMAGE is
+only materialized where a node really needs one.
+"""
+
+import torch
+
+from .rgbyp_resize import LABEL_NAMES, PALETTE_U8, rgb_to_labels
+
+
+LABELS_TYPE = "RGBYP_LABELS"
+
+
+class RGBYPLabels:
+    """
+    labels:  uint8 tensor (B, H, W), 0 = none, 1..5 = R, G, B, Y, P
+    palette: uint8 tensor (N, 3), color of every label
+    names:   label names, same order as palette
+    """
+
+    __slots__ = ("labels", "palette", "names")
+
+    def __init__(self, labels, palette=None, names=None):
+        if labels.dim() == 2:
+            labels = labels.unsqueeze(0)
+        if labels.dim() != 3:
+            raise ValueError(f"labels must have shape (B, H, W), got {tuple(labels.shape)}")
+        self.labels = labels if labels.dtype == torch.uint8 else labels.to(torch.uint8)
+        self.palette = PALETTE_U8 if palette is None else palette
+        self.names = tuple(LABEL_NAMES if names is None else names)
+
+    @property
+    def shape(self):
+        return tuple(self.labels.shape)
+
+    @property
+    def device(self):
+        return self.labels.device
+
+    def __len__(self):
+        return int(self.labels.shape[0])
+
+    def __repr__(self):
+        return f"RGBYPLabels(shape={self.shape}, device={self.device})"
+
+    def to(self, device):
+        return RGBYPLabels(self.labels.to(device), self.palette, self.names)
+
+    def select(self, index):
+        """
+        Frames by int / slice / index tensor, as a new RGBYPLabels.
+        """
+        labels = self.labels[index]
+        return RGBYPLabels(labels, self.palette, self.names)
+
+    def masks(self):
+        """
+        Five bool tensors (B, H, W): red, green, blue, yellow, pink.
+        """
+        return tuple(self.labels == k for k in range(1, 6))
+
+    def to_rgb(self, alpha=True, dtype=torch.float32):
+        """
+        (B, H, W, 3|4) in dtype: float in [0..1], uint8 in [0..255].
+        """
+        palette = self.palette.to(self.labels.device)
+        rgb = palette[self.labels.long()]
+        if alpha:
+            a = (self.labels > 0).to(torch.uint8) * 255
+            rgb = torch.cat([rgb, a.unsqueeze(-1)], dim=-1)
+        if dtype == torch.uint8:
+            return rgb
+        return rgb.to(dtype) / 255.0
+
+    @classmethod
+    def from_image(cls, image):
+        """
+        IMAGE (B, H, W, C>=3), float [0..1] or uint8 → RGBYPLabels.
+        """
+        if image.dim() == 3:
+            image = image.unsqueeze(0)
+        if image.dim() != 4 or image.shape[-1] < 3:
+            raise ValueError(
+                f"rgbyp_mask must have shape (B, H, W, C>=3), got {tuple(image.shape)}"
+            )
+        return cls(rgb_to_labels(image))
+
+
+def as_labels(value):
+    """
+    RGBYPLabels, IMAGE tensor or None → RGBYPLabels or None.
+    """
+    if value is None or isinstance(value, RGBYPLabels):
+        return value
+    if isinstance(value, torch.Tensor):
+        return RGBYPLabels.from_image(value)
+    raise TypeError(f"expected IMAGE or {LABELS_TYPE}, got {type(value).__name__}")
+
+
+def as_image(value, alpha=True, dtype=torch.float32):
+    """
+    IMAGE tensor, RGBYPLabels or None → IMAGE tensor or None.
+    """
+    if value is None or isinstance(value, torch.Tensor):
+        return value
+    if isinstance(value, RGBYPLabels):
+        return value.to_rgb(alpha=alpha, dtype=dtype)
+    raise TypeError(f"expected IMAGE or {LABELS_TYPE}, got {type(value).__name__}")
+
+
+def _output_names(active_outputs):
+    names = {n.strip().lower() for n in str(active_outputs or "").replace(";", ",").split(",")}
+    names.discard("")
+    return names
+
+
+def labels_only(active_outputs=""):
+    """
+    True when rgbyp_labels is the only connected mask output, so a loader can
+    decode its PNG straight to labels and never build the float mask.
+    """
+    names = _output_names(active_outputs)
+    return "rgbyp_labels" in names and "rgbyp_mask" not in names and "all" not in names
+
+
+def mask_outputs(mask, active_outputs=""):
+    """
+    rgbyp_mask IMAGE or RGBYPLabels → (rgbyp_mask, rgbyp_labels) for nodes
+    that have both outputs. ComfyUI keeps every output of a node cached, so
+    only the connected ones are produced: active_outputs is the comma
+    separated list of connected output names (filled by the frontend),
+    empty = both. Outputs that are not produced are None.
+    """
+    names = _output_names(active_outputs)
+    if not names or "all" in names:
+        names = {"rgbyp_mask", "rgbyp_labels"}
+
+    labels = as_labels(mask) if "rgbyp_labels" in names else None
+    return (as_image(mask) if "rgbyp_mask" in names else None), labels
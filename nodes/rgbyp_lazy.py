@@ -0,0 +1,105 @@
+"""
+Deferred registration of the RGBYP node classes.
+
+Importing a node module pulls in torch / numpy / PIL, ComfyUI's nodes and
+folder_paths and all RGBYP helpers. The package __init__ registers a small
+stand-in class per node instead, built from a name table. This module uses
+the standard library only.
+
+A stand-in imports its real module on first use of the class, then forwards
+to the real class:
+
+    - attribute access (INPUT_TYPES, RETURN_TYPES, FUNCTION, IS_CHANGED, ...)
+    - instantiation: LazyNode() returns an instance of the real class
+
+So a worker that only runs a prompt imports just the modules of the nodes
+in that prompt, and everything else waits until the UI asks for node info.
+Attributes that ComfyUI sets on a registered class (RELATIVE_PYTHON_MODULE)
+stay on the stand-in and never trigger an import.
+
+Set RGBYP_EAGER_IMPORT=1 to import every module at startup instead (shows
+import errors immediately, useful while developing).
+"""
+
+import importlib
+import os
+import threading
+
+
+EAGER_ENV = "RGBYP_EAGER_IMPORT"
+
+_load_lock = threading.RLock()
+
+
+def eager_import_requested():
+    return os.environ.get(EAGER_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class LazyNodeMeta(type):
+    def _load(cls):
+        real = cls.__dict__.get("_rgbyp_real")
+        if real is not None:
+            return real
+        with _load_lock:
+            real = cls.__dict__.get("_rgbyp_real")
+            if real is None:
+                module = importlib.import_module(cls._rgbyp_module, cls._rgbyp_package)
+                real = getattr(module, "NODE_CLASS_MAPPINGS")[cls._rgbyp_node]
+                type.__setattr__(cls, "_rgbyp_real", real)
+        return real
+
+    def __getattr__(cls, name):
+        # only called for attributes missing on the stand-in itself
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        return getattr(cls._load(), name)
+
+    def __call__(cls, *args, **kwargs):
+        return cls._load()(*args, **kwargs)
+
+    def __repr__(cls):
+        state = "loaded" if cls.__dict__.get("_rgbyp_real") is not None else "not loaded"
+        return f"<lazy RGBYP node '{cls._rgbyp_node}' from {cls._rgbyp_module} ({state})>"
+
+
+def lazy_node(package, module, node_name):
+    """
+    Stand-in class for NODE_CLASS_MAPPINGS[node_name] of module (relative to package).
+    """
+    return LazyNodeMeta(
+        node_name,
+        (),
+        {
+            "_rgbyp_package": package,
+            "_rgbyp_module": module,
+            "_rgbyp_node": node_name,
+            "_rgbyp_real": None,
+            "__module__": f"{package}{module}" if module.startswith(".") else module,
+        },
+    )
+
+
+def is_loaded(node_class):
+    return getattr(node_class, "__dict__", {}).get("_rgbyp_real") is not None
+
+
+def build_mappings(package, table, eager=None):
+    """
+    table: [(module, node_name, display_name), ...], module relative to package.
+    Returns (NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS).
+    eager=True (or RGBYP_EAGER_IMPORT) imports every module and registers the real classes.
+    """
+    if eager is None:
+        eager = eager_import_requested()
+
+    classes = {}
+    display = {}
+    for module, node_name, display_name in table:
+        if eager:
+            mod = importlib.import_module(module, package)
+            classes[node_name] = mod.NODE_CLASS_MAPPINGS[node_name]
+            display[node_name] = mod.NODE_DISPLAY_NAME_MAPPINGS.get(node_name, display_name)
+        else:
+            classes[node_name] = lazy_node(package, module, node_name)
+            display[node_name] = display_name
+    return classes, display
@@ -0,0 +1,214 @@
+"""
+Content-addressed version store for saved RGBYP masks.
+
+Every mask folder gets one small index file (INDEX_NAME) that remembers:
+
+    stems:  "<name>" -> {"latest": N, "versions": {"N": {"file": ..., "sha": ...}}}
+            multi-file versions (one PNG per frame) also keep "files" and "shas"
+    blobs:  "<sha>"  -> file name holding these pixels
+    files:  "<file>" -> {"sha": ..., "mtime": ...} of the pixels written to that file
+
+This gives:
+    - O(1) lookup of the latest version (no directory scan per save)
+    - unlimited, monotonic version numbers (_01 .. _99 .. _100 ..)
+    - dedupe: saving pixels identical to the latest version writes nothing,
+      identical pixels already stored under another file only record a
+      reference in the index
+
+Folders written before the index existed are scanned once per name to pick
+up the highest existing _NN suffix.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+
+INDEX_NAME = ".rgbyp_mask_index.json"
+INDEX_FORMAT = 1
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def content_hash(arr_u8, mode):
+    """
+    Hash of the mask pixels (uint8 numpy array) plus its shape and mode,
+    computed before PNG encoding so unchanged masks are never encoded.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{mode}:{arr_u8.shape}".encode("utf-8"))
+    h.update(np.ascontiguousarray(arr_u8))
+    return h.hexdigest()
+
+
+class MaskVersionStore:
+    def __init__(self, folder):
+        self.folder = folder
+        self.index_path = os.path.join(folder, INDEX_NAME)
+        self.data = {"format": INDEX_FORMAT, "stems": {}, "blobs": {}, "files": {}}
+        self.dirty = False
+        self.mtime = None
+
+    # ---------- persistence ----------
+
+    def load(self):
+        try:
+            self.mtime = os.path.getmtime(self.index_path)
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("format") == INDEX_FORMAT:
+                for key in ("stems", "blobs", "files"):
+                    if not isinstance(data.get(key), dict):
+                        data[key] = {}
+                self.data = data
+        except FileNotFoundError:
+            self.mtime = None
+        except Exception as e:
+            print(f"[RGBYPSaveMask] WARNING: cannot read mask index '{self.index_path}', starting a new one: {e}")
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+        self.mtime = os.path.getmtime(self.index_path)
+        self.dirty = False
+
+    # ---------- lookups ----------
+
+    def _file_sha(self, file_name):
+        """
+        sha recorded for file_name, or None if the file is gone or was
+        modified outside of this store (mtime changed).
+        """
+        info = self.data["files"].get(file_name) if file_name else None
+        if not isinstance(info, dict):
+            return None
+        try:
+            mtime = os.path.getmtime(os.path.join(self.folder, file_name))
+        except OSError:
+            return None
+        if info.get("mtime") != mtime:
+            return None
+        return info.get("sha")
+
+    def _scan_legacy_latest(self, stem):
+        # one-time directory scan for folders written before the index existed
+        pattern = re.compile(
+            r"^" + re.escape(stem) + r"_(\d{2,})(?:_f\d+)?\.(?:png|npz)$", re.IGNORECASE
+        )
+        latest = 0
+        try:
+            for existing in os.listdir(self.folder):
+                m = pattern.match(existing)
+                if m:
+                    latest = max(latest, int(m.group(1)))
+        except Exception as e:
+            print(f"[RGBYPSaveMask] ERROR scanning folder '{self.folder}' for mask indexes: {e}")
+        return latest
+
+    def _stem_entry(self, stem):
+        entry = self.data["stems"].get(stem)
+        if entry is None:
+            entry = {"latest": self._scan_legacy_latest(stem), "versions": {}}
+            self.data["stems"][stem] = entry
+            self.dirty = True
+        return entry
+
+    def latest(self, stem):
+        """
+        Returns (version, info) for the newest version of stem.
+        info is {} or {"file", "sha"[, "files", "shas"]}.
+        """
+        entry = self._stem_entry(stem)
+        version = int(entry.get("latest", 0))
+        info = entry["versions"].get(str(version)) or {}
+        return version, info
+
+    def file_for(self, sha):
+        """
+        File that currently holds these pixels, or None.
+        """
+        file_name = self.data["blobs"].get(sha)
+        if file_name and self._file_sha(file_name) == sha:
+            return file_name
+        return None
+
+    def file_matches(self, file_name, sha):
+        return self._file_sha(file_name) == sha
+
+    # ---------- updates ----------
+
+    def record_file(self, file_name, sha):
+        """
+        file_name was (over)written with pixels sha.
+        """
+        old = self.data["files"].get(file_name)
+        old_sha = old.get("sha") if isinstance(old, dict) else None
+        if old_sha and old_sha != sha and self.data["blobs"].get(old_sha) == file_name:
+            del self.data["blobs"][old_sha]
+        try:
+            mtime = os.path.getmtime(os.path.join(self.folder, file_name))
+        except OSError:
+            mtime = None
+        self.data["files"][file_name] = {"sha": sha, "mtime": mtime}
+        self.data["blobs"][sha] = file_name
+        self.dirty = True
+
+    def forget_file(self, file_name):
+        """
+        file_name was deleted.
+        """
+        info = self.data["files"].pop(file_name, None)
+        sha = info.get("sha") if isinstance(info, dict) else None
+        if sha and self.data["blobs"].get(sha) == file_name:
+            del self.data["blobs"][sha]
+        self.dirty = True
+
+    def next_version(self, stem):
+        return int(self._stem_entry(stem).get("latest", 0)) + 1
+
+    def add_version(self, stem, version, file_name, sha, file_shas=None):
+        """
+        Record version of stem, pointing at file_name (which may belong to another version).
+        file_name may be a list of files (one per frame) with their file_shas.
+        """
+        entry = self._stem_entry(stem)
+        entry["latest"] = max(int(entry.get("latest", 0)), int(version))
+        if isinstance(file_name, (list, tuple)):
+            info = {"file": file_name[0], "sha": sha}
+            if len(file_name) > 1:
+                info["files"] = list(file_name)
+                info["shas"] = list(file_shas or [])
+        else:
+            info = {"file": file_name, "sha": sha}
+        entry["versions"][str(version)] = info
+        self.dirty = True
+        return version
+
+
+def open_store(folder):
+    """
+    Returns the store for folder, re-reading the index only when it changed on disk.
+    """
+    key = os.path.normcase(os.path.abspath(folder))
+    index_path = os.path.join(folder, INDEX_NAME)
+    try:
+        mtime = os.path.getmtime(index_path)
+    except OSError:
+        mtime = None
+
+    with _cache_lock:
+        store = _cache.get(key)
+        if store is None or store.dirty or store.mtime != mtime:
+            store = MaskVersionStore(folder).load()
+            _cache[key] = store
+        return store
@@ -0,0 +1,198 @@
+"""
+Content-addressed originals for RGBYPMaskBridge.
+
+Every Bridge keeps the image it shows in the editor as a PNG in the ComfyUI
+temp folder. The file is named by a hash of the pixels
+(ORIGINAL_PREFIX + "<sha>.png"), so:
+
+    - Bridges fed the same image share one file, hashed and encoded once
+    - different images with the same basename can never overwrite each other
+
+A small index in the temp folder (INDEX_NAME) records which hash every Bridge
+node currently references. A file is deleted when the last node referencing
+it moves on to another image. With shared storage (rgbyp_storage) only the
+local copy is deleted; the shared object may still be referenced by another
+worker and is never overwritten with different pixels, so it is left to the
+store's own cleanup (e.g. a bucket lifecycle rule).
+
+Big originals also get a tile pyramid (rgbyp_pyramid) next to them, which
+lives and dies with the original.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import weakref
+
+import torch
+from PIL import Image
+
+from .rgbyp_io import tensor_to_u8
+from .rgbyp_pyramid import ensure_pyramid, remove_pyramid
+from .rgbyp_state import file_lock, replace_atomically
+from .rgbyp_storage import get_storage
+
+
+ORIGINAL_PREFIX = "rgbyp_original_"
+INDEX_NAME = ".rgbyp_originals.json"
+INDEX_FORMAT = 1
+
+# rows hashed per step, so a GPU image is never copied to the host at once
+HASH_ROWS = 256
+
+_lock = threading.Lock()
+
+# id(tensor) -> (weakref to tensor, tensor._version, sha): the same IMAGE
+# fanned out to several Bridges is hashed only once
+_hash_memo = {}
+
+
+def original_name(sha):
+    return f"{ORIGINAL_PREFIX}{sha}.png"
+
+
+def sha_from_name(file_name):
+    """
+    sha of a content-addressed original, None for any other file name.
+    """
+    name = os.path.basename(file_name or "")
+    if not (name.startswith(ORIGINAL_PREFIX) and name.endswith(".png")):
+        return None
+    return name[len(ORIGINAL_PREFIX) : -len(".png")] or None
+
+
+def _hash_frame(frame):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{frame.dtype}:{tuple(frame.shape)}".encode("utf-8"))
+    for r0 in range(0, frame.shape[0], HASH_ROWS):
+        rows = frame[r0 : r0 + HASH_ROWS].detach().to("cpu", torch.float32).contiguous()
+        h.update(rows.numpy().tobytes())
+    return h.hexdigest()
+
+
+def image_hash(image):
+    """
+    Hash of the first frame of an IMAGE (B, H, W, C), memoized per tensor.
+    """
+    key = id(image)
+    version = getattr(image, "_version", 0)
+    with _lock:
+        memo = _hash_memo.get(key)
+        if memo is not None and memo[0]() is image and memo[1] == version:
+            return memo[2]
+
+    sha = _hash_frame(image[0])
+
+    with _lock:
+        for k in [k for k, v in _hash_memo.items() if v[0]() is None]:
+            del _hash_memo[k]
+        try:
+            _hash_memo[key] = (weakref.ref(image), version, sha)
+        except TypeError:
+            pass
+    return sha
+
+
+def _encode_png(frame, path):
+    """
+    Write frame (H, W, C) in [0..1] as PNG, via a temp file + rename so a
+    concurrent reader never sees a half written file.
+    """
+    if frame.shape[-1] < 3:
+        frame = frame[..., :1].expand(-1, -1, 3)
+    if frame.shape[-1] >= 4:
+        img = Image.fromarray(tensor_to_u8(frame[..., :4]), mode="RGBA")
+    else:
+        img = Image.fromarray(tensor_to_u8(frame[..., :3]), mode="RGB")
+
+    with replace_atomically(path) as tmp_path:
+        img.save(tmp_path, format="PNG")
+
+
+class OriginalStore:
+    def __init__(self, folder):
+        self.folder = folder
+        self.index_path = os.path.join(folder, INDEX_NAME)
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("format") == INDEX_FORMAT:
+                if isinstance(data.get("nodes"), dict):
+                    return data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[RGBYPMaskBridge] WARNING: cannot read '{self.index_path}', starting a new one: {e}")
+        return {"format": INDEX_FORMAT, "nodes": {}}
+
+    def _save(self, data):
+        with replace_atomically(self.index_path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+
+    def _delete_unreferenced(self, sha, nodes):
+        if sha in nodes.values():
+            return
+        try:
+            os.remove(os.path.join(self.folder, original_name(sha)))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[RGBYPMaskBridge] WARNING: cannot remove original '{original_name(sha)}': {e}")
+        remove_pyramid(self.folder, sha)
+
+    def store(self, image, node_id):
+        """
+        Make sure the first frame of image exists as a content-addressed PNG
+        referenced by node_id, and return its file name. Encodes only when
+        no file with these pixels exists yet.
+        """
+        sha = image_hash(image)
+        name = original_name(sha)
+        path = os.path.join(self.folder, name)
+        node_id = str(node_id)
+
+        # the index is shared by every executor process using this temp folder
+        with file_lock(self.index_path):
+            # with shared storage another worker may have stored these pixels already
+            storage = get_storage()
+            if storage.fetch(path) is None:
+                _encode_png(image[0], path)
+                storage.publish(path)
+
+            data = self._load()
+            nodes = data["nodes"]
+            previous = nodes.get(node_id)
+            if previous != sha:
+                nodes[node_id] = sha
+                self._save(data)
+                if previous:
+                    self._delete_unreferenced(previous, nodes)
+
+        # tiles for the editor of big originals, built in the background
+        ensure_pyramid(image, self.folder, sha)
+        return name
+
+    def release(self, node_id):
+        """
+        Drop the reference of node_id, deleting its original if it was the last one.
+        """
+        node_id = str(node_id)
+        with file_lock(self.index_path):
+            data = self._load()
+            previous = data["nodes"].pop(node_id, None)
+            if previous is None:
+                return
+            self._save(data)
+            self._delete_unreferenced(previous, data["nodes"])
+
+    def references(self, sha):
+        """
+        Node ids currently referencing sha.
+        """
+        with file_lock(self.index_path):
+            nodes = self._load()["nodes"]
+        return sorted(n for n, s in nodes.items() if s == sha)
@@ -0,0 +1,101 @@
+"""
+In-memory node previews, sent over ComfyUI's websocket.
+
+The regular preview path writes a PNG (temp or input/rgbyp) that the browser
+then fetches through /view. send_preview() instead hands a small PIL image to
+the PromptServer, which encodes it and sends it on the binary preview channel
+to the client that queued the prompt, the same way samplers show their
+progress previews. Nothing is written to disk.
+
+The composite for the preview is built at preview size: the input image is
+area-downscaled and the mask is label-resized before blending, so a 4K input
+costs a blend of at most max_size x max_size pixels.
+"""
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+
+from .rgbyp_io import load_rgb_u8
+from .rgbyp_resize import resize_rgbyp
+
+
+PREVIEW_FORMAT = "JPEG"
+
+
+def preview_size(h, w, max_size):
+    max_size = int(max_size or 0)
+    if max_size <= 0 or max(h, w) <= max_size:
+        return h, w
+    scale = max_size / float(max(h, w))
+    return max(int(round(h * scale)), 1), max(int(round(w * scale)), 1)
+
+
+def preview_composite(image, mask_path=None, opacity=1.0, max_size=1024):
+    """
+    uint8 numpy (h, w, 3): the first frame of image (B, H, W, C) downscaled to
+    fit max_size, with the RGBYP mask from mask_path (or none) blended on top.
+    """
+    img0 = image[0, :, :, :3].detach().to("cpu", dtype=torch.float32)
+    if img0.shape[-1] < 3:
+        img0 = img0[..., :1].expand(-1, -1, 3)
+    h, w = int(img0.shape[0]), int(img0.shape[1])
+    ph, pw = preview_size(h, w, max_size)
+
+    base = img0
+    if (ph, pw) != (h, w):
+        base = F.interpolate(
+            img0.permute(2, 0, 1).unsqueeze(0), size=(ph, pw), mode="area"
+        )[0].permute(1, 2, 0)
+    base = base.clamp(0.0, 1.0)
+
+    comp = base
+    if mask_path:
+        mask_u8 = load_rgb_u8(mask_path)
+        if tuple(mask_u8.shape[:2]) != (ph, pw):
+            mask_u8 = resize_rgbyp(mask_u8.unsqueeze(0), (ph, pw), mode="nearest")[0]
+        mask = mask_u8.to(torch.float32).div_(255.0)
+        alpha = mask.amax(dim=-1, keepdim=True).mul_(float(max(0.0, min(1.0, opacity))))
+        comp = base * (1.0 - alpha) + mask * alpha
+
+    return comp.clamp(0.0, 1.0).mul_(255.0).round_().to(torch.uint8).contiguous().numpy()
+
+
+def _server():
+    try:
+        from server import BinaryEventTypes, PromptServer
+    except Exception:
+        return None, None
+    instance = getattr(PromptServer, "instance", None)
+    if instance is None:
+        return None, None
+    return instance, BinaryEventTypes
+
+
+def preview_available():
+    """
+    True when running inside ComfyUI with a PromptServer to send previews through.
+    """
+    return _server()[0] is not None
+
+
+def send_preview(rgb_u8, max_size=1024):
+    """
+    Send a uint8 (h, w, 3) preview to the client of the running prompt.
+    Returns False when there is no server (e.g. headless use) or sending failed.
+    """
+    server, event_types = _server()
+    if server is None:
+        return False
+    try:
+        pil = Image.fromarray(np.ascontiguousarray(rgb_u8), mode="RGB")
+        server.send_sync(
+            event_types.UNENCODED_PREVIEW_IMAGE,
+            [PREVIEW_FORMAT, pil, int(max_size) if max_size else None],
+            getattr(server, "client_id", None),
+        )
+        return True
+    except Exception as e:
+        print(f"[RGBYP] ERROR sending preview over websocket: {e}")
+        return False
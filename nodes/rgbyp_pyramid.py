@@ -0,0 +1,189 @@
+"""
+Tiled image pyramids of Bridge originals, for fast editor open on huge images.
+
+For an original with pixel hash <sha> the pyramid lives in
+
+    temp/rgbyp_pyramid/<sha>/info.json
+    temp/rgbyp_pyramid/<sha>/<level>/<col>_<row>.jpg   (.png with alpha)
+
+Level 0 is the full resolution, every next level halves both sides (2x2 area
+average), down to the first level that fits into a single tile. info.json is
+written last, so a pyramid is only visible once it is complete.
+
+The editor loads one coarse level at once (a handful of tiles), so it can be
+used right away. It then fetches level 0 tiles, nearest to the visible area
+first (routes in rgbyp_routes).
+
+Downsampling is vectorized in torch (avg_pool2d over row bands of a uint8
+image), so peak memory is a band of float rows, not a float copy of the
+whole image. Tiles are encoded on a thread pool, and the whole build runs in
+the background so the node does not wait for it.
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+
+from .rgbyp_state import replace_atomically
+
+
+PYRAMID_DIR = "rgbyp_pyramid"
+TILE_SIZE = 512
+JPEG_QUALITY = 90
+# smaller originals load fast enough without a pyramid
+MIN_PYRAMID_SIZE = 2048
+# rows downsampled per step (even, so 2x2 blocks never straddle a band)
+BAND_ROWS = 512
+ENCODE_THREADS = 4
+
+SHA_RE = re.compile(r"^[0-9a-f]{8,64}$")
+
+_builder = None
+_builder_lock = threading.Lock()
+_pending = set()
+
+
+def pyramid_root(temp_dir):
+    return os.path.join(temp_dir, PYRAMID_DIR)
+
+
+def pyramid_dir(temp_dir, sha):
+    if not SHA_RE.match(sha or ""):
+        raise ValueError(f"invalid pyramid id '{sha}'")
+    return os.path.join(pyramid_root(temp_dir), sha)
+
+
+def level_sizes(h, w, tile=TILE_SIZE):
+    """
+    [(h, w), ...] from level 0 down to the first level that fits one tile.
+    """
+    sizes = [(h, w)]
+    while max(h, w) > tile:
+        h, w = (h + 1) // 2, (w + 1) // 2
+        sizes.append((h, w))
+    return sizes
+
+
+def downsample_u8(img_u8):
+    """
+    uint8 tensor (H, W, C) → uint8 (ceil(H/2), ceil(W/2), C), 2x2 area average
+    (edge pixels of odd sizes average what exists).
+    """
+    h, w, c = img_u8.shape
+    out = torch.empty(((h + 1) // 2, (w + 1) // 2, c), dtype=torch.uint8)
+    for r0 in range(0, h, BAND_ROWS):
+        band = img_u8[r0 : r0 + BAND_ROWS].permute(2, 0, 1).unsqueeze(0).to(torch.float32)
+        small = F.avg_pool2d(band, 2, stride=2, ceil_mode=True, count_include_pad=False)
+        o0 = r0 // 2
+        out[o0 : o0 + small.shape[2]] = small[0].permute(1, 2, 0).round_().to(torch.uint8)
+    return out
+
+
+def _save_tile(arr, path, alpha):
+    img = Image.fromarray(np.ascontiguousarray(arr), mode="RGBA" if alpha else "RGB")
+    with replace_atomically(path) as tmp_path:
+        if alpha:
+            img.save(tmp_path, format="PNG", compress_level=1)
+        else:
+            img.save(tmp_path, format="JPEG", quality=JPEG_QUALITY)
+
+
+def build_pyramid(img_u8, out_dir, tile=TILE_SIZE):
+    """
+    Write all levels of img_u8 (uint8 tensor (H, W, 3|4)) as tiles into out_dir,
+    then info.json. Returns the info dict.
+    """
+    h, w, c = img_u8.shape
+    alpha = c >= 4
+    img_u8 = img_u8[..., : 4 if alpha else 3].contiguous()
+    ext = "png" if alpha else "jpg"
+
+    levels = []
+    with ThreadPoolExecutor(max_workers=ENCODE_THREADS) as pool:
+        futures = []
+        level = img_u8
+        for index in range(len(level_sizes(h, w, tile))):
+            lh, lw = int(level.shape[0]), int(level.shape[1])
+            cols, rows = math.ceil(lw / tile), math.ceil(lh / tile)
+            level_dir = os.path.join(out_dir, str(index))
+            os.makedirs(level_dir, exist_ok=True)
+
+            arr = level.numpy()
+            for row in range(rows):
+                for col in range(cols):
+                    part = arr[row * tile : (row + 1) * tile, col * tile : (col + 1) * tile]
+                    path = os.path.join(level_dir, f"{col}_{row}.{ext}")
+                    futures.append(pool.submit(_save_tile, part, path, alpha))
+
+            levels.append({"level": index, "width": lw, "height": lh, "cols": cols, "rows": rows})
+            if max(lh, lw) > tile:
+                level = downsample_u8(level)
+
+        for f in futures:
+            f.result()
+
+    info = {"width": w, "height": h, "tile": tile, "format": ext, "levels": levels}
+    with replace_atomically(os.path.join(out_dir, "info.json")) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+    return info
+
+
+def has_pyramid(temp_dir, sha):
+    return os.path.isfile(os.path.join(pyramid_dir(temp_dir, sha), "info.json"))
+
+
+def _build_job(img_u8, temp_dir, sha):
+    try:
+        build_pyramid(img_u8, pyramid_dir(temp_dir, sha))
+    except Exception as e:
+        print(f"[RGBYP] ERROR building tile pyramid for '{sha}': {e}")
+    finally:
+        with _builder_lock:
+            _pending.discard(sha)
+
+
+def ensure_pyramid(image, temp_dir, sha, wait=False):
+    """
+    Start building the pyramid of the first frame of image (IMAGE, float
+    (B, H, W, C)) in the background, unless it exists, is being built or the
+    image is below MIN_PYRAMID_SIZE. Returns the future (or None).
+    """
+    global _builder
+    h, w = int(image.shape[1]), int(image.shape[2])
+    if max(h, w) < MIN_PYRAMID_SIZE or has_pyramid(temp_dir, sha):
+        return None
+
+    with _builder_lock:
+        if sha in _pending:
+            return None
+        _pending.add(sha)
+        if _builder is None:
+            _builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rgbyp_pyramid")
+
+    # uint8 copy on the CPU, the node may free or change its tensor meanwhile
+    frame = image[0].detach()
+    if frame.shape[-1] < 3:
+        frame = frame[..., :1].expand(-1, -1, 3)
+    img_u8 = frame.to("cpu", torch.float32).clamp(0.0, 1.0).mul(255.0).round_().to(torch.uint8)
+
+    future = _builder.submit(_build_job, img_u8, temp_dir, sha)
+    if wait:
+        future.result()
+    return future
+
+
+def remove_pyramid(temp_dir, sha):
+    try:
+        shutil.rmtree(pyramid_dir(temp_dir, sha), ignore_errors=True)
+    except ValueError:
+        pass
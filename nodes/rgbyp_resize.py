@@ -0,0 +1,188 @@
+"""
+Palette-exact resizing for RGBYP masks.
+
+RGBYP masks hold one of six labels per pixel:
+
+    0 = none (black / transparent)
+    1 = R (255,   0,   0)
+    2 = G (  0, 255,   0)
+    3 = B (  0,   0, 255)
+    4 = Y (255, 255,   0)
+    5 = P (255,   0, 255)
+
+Resizing the RGB image directly (LANCZOS, bilinear) blends colors into values
+the splitters then misclassify. Here masks are converted to a label map,
+resized as labels and converted back, so the result contains palette colors
+only. Everything runs batched in torch on the tensor's device.
+
+Resize modes:
+    "nearest"  — nearest neighbour (pixel-center sampling, same as PIL NEAREST)
+    "majority" — every output pixel takes the label covering most of its
+                 source area (area-weighted vote); best for downscaling
+"""
+
+import torch
+import torch.nn.functional as F
+
+
+LABEL_NAMES = ("none", "red", "green", "blue", "yellow", "pink")
+
+PALETTE_U8 = torch.tensor(
+    [
+        [0, 0, 0],
+        [255, 0, 0],
+        [0, 255, 0],
+        [0, 0, 255],
+        [255, 255, 0],
+        [255, 0, 255],
+    ],
+    dtype=torch.uint8,
+)
+
+# (r_hi | g_hi << 1 | b_hi << 2) -> label; cyan and white are not RGBYP colors
+_BITS_TO_LABEL = torch.tensor([0, 1, 2, 4, 3, 5, 0, 0], dtype=torch.uint8)
+
+RESIZE_MODES = ("nearest", "majority")
+
+
+def rgb_to_labels(rgb):
+    """
+    rgb: tensor (..., C>=3), float in [0..1] or uint8 in [0..255]
+    Returns uint8 labels (...) using the same 0.5 thresholds as the splitters.
+    """
+    r = rgb[..., 0]
+    g = rgb[..., 1]
+    b = rgb[..., 2]
+
+    if rgb.dtype == torch.uint8:
+        bits = (r >= 128).to(torch.uint8)
+        bits |= (g >= 128).to(torch.uint8) << 1
+        bits |= (b >= 128).to(torch.uint8) << 2
+        return _BITS_TO_LABEL.to(rgb.device)[bits.long()]
+
+    bits = (r > 0.5).to(torch.uint8)
+    bits |= (g > 0.5).to(torch.uint8) << 1
+    bits |= (b > 0.5).to(torch.uint8) << 2
+    labels = _BITS_TO_LABEL.to(rgb.device)[bits.long()]
+
+    # a channel exactly at 0.5 is neither "on" nor "off" for the splitters
+    undecided = (r == 0.5) | (g == 0.5) | (b == 0.5)
+    if bool(undecided.any()):
+        labels = labels.masked_fill(undecided, 0)
+    return labels
+
+
+def labels_to_rgb(labels, alpha=False, dtype=torch.float32):
+    """
+    labels: uint8 tensor (...)
+    Returns (..., 3) or (..., 4) in dtype. Float output is in [0..1],
+    uint8 output in [0..255]. Alpha is opaque for every colored pixel.
+    """
+    palette = PALETTE_U8.to(labels.device)
+    rgb = palette[labels.long()]
+
+    if alpha:
+        a = (labels > 0).to(torch.uint8) * 255
+        rgb = torch.cat([rgb, a.unsqueeze(-1)], dim=-1)
+
+    if dtype == torch.uint8:
+        return rgb
+    return rgb.to(dtype) / 255.0
+
+
+def _nearest_index(src, dst, device):
+    # pixel-center sampling, identical to PIL.Image.NEAREST
+    idx = ((torch.arange(dst, device=device, dtype=torch.float64) + 0.5) * (src / dst)).floor()
+    return idx.clamp_(0, src - 1).long()
+
+
+def resize_labels(labels, size, mode="nearest", num_labels=len(LABEL_NAMES)):
+    """
+    labels: uint8 tensor (H, W) or (B, H, W), values in [0, num_labels)
+    size:   (H, W) target size
+    Returns uint8 labels with the target size and the same rank.
+    """
+    th, tw = int(size[0]), int(size[1])
+    squeeze = labels.dim() == 2
+    if squeeze:
+        labels = labels.unsqueeze(0)
+
+    b, h, w = labels.shape
+    if (h, w) == (th, tw):
+        out = labels
+    elif mode == "majority" and (th < h or tw < w):
+        # Area-weighted vote, one label at a time to keep memory at
+        # one float plane of the source size.
+        best_score = None
+        out = None
+        for k in range(num_labels):
+            plane = (labels == k).to(torch.float32).unsqueeze(1)
+            score = F.interpolate(plane, size=(th, tw), mode="area").squeeze(1)
+            del plane
+            if best_score is None:
+                best_score = score
+                out = torch.zeros((b, th, tw), dtype=torch.uint8, device=labels.device)
+            else:
+                better = score > best_score
+                best_score = torch.where(better, score, best_score)
+                out = out.masked_fill(better, k)
+    else:
+        # upscaling has nothing to vote on → nearest
+        ys = _nearest_index(h, th, labels.device)
+        xs = _nearest_index(w, tw, labels.device)
+        out = labels[:, ys][:, :, xs]
+
+    if squeeze:
+        out = out[0]
+    return out
+
+
+def resize_rgbyp(image, size, mode="nearest"):
+    """
+    Resize an RGBYP mask IMAGE (B, H, W, C) to size (H, W).
+    The result has the same channel count and dtype; C >= 4 gets an alpha
+    channel that is opaque on colored pixels.
+    """
+    if tuple(image.shape[1:3]) == (int(size[0]), int(size[1])):
+        return image
+
+    labels = resize_labels(rgb_to_labels(image), size, mode=mode)
+    return labels_to_rgb(labels, alpha=image.shape[-1] >= 4, dtype=image.dtype)
+
+
+def _is_two_level(mask):
+    # hard masks (from the splitters, optionally scaled by a strength)
+    # only contain 0 and one other value
+    if mask.numel() == 0:
+        return True
+    top = mask.max()
+    return bool(((mask == 0) | (mask == top)).all())
+
+
+def resize_mask(mask, size, mode="auto"):
+    """
+    Resize a MASK tensor (B, H, W) to size (H, W).
+
+    mode:
+        "auto"     — hard (two-level) masks are resized as labels with
+                     "majority" so their values stay exact, soft masks use bilinear
+        "nearest" / "majority" — label resize of the two-level mask
+        "bilinear" — plain bilinear interpolation
+    """
+    th, tw = int(size[0]), int(size[1])
+    if tuple(mask.shape[-2:]) == (th, tw):
+        return mask
+
+    if mode == "auto":
+        mode = "majority" if _is_two_level(mask) else "bilinear"
+
+    if mode == "bilinear":
+        out = F.interpolate(
+            mask.unsqueeze(1).float(), size=(th, tw), mode="bilinear", align_corners=False
+        )
+        return out.squeeze(1).to(mask.dtype)
+
+    top = mask.max() if mask.numel() > 0 else torch.tensor(0.0, device=mask.device)
+    labels = (mask != 0).to(torch.uint8)
+    labels = resize_labels(labels, (th, tw), mode=mode, num_labels=2)
+    return labels.to(mask.dtype) * top
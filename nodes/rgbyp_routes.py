@@ -0,0 +1,203 @@
+"""
+HTTP routes of the RGBYP editor, added to ComfyUI's PromptServer.
+
+Imported at startup by __init__.py, so this module only uses the standard
+library at import time; everything else is imported by the handlers. Routes
+are only added when ComfyUI's server module is already loaded (i.e. inside
+ComfyUI), never by importing it.
+
+    GET /rgbyp/pyramid/{sha}                      info.json of a tile pyramid
+    GET /rgbyp/pyramid/{sha}/{level}/{col}_{row}.{jpg|png}   one tile
+    GET /rgbyp/bundle?meta=&parts=&file=&have=&pyramid=&head=   files in
+                                                  one response (rgbyp_bundle)
+    POST /rgbyp/upload/check                      upload-if-absent handshake
+                                                  (rgbyp_uploads)
+
+Pyramids are content-addressed (see rgbyp_pyramid), so responses are cached
+by the browser for good. Bundles carry an ETag and Last-Modified and must be
+revalidated (no-cache): unchanged ones cost a 304.
+"""
+
+import os
+import sys
+
+
+TILE_PATTERN = r"^\d+_\d+\.(?:jpg|png)$"
+IMMUTABLE = "public, max-age=31536000, immutable"
+BUNDLE_RETRIES = 3
+
+_registered = False
+
+
+def _pyramid_dir(sha):
+    import folder_paths
+
+    from .rgbyp_pyramid import pyramid_dir
+
+    return pyramid_dir(folder_paths.get_temp_directory(), sha)
+
+
+def _file_response(web, path):
+    if not os.path.isfile(path):
+        return web.Response(status=404)
+    return web.FileResponse(path, headers={"Cache-Control": IMMUTABLE})
+
+
+def _folders():
+    import folder_paths
+
+    return {
+        "temp": folder_paths.get_temp_directory(),
+        "input": folder_paths.get_input_directory(),
+        "output": folder_paths.get_output_directory(),
+    }
+
+
+def _split(values):
+    out = []
+    for value in values:
+        out.extend(v for v in value.split(",") if v)
+    return out
+
+
+def _not_modified(request, etag, newest_ns):
+    import email.utils
+
+    match = request.headers.get("If-None-Match")
+    if match is not None:
+        return etag in [m.strip() for m in match.split(",")] or match.strip() == "*"
+    since = request.headers.get("If-Modified-Since")
+    if since and newest_ns:
+        try:
+            since_ts = email.utils.parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return newest_ns // 1_000_000_000 <= since_ts
+    return False
+
+
+def _bundle(request):
+    """
+    (status, body, headers) for a bundle request, run off the event loop.
+    """
+    import email.utils
+
+    from .rgbyp_bundle import META_PARTS, bundle_etag, collect, pack
+
+    q = request.query
+    parts = _split(q.getall("parts", [])) or list(META_PARTS)
+    args = dict(
+        meta_name=q.get("meta") or None,
+        parts=parts,
+        files=q.getall("file", []),
+        have=_split(q.getall("have", [])),
+        pyramid=q.get("pyramid") == "1",
+        bodies=q.get("head") != "1",
+    )
+    for attempt in range(BUNDLE_RETRIES):
+        header, paths, newest = collect(_folders(), **args)
+        etag = bundle_etag(header)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if newest:
+            headers["Last-Modified"] = email.utils.formatdate(newest / 1e9, usegmt=True)
+        if _not_modified(request, etag, newest):
+            return 304, None, headers
+        try:
+            return 200, pack(header, paths), headers
+        except OSError:
+            # a file was replaced while reading it: describe the new one
+            if attempt == BUNDLE_RETRIES - 1:
+                raise
+
+
+def _upload_check(payload):
+    from .rgbyp_uploads import check_upload
+
+    folders = _folders()
+    results = []
+    for entry in payload.get("files") or []:
+        how = check_upload(
+            folders,
+            entry.get("target"),
+            entry.get("sha256"),
+            entry.get("size"),
+            entry.get("sources") or (),
+        )
+        results.append({"target": entry.get("target"), "present": how is not None, "how": how})
+    return {"files": results}
+
+
+def register_routes():
+    """
+    Add the routes to PromptServer.instance once. Returns True when they are registered.
+    """
+    global _registered
+    if _registered:
+        return True
+
+    server = sys.modules.get("server")
+    instance = getattr(getattr(server, "PromptServer", None), "instance", None)
+    if instance is None:
+        return False
+
+    import asyncio
+    import re
+
+    from aiohttp import web
+
+    routes = instance.routes
+
+    @routes.get("/rgbyp/pyramid/{sha}")
+    async def pyramid_info(request):
+        try:
+            path = os.path.join(_pyramid_dir(request.match_info["sha"]), "info.json")
+        except ValueError:
+            return web.Response(status=400)
+        return _file_response(web, path)
+
+    @routes.get("/rgbyp/pyramid/{sha}/{level}/{tile}")
+    async def pyramid_tile(request):
+        level = request.match_info["level"]
+        tile = request.match_info["tile"]
+        if not level.isdigit() or not re.match(TILE_PATTERN, tile):
+            return web.Response(status=400)
+        try:
+            path = os.path.join(_pyramid_dir(request.match_info["sha"]), level, tile)
+        except ValueError:
+            return web.Response(status=400)
+        return _file_response(web, path)
+
+    @routes.get("/rgbyp/bundle")
+    async def bundle(request):
+        loop = asyncio.get_running_loop()
+        try:
+            status, body, headers = await loop.run_in_executor(None, _bundle, request)
+        except ValueError as e:
+            return web.Response(status=400, text=str(e))
+        except OSError as e:
+            print(f"[RGBYP] ERROR building bundle: {e}")
+            return web.Response(status=503)
+        if status == 304:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/octet-stream", headers=headers)
+
+    @routes.post("/rgbyp/upload/check")
+    async def upload_check(request):
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.Response(status=400, text="invalid json")
+        if not isinstance(payload, dict):
+            return web.Response(status=400, text="invalid json")
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(None, _upload_check, payload)
+        except (ValueError, TypeError, AttributeError) as e:
+            return web.Response(status=400, text=str(e))
+        except OSError as e:
+            print(f"[RGBYP] ERROR checking upload: {e}")
+            return web.Response(status=503)
+        return web.json_response(result)
+
+    _registered = True
+    return True
@@ -0,0 +1,225 @@
+"""
+Safe reads and writes of the JSON state files in the ComfyUI temp folder.
+
+The Bridge / LoadImage state JSONs are written by the nodes (possibly from
+several executor processes sharing one temp folder) and by the JS editor,
+which uploads whole files through /upload/image. Rules:
+
+    - every file the nodes write goes to a temp name first and is renamed
+      into place (replace_atomically), so nobody ever reads half a file
+    - read_json() retries a few times when it finds a file that is still
+      being uploaded (unparsable JSON)
+    - update_json() is a read-merge-write under a per-file lock
+      (rgbyp_locks/<file>.lock next to the file, flock / msvcrt), so node
+      processes never interleave.
+      The editor does not take the lock. Before renaming, the file is
+      compared with what was read (mtime + size). If it changed, the merge
+      runs again on the new content (compare-and-swap)
+
+Merging is three-way, per key, between what the node read (base), what it
+wants to write (new) and what is on disk now:
+
+    - a key only the node changed      → node value
+    - a key only somebody else changed → disk value
+    - a key both changed               → EDITOR_KEYS: the disk value (the
+      editor wins on mask / composite, which it draws and bakes itself);
+      any other key (size, original): the node value, because the node
+      sees the actual input image
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+# keys owned by the editor: a concurrent editor write wins
+EDITOR_KEYS = ("mask", "composite")
+
+READ_RETRIES = 5
+RETRY_DELAY = 0.02
+CAS_RETRIES = 5
+
+# lock files live in one folder next to the locked files instead of
+# piling up beside every state JSON
+LOCK_DIR = "rgbyp_locks"
+
+_MISSING = object()
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextlib.contextmanager
+def replace_atomically(path):
+    """
+    Yields a temp path next to path. After the block the temp file
+    replaces path in one rename; on error it is removed.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _dump(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_json_atomic(path, data):
+    with replace_atomically(path) as tmp_path:
+        _dump(tmp_path, data)
+
+
+def file_stamp(path):
+    """
+    (mtime_ns, size) of path, None if it does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def read_json(path):
+    """
+    Returns (data, stamp): data is the parsed dict (None if the file is
+    missing or stays unreadable), stamp is file_stamp() of what was read.
+    """
+    for attempt in range(READ_RETRIES):
+        stamp = file_stamp(path)
+        if stamp is None:
+            return None, None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data, stamp
+            return None, stamp
+        except FileNotFoundError:
+            return None, None
+        except (ValueError, OSError) as e:
+            # most likely an upload still in progress
+            if attempt == READ_RETRIES - 1:
+                print(f"[RGBYP] ERROR reading state json '{path}': {e}")
+                return None, stamp
+            time.sleep(RETRY_DELAY * (attempt + 1))
+    return None, None
+
+
+def _thread_lock(path):
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.Lock()
+        return lock
+
+
+def lock_path(path):
+    """
+    Lock file of path: <folder>/rgbyp_locks/<name>.lock. The lock files are
+    kept (unlinking a flock file lets a waiting process lock a stale inode).
+    """
+    folder, name = os.path.split(os.path.abspath(path))
+    lock_dir = os.path.join(folder, LOCK_DIR)
+    os.makedirs(lock_dir, exist_ok=True)
+    return os.path.join(lock_dir, f"{name}.lock")
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Exclusive lock for path across threads and processes on this host.
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    with _thread_lock(key):
+        fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(RETRY_DELAY)
+                try:
+                    yield
+                finally:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+def merge_state(base, new, disk, editor_keys=EDITOR_KEYS):
+    """
+    Three-way merge of one state dict, see the module docstring.
+    """
+    if disk is None:
+        return dict(new)
+    base = base or {}
+    merged = dict(disk)
+    for key, value in new.items():
+        b = base.get(key, _MISSING)
+        d = disk.get(key, _MISSING)
+        if d == b or d == value:
+            merged[key] = value
+        elif value == b:
+            continue
+        elif key not in editor_keys:
+            merged[key] = value
+    return merged
+
+
+def update_json(path, base, new, editor_keys=EDITOR_KEYS):
+    """
+    Write new into the state file at path, merged with whatever was written
+    since base was read (base None: the file did not exist). Returns the
+    merged dict that was written.
+    """
+    with file_lock(path):
+        for _ in range(CAS_RETRIES):
+            disk, stamp = read_json(path)
+            merged = merge_state(base, new, disk, editor_keys)
+            if merged == disk:
+                return merged
+
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                _dump(tmp_path, merged)
+                if file_stamp(path) != stamp:
+                    # written meanwhile (editor upload): merge again
+                    continue
+                os.replace(tmp_path, path)
+                return merged
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        # the file keeps changing: merge with the latest content once more
+        print(f"[RGBYP] WARNING: state json '{path}' keeps changing, writing merged state")
+        disk, _ = read_json(path)
+        merged = merge_state(base, new, disk, editor_keys)
+        write_json_atomic(path, merged)
+        return merged
@@ -0,0 +1,495 @@
+"""
+Pluggable storage for RGBYP mask artifacts (state JSONs, masks, originals,
+composites, saved masks), so several ComfyUI workers can share them.
+
+The browser still reads these files from the worker's own temp / input
+folders through /view, so the local folders stay where the files live. They
+act as a read-through cache of a shared store:
+
+    fetch(path) / fetch_many(paths)
+        before reading: looks the files up in the store (batched metadata
+        requests per folder), downloads the ones that are missing
+        locally or changed remotely, and uploads local files that were
+        changed since the last sync (the editor uploads to the worker that
+        serves the UI). Returns the local path if the file exists afterwards.
+    publish(path)
+        after writing: uploads the local file.
+    remove(path)
+        after deleting the local file: deletes it from the store.
+
+Only paths inside the ComfyUI temp / input / output folders are shared, under
+the keys "temp/...", "input/...", "output/...". Anything else stays local.
+
+The backend is chosen with the RGBYP_STORAGE environment variable:
+
+    (empty) / local         files stay on this worker (default, no overhead)
+    dir:/mnt/shared/rgbyp   a directory shared by all workers (NFS, SMB, ...)
+    s3://bucket/prefix      an S3 compatible object store (needs boto3);
+                            RGBYP_S3_ENDPOINT for MinIO / R2 / ...
+    fake-s3:/path           a local stand-in for S3 with the same code path,
+                            for tests and development
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import threading
+
+from .rgbyp_state import replace_atomically
+
+
+STORAGE_ENV = "RGBYP_STORAGE"
+S3_ENDPOINT_ENV = "RGBYP_S3_ENDPOINT"
+
+COPY_CHUNK = 1 << 20
+
+# S3Store.stat_many: up to this many keys of one folder are looked up with
+# one HEAD each, more with a listing narrowed to their common name prefix
+S3_HEAD_KEYS = 4
+
+
+def _local_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# ---------- stores (remote side) ----------
+
+
+class DirectoryStore:
+    """
+    Objects as files below root, e.g. on a network share.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def __repr__(self):
+        return f"DirectoryStore('{self.root}')"
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    @staticmethod
+    def _meta(st):
+        return {"etag": f"{st.st_mtime_ns:x}-{st.st_size:x}", "size": st.st_size}
+
+    def stat_many(self, keys):
+        """
+        {key: {"etag", "size"} or None}, one directory scan per folder.
+        """
+        result = {key: None for key in keys}
+        groups = {}
+        for key in keys:
+            parent, _, name = key.rpartition("/")
+            groups.setdefault(parent, {})[name] = key
+        for parent, names in groups.items():
+            folder = self._path(parent) if parent else self.root
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        key = names.get(entry.name)
+                        if key is not None and entry.is_file():
+                            result[key] = self._meta(entry.stat())
+            except FileNotFoundError:
+                pass
+        return result
+
+    def put(self, key, src_path):
+        dst = self._path(key)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        with replace_atomically(dst) as tmp_path:
+            shutil.copyfile(src_path, tmp_path)
+        return self._meta(os.stat(dst))
+
+    def get(self, key, dst_path):
+        src = self._path(key)
+        try:
+            st = os.stat(src)
+            with replace_atomically(dst_path) as tmp_path:
+                shutil.copyfile(src, tmp_path)
+        except FileNotFoundError:
+            return None
+        return self._meta(st)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Store:
+    """
+    Objects in an S3 compatible bucket. client: a boto3 S3 client (created
+    on first use when None) or anything with the same methods (FakeS3Client).
+    """
+
+    def __init__(self, bucket, prefix="", client=None, endpoint_url=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client = client
+        self._endpoint_url = endpoint_url
+        self._client_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"S3Store('{self.bucket}', '{self.prefix}')"
+
+    @property
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                try:
+                    import boto3
+                except ImportError:
+                    raise RuntimeError(f"{STORAGE_ENV}=s3://... needs boto3 (pip install boto3)")
+                self._client = boto3.client("s3", endpoint_url=self._endpoint_url or None)
+            return self._client
+
+    def _key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    @staticmethod
+    def _missing(e):
+        code = str(getattr(e, "response", {}).get("Error", {}).get("Code", ""))
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _head(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception as e:
+            if not self._missing(e):
+                raise
+            return None
+        return {"etag": head["ETag"], "size": head["ContentLength"]}
+
+    def stat_many(self, keys):
+        """
+        {key: {"etag", "size"} or None}. A few keys of one folder are looked
+        up with one HEAD each. More keys are looked up with one listing (plus
+        pagination) of the objects starting with their common name prefix,
+        which stops after the last wanted key, so a big folder is not listed
+        as a whole.
+        """
+        result = {key: None for key in keys}
+        groups = {}
+        for key in keys:
+            parent = key.rpartition("/")[0]
+            groups.setdefault(parent, []).append(key)
+
+        for parent, group in groups.items():
+            if len(group) <= S3_HEAD_KEYS:
+                for key in group:
+                    result[key] = self._head(key)
+                continue
+
+            wanted = {self._key(key): key for key in group}
+            stem = os.path.commonprefix([key.rpartition("/")[2] for key in group])
+            prefix = self._key((parent + "/" if parent else "") + stem)
+            last = max(wanted)
+            kwargs = {"Bucket": self.bucket, "Prefix": prefix, "Delimiter": "/"}
+            while True:
+                page = self.client.list_objects_v2(**kwargs)
+                done = False
+                for obj in page.get("Contents", []):
+                    key = wanted.get(obj["Key"])
+                    if key is not None:
+                        result[key] = {"etag": obj["ETag"], "size": obj["Size"]}
+                    # listings are sorted by key
+                    done = done or obj["Key"] >= last
+                if done or not page.get("IsTruncated"):
+                    break
+                kwargs["ContinuationToken"] = page["NextContinuationToken"]
+        return result
+
+    def put(self, key, src_path):
+        with open(src_path, "rb") as f:
+            resp = self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=f)
+        return {"etag": resp["ETag"], "size": os.path.getsize(src_path)}
+
+    def get(self, key, dst_path):
+        try:
+            resp = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except Exception as e:
+            if self._missing(e):
+                return None
+            raise
+        body = resp["Body"]
+        with replace_atomically(dst_path) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                for chunk in iter(lambda: body.read(COPY_CHUNK), b""):
+                    f.write(chunk)
+        return {"etag": resp["ETag"], "size": resp.get("ContentLength", os.path.getsize(dst_path))}
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+class FakeS3Error(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeS3Client:
+    """
+    Stand-in for a boto3 S3 client with the calls S3Store makes, keeping the
+    objects as files below root/<bucket>/. ETags are MD5s as in S3.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split("/"))
+
+    def _etag(self, path):
+        h = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+                h.update(chunk)
+        return f'"{h.hexdigest()}"'
+
+    def put_object(self, Bucket, Key, Body):
+        self._count("put_object")
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = Body.read() if hasattr(Body, "read") else bytes(Body)
+        with replace_atomically(path) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        return {"ETag": self._etag(path)}
+
+    def head_object(self, Bucket, Key):
+        self._count("head_object")
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise FakeS3Error("404")
+        return {"ETag": self._etag(path), "ContentLength": os.path.getsize(path)}
+
+    def get_object(self, Bucket, Key):
+        self._count("get_object")
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise FakeS3Error("NoSuchKey")
+        with open(path, "rb") as f:
+            data = f.read()
+        return {"Body": io.BytesIO(data), "ETag": self._etag(path), "ContentLength": len(data)}
+
+    def delete_object(self, Bucket, Key):
+        self._count("delete_object")
+        try:
+            os.remove(self._path(Bucket, Key))
+        except FileNotFoundError:
+            pass
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix="", Delimiter="", ContinuationToken=None):
+        self._count("list_objects_v2")
+        parent, _, _ = Prefix.rpartition("/")
+        folder = self._path(Bucket, parent) if parent else os.path.join(self.root, Bucket)
+        contents = []
+        try:
+            for name in sorted(os.listdir(folder)):
+                path = os.path.join(folder, name)
+                key = f"{parent}/{name}" if parent else name
+                if os.path.isfile(path) and key.startswith(Prefix) and not name.endswith(".tmp"):
+                    contents.append({"Key": key, "ETag": self._etag(path), "Size": os.path.getsize(path)})
+        except FileNotFoundError:
+            pass
+        return {"Contents": contents, "IsTruncated": False}
+
+
+# ---------- local folders mirrored to a store ----------
+
+
+class LocalStorage:
+    """
+    Default: nothing is shared, every call is a no-op.
+    """
+
+    shared = False
+
+    def fetch(self, path):
+        return path if path and os.path.isfile(path) else None
+
+    def fetch_many(self, paths):
+        return {p: self.fetch(p) for p in paths if p}
+
+    def publish(self, path):
+        pass
+
+    def remove(self, path):
+        pass
+
+
+class MirroredStorage(LocalStorage):
+    """
+    Local temp / input / output folders backed by a shared store.
+    roots: {"temp": dir, ...}; None → the ComfyUI folders (resolved on first use).
+    """
+
+    shared = True
+
+    def __init__(self, store, roots=None):
+        self.store = store
+        self._roots = roots
+        self._lock = threading.Lock()
+        # local path -> (remote etag, local stamp) at the last sync
+        self._synced = {}
+
+    def __repr__(self):
+        return f"MirroredStorage({self.store!r})"
+
+    @property
+    def roots(self):
+        if self._roots is None:
+            import folder_paths
+
+            self._roots = {
+                "temp": folder_paths.get_temp_directory(),
+                "input": folder_paths.get_input_directory(),
+                "output": folder_paths.get_output_directory(),
+            }
+        return self._roots
+
+    def key_for(self, path):
+        """
+        Store key of a local path, None for paths outside the shared folders.
+        """
+        if not path:
+            return None
+        path = os.path.abspath(path)
+        for kind, root in self.roots.items():
+            root = os.path.abspath(root)
+            try:
+                rel = os.path.relpath(path, root)
+            except ValueError:
+                continue
+            if rel != "." and not rel.startswith(".." + os.sep) and rel != "..":
+                return kind + "/" + rel.replace(os.sep, "/")
+        return None
+
+    def _record(self, path, meta):
+        with self._lock:
+            self._synced[path] = (meta["etag"], _local_stamp(path))
+
+    def _upload(self, path, key):
+        meta = self.store.put(key, path)
+        self._record(path, meta)
+
+    def fetch_many(self, paths):
+        paths = [os.path.abspath(p) for p in paths if p]
+        keys = {p: self.key_for(p) for p in paths}
+        shared = [p for p in paths if keys[p]]
+        try:
+            metas = self.store.stat_many([keys[p] for p in shared]) if shared else {}
+        except Exception as e:
+            print(f"[RGBYP] ERROR looking up shared files, using local copies: {e}")
+            metas = {}
+            shared = []
+
+        for path in shared:
+            key = keys[path]
+            meta = metas.get(key)
+            with self._lock:
+                synced = self._synced.get(path)
+            local = _local_stamp(path)
+            if local is None:
+                changed_here = False
+            elif synced is None:
+                changed_here = meta is None
+            else:
+                changed_here = local != synced[1]
+            try:
+                if changed_here:
+                    # new or changed on this worker (editor upload) → local wins
+                    self._upload(path, key)
+                elif meta is not None and (local is None or synced is None or synced[0] != meta["etag"]):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    got = self.store.get(key, path)
+                    if got is not None:
+                        self._record(path, got)
+            except Exception as e:
+                print(f"[RGBYP] ERROR syncing '{key}': {e}")
+
+        return {p: (p if os.path.isfile(p) else None) for p in paths}
+
+    def fetch(self, path):
+        if not path:
+            return None
+        return self.fetch_many([path])[os.path.abspath(path)]
+
+    def publish(self, path):
+        key = self.key_for(path)
+        if key is None or not os.path.isfile(path):
+            return
+        try:
+            self._upload(os.path.abspath(path), key)
+        except Exception as e:
+            print(f"[RGBYP] ERROR publishing '{key}': {e}")
+
+    def remove(self, path):
+        key = self.key_for(path)
+        if key is None:
+            return
+        with self._lock:
+            self._synced.pop(os.path.abspath(path), None)
+        try:
+            self.store.delete(key)
+        except Exception as e:
+            print(f"[RGBYP] ERROR removing '{key}': {e}")
+
+
+def storage_from_spec(spec, endpoint_url=None):
+    spec = (spec or "").strip()
+    if not spec or spec == "local":
+        return LocalStorage()
+    if spec.startswith("dir:"):
+        return MirroredStorage(DirectoryStore(spec[len("dir:") :]))
+    if spec.startswith("fake-s3:"):
+        return MirroredStorage(S3Store("rgbyp", client=FakeS3Client(spec[len("fake-s3:") :])))
+    if spec.startswith("s3://"):
+        bucket, _, prefix = spec[len("s3://") :].partition("/")
+        return MirroredStorage(S3Store(bucket, prefix, endpoint_url=endpoint_url))
+    raise ValueError(f"unknown {STORAGE_ENV} '{spec}' (use local, dir:<path>, s3://bucket/prefix or fake-s3:<path>)")
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """
+    The configured storage (RGBYP_STORAGE), created once per process.
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            try:
+                _storage = storage_from_spec(
+                    os.environ.get(STORAGE_ENV, ""), os.environ.get(S3_ENDPOINT_ENV, "")
+                )
+            except Exception as e:
+                print(f"[RGBYP] ERROR: {e}, files stay local")
+                _storage = LocalStorage()
+        return _storage
+
+
+def set_storage(storage):
+    """
+    Replace the storage of this process (None → read RGBYP_STORAGE again).
+    """
+    global _storage
+    with _storage_lock:
+        _storage = storage
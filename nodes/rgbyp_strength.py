@@ -0,0 +1,283 @@
+"""
+Typed, cached strength settings for RGBYP nodes.
+
+strength_settings is the JSON string built by RGBYPMaskStrength:
+
+    {"ak_id": "mask_strength_settings", "red_strength": 0.5, ...}
+
+Every *_strength value may also be a per-frame schedule:
+
+    0.5                      constant
+    [0.2, 0.4, 0.6]          one value per frame, the last one is held
+    {"0": 0.2, "15": 1.0}    keyframes, linear in between, held outside
+    "0.2, 0.4, 0.6"          list as text
+    "0:0.2, 15:1.0"          keyframes as text
+
+parse_strength_settings() turns the JSON into a StrengthSettings object once
+per distinct string (LRU cache), and StrengthSettings.resolve(batch) gives a
+(6, B) tensor (R, G, B, Y, P, combined), also cached, that the splitters
+broadcast as (5, B, 1, 1) over their stacked masks.
+
+Grow / blur can also be set per color, as plain integers (not schedules,
+every frame of a color is filtered alike):
+
+    {"red_grow": 16, "red_blur": 40, "combined_blur": 8, ...}
+
+StrengthSettings.grow_blur(grow, blur) gives the six (grow, blur) pairs,
+colors without their own values keep the given defaults.
+"""
+
+import json
+from functools import lru_cache
+
+import torch
+
+
+AK_ID = "mask_strength_settings"
+
+STRENGTH_KEYS = (
+    "red_strength",
+    "green_strength",
+    "blue_strength",
+    "yellow_strength",
+    "pink_strength",
+    "combined_strength",
+)
+
+# red, green, blue, yellow, pink, combined
+COLOR_NAMES = tuple(k[: -len("_strength")] for k in STRENGTH_KEYS)
+GROW_KEYS = tuple(f"{n}_grow" for n in COLOR_NAMES)
+BLUR_KEYS = tuple(f"{n}_blur" for n in COLOR_NAMES)
+
+
+def _clamp01(v):
+    return min(max(float(v), 0.0), 1.0)
+
+
+def parse_schedule(v):
+    """
+    One strength value → ("const", value) / ("list", values) / ("keys", [(frame, value), ...]).
+    Returns None if v is not a valid strength.
+    """
+    try:
+        if isinstance(v, bool):
+            return None
+        if isinstance(v, (int, float)):
+            return ("const", float(v))
+
+        if isinstance(v, (list, tuple)):
+            values = [float(x) for x in v]
+            return ("list", values) if values else None
+
+        if isinstance(v, dict):
+            keys = sorted((int(k), float(x)) for k, x in v.items())
+            return ("keys", keys) if keys else None
+
+        if isinstance(v, str):
+            parts = [p.strip() for p in v.replace(";", ",").split(",") if p.strip()]
+            if not parts:
+                return None
+            if any(":" in p for p in parts):
+                keys = {}
+                for p in parts:
+                    frame, value = p.split(":", 1)
+                    keys[int(frame.strip())] = float(value.strip())
+                return ("keys", sorted(keys.items()))
+            values = [float(p) for p in parts]
+            if len(values) == 1:
+                return ("const", values[0])
+            return ("list", values)
+    except Exception:
+        return None
+    return None
+
+
+def _parse_pixels(v):
+    """
+    Grow / blur value → int >= 0, None if v is not a valid value.
+    """
+    if v is None or isinstance(v, bool):
+        return None
+    try:
+        return max(int(round(float(v))), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_grow_blur_text(text):
+    """
+    One line per color, "red: grow, blur" ("red: 16, 40"; "pink: 8" sets only
+    grow, "blue: , 20" only blur) → {color index: (grow or None, blur or None)}.
+    Unknown colors and invalid lines are reported and skipped.
+    """
+    result = {}
+    if not isinstance(text, str):
+        return result
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or ":" not in line:
+            continue
+        name, spec = line.split(":", 1)
+        name = name.strip().lower()
+        if name.endswith("_mask"):
+            name = name[: -len("_mask")]
+        if name not in COLOR_NAMES:
+            print(f"[rgbyp_strength] unknown color in grow / blur: '{line}'")
+            continue
+        values = [v.strip() for v in spec.replace(";", ",").split(",")]
+        grow = _parse_pixels(values[0]) if values and values[0] else None
+        blur = _parse_pixels(values[1]) if len(values) > 1 and values[1] else None
+        if grow is None and blur is None:
+            print(f"[rgbyp_strength] invalid grow / blur: '{line}'")
+            continue
+        result[COLOR_NAMES.index(name)] = (grow, blur)
+    return result
+
+
+def resolve_grow_blur(overrides, grow, blur):
+    """
+    {index: (grow or None, blur or None)} + defaults → six (grow, blur) int pairs.
+    """
+    grow = _parse_pixels(grow) or 0
+    blur = _parse_pixels(blur) or 0
+    pairs = []
+    for i in range(len(COLOR_NAMES)):
+        g, b = (overrides or {}).get(i, (None, None))
+        pairs.append((grow if g is None else g, blur if b is None else b))
+    return pairs
+
+
+def schedule_to_json(schedule):
+    """
+    Inverse of parse_schedule(), for writing into strength_settings.
+    """
+    kind, data = schedule
+    if kind == "const":
+        return data
+    if kind == "list":
+        return list(data)
+    return {str(frame): value for frame, value in data}
+
+
+def _resolve_schedule(schedule, batch):
+    kind, data = schedule
+    if kind == "const":
+        return [data] * batch
+    if kind == "list":
+        return [data[min(i, len(data) - 1)] for i in range(batch)]
+
+    out = []
+    for i in range(batch):
+        if i <= data[0][0]:
+            out.append(data[0][1])
+            continue
+        if i >= data[-1][0]:
+            out.append(data[-1][1])
+            continue
+        for (f0, v0), (f1, v1) in zip(data, data[1:]):
+            if f0 <= i <= f1:
+                t = (i - f0) / float(f1 - f0)
+                out.append(v0 + (v1 - v0) * t)
+                break
+    return out
+
+
+class StrengthSettings:
+    """
+    Parsed strength_settings. schedules: key → schedule (see parse_schedule),
+    keys that are missing or invalid fall back to the default of resolve().
+    grow_blur_overrides: color index → (grow or None, blur or None).
+    """
+
+    def __init__(self, schedules=None, grow_blur_overrides=None):
+        self.schedules = dict(schedules or {})
+        self.grow_blur_overrides = dict(grow_blur_overrides or {})
+        self._resolved = {}
+
+    def grow_blur(self, grow=0, blur=0):
+        """
+        Six (grow, blur) pairs (red ... combined); grow / blur for colors
+        without their own values.
+        """
+        return resolve_grow_blur(self.grow_blur_overrides, grow, blur)
+
+    def _rows(self, batch, default):
+        rows = []
+        for name in STRENGTH_KEYS:
+            schedule = self.schedules.get(name)
+            if schedule is None:
+                rows.append([default] * batch)
+            else:
+                rows.append(_resolve_schedule(schedule, batch))
+        return rows
+
+    def resolve(self, batch, default=1.0):
+        """
+        (6, batch) float32 CPU tensor, clamped to [0..1].
+        Rows: red, green, blue, yellow, pink, combined.
+        """
+        batch = max(int(batch), 1)
+        key = (batch, float(default))
+        cached = self._resolved.get(key)
+        if cached is not None:
+            return cached
+
+        t = torch.tensor(self._rows(batch, default), dtype=torch.float32).clamp_(0.0, 1.0)
+        self._resolved[key] = t
+        return t
+
+    def frame(self, index, default=1.0):
+        """
+        The 6 strengths of one frame as python floats.
+        """
+        index = max(int(index), 0)
+        return tuple(_clamp01(row[index]) for row in self._rows(index + 1, default))
+
+
+# used when no (valid) strength_settings are connected: every strength is 1.0
+NO_SETTINGS = StrengthSettings()
+
+
+@lru_cache(maxsize=64)
+def _parse_cached(text):
+    try:
+        data = json.loads(text)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or str(data.get("ak_id", "")).strip() != AK_ID:
+        return None
+
+    schedules = {}
+    for name in STRENGTH_KEYS:
+        schedule = parse_schedule(data.get(name))
+        if schedule is not None:
+            schedules[name] = schedule
+
+    overrides = {}
+    for i, (grow_key, blur_key) in enumerate(zip(GROW_KEYS, BLUR_KEYS)):
+        pair = (_parse_pixels(data.get(grow_key)), _parse_pixels(data.get(blur_key)))
+        if pair != (None, None):
+            overrides[i] = pair
+    return StrengthSettings(schedules, overrides)
+
+
+def parse_strength_settings(v):
+    """
+    strength_settings (JSON string, dict or StrengthSettings) → StrengthSettings,
+    or None when v is empty / not mask strength settings. Parsed once per string.
+    """
+    if v is None:
+        return None
+    if isinstance(v, StrengthSettings):
+        return v
+    if isinstance(v, dict):
+        try:
+            v = json.dumps(v, sort_keys=True)
+        except Exception:
+            return None
+    if not isinstance(v, str):
+        return None
+    v = v.strip()
+    if not v:
+        return None
+    return _parse_cached(v)
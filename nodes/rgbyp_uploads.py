@@ -0,0 +1,96 @@
+"""
+Upload-if-absent for files the editor writes, served by /rgbyp/upload/check.
+
+The editor and the Load Mask buttons used to upload the original image to
+temp on every save, although the server wrote (or already has) exactly those
+bytes. Before uploading, the client now sends the SHA-256 and size of the
+bytes it would upload, the target file and the files it got the bytes from
+(sources). The server answers:
+
+    "same"      the target already holds these bytes, nothing to do
+    "copied"    a source holds these bytes; it was copied to the target
+    null        the client has to upload
+
+Hashes are cached per path by (mtime, size), so a check of an unchanged file
+does not read it again.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+
+from .rgbyp_bundle import resolve_file
+from .rgbyp_state import file_stamp, replace_atomically
+from .rgbyp_storage import get_storage
+
+
+HASH_CHUNK = 1 << 20
+HASH_CACHE_MAX = 256
+
+_lock = threading.Lock()
+_hash_cache = {}  # path -> (stamp, sha256)
+
+
+def file_sha256(path):
+    """
+    Hex SHA-256 of the file at path, None if it does not exist.
+    """
+    stamp = file_stamp(path)
+    if stamp is None:
+        return None
+    with _lock:
+        cached = _hash_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    sha = h.hexdigest()
+
+    with _lock:
+        if len(_hash_cache) >= HASH_CACHE_MAX:
+            _hash_cache.pop(next(iter(_hash_cache)))
+        _hash_cache[path] = (stamp, sha)
+    return sha
+
+
+def _matches(path, sha256, size):
+    stamp = file_stamp(path)
+    if stamp is None or (size is not None and stamp[1] != size):
+        return False
+    return file_sha256(path) == sha256
+
+
+def check_upload(folders, target, sha256, size=None, sources=()):
+    """
+    "same", "copied" or None (see the module docstring) for one file.
+    target and sources are "<temp|input|output>/<subfolder/name>".
+    """
+    sha256 = str(sha256 or "").lower()
+    if len(sha256) != 64:
+        raise ValueError(f"invalid sha256 '{sha256}'")
+    size = int(size) if size is not None else None
+
+    target_path = resolve_file(folders, target)
+    source_paths = [resolve_file(folders, s) for s in sources or ()]
+
+    storage = get_storage()
+    storage.fetch_many([target_path] + source_paths)
+
+    if _matches(target_path, sha256, size):
+        return "same"
+
+    for path in source_paths:
+        if path != target_path and _matches(path, sha256, size):
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            with replace_atomically(target_path) as tmp_path:
+                shutil.copyfile(path, tmp_path)
+            storage.publish(target_path)
+            return "copied"
+    return None
@@ -0,0 +1,137 @@
+"""
+numpy / PIL core of the grow / blur engine, and the process pool worker.
+
+This module imports nothing from the package (no torch either): the
+parallel backend of rgbyp_grow_blur starts its workers from a forkserver, a
+fresh single-threaded interpreter, which imports this file as the top-level
+module "rgbyp_pool_worker" (its folder is put on sys.path) and never loads
+ComfyUI, torch or CUDA. rgbyp_grow_blur uses the same functions in-process.
+"""
+
+import math
+from multiprocessing import shared_memory
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+
+def _sanitize_strength(v):
+    try:
+        v = int(v) if v is not None else 0
+    except Exception:
+        v = 0
+    return max(v, 0)
+
+
+def halo_for(grow_strength, blur_strength):
+    """
+    Number of border pixels a tile needs so that grow + blur inside the tile
+    does not see the tile edge. PIL's GaussianBlur is an extended box blur
+    whose support is about 3 * radius on each side.
+    """
+    gs = _sanitize_strength(grow_strength)
+    bs = _sanitize_strength(blur_strength)
+    halo = gs
+    if bs > 0:
+        halo += int(math.ceil(bs * 3.0)) + 2
+    return halo
+
+
+def iter_tiles(h, w, tile_size, halo):
+    """
+    Yields (y0, y1, x0, x1, hy0, hy1, hx0, hx1):
+        y0..y1 / x0..x1     — core tile region in the frame
+        hy0..hy1 / hx0..hx1 — core region extended by the halo, clipped to the frame
+    """
+    ts = max(int(tile_size), 1)
+    for y0 in range(0, h, ts):
+        y1 = min(y0 + ts, h)
+        hy0 = max(y0 - halo, 0)
+        hy1 = min(y1 + halo, h)
+        for x0 in range(0, w, ts):
+            x1 = min(x0 + ts, w)
+            hx0 = max(x0 - halo, 0)
+            hx1 = min(x1 + halo, w)
+            yield y0, y1, x0, x1, hy0, hy1, hx0, hx1
+
+
+def float_to_u8(arr):
+    """float [0..1] numpy array -> uint8, same rounding as the PIL path."""
+    arr = np.clip(arr, 0.0, 1.0)
+    return (arr * 255.0 + 0.5).astype(np.uint8)
+
+
+def grow_blur_u8(img_u8, grow_strength=0, blur_strength=0):
+    """
+    Apply grow + blur to a single 2D uint8 frame. Returns uint8 (H, W).
+    """
+    gs = _sanitize_strength(grow_strength)
+    bs = _sanitize_strength(blur_strength)
+
+    pil = Image.fromarray(img_u8, mode="L")
+
+    if gs > 0:
+        k = gs * 2 + 1
+        pil = pil.filter(ImageFilter.MaxFilter(size=k))
+
+    if bs > 0:
+        pil = pil.filter(ImageFilter.GaussianBlur(radius=bs))
+
+    return np.array(pil, dtype=np.uint8)
+
+
+def grow_blur_u8_tiled(img_u8, grow_strength=0, blur_strength=0, tile_size=0, out=None):
+    """
+    Tiled version of grow_blur_u8(). out may be img_u8 itself: every tile reads
+    its halo region before anything is written, so tiles are written to a
+    separate buffer first when working in place.
+    """
+    h, w = img_u8.shape
+
+    if tile_size is None or int(tile_size) <= 0 or (h <= tile_size and w <= tile_size):
+        res = grow_blur_u8(img_u8, grow_strength, blur_strength)
+        if out is None:
+            return res
+        out[...] = res
+        return out
+
+    src = img_u8.copy() if out is not None and np.shares_memory(out, img_u8) else img_u8
+    if out is None:
+        out = np.empty_like(img_u8)
+
+    halo = halo_for(grow_strength, blur_strength)
+    for y0, y1, x0, x1, hy0, hy1, hx0, hx1 in iter_tiles(h, w, tile_size, halo):
+        res = grow_blur_u8(
+            np.ascontiguousarray(src[hy0:hy1, hx0:hx1]), grow_strength, blur_strength
+        )
+        out[y0:y1, x0:x1] = res[y0 - hy0 : y1 - hy0, x0 - hx0 : x1 - hx0]
+
+    return out
+
+
+def attach_shared(name):
+    """
+    Attach to an existing shared memory block owned by the parent.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # python < 3.13 has no "track" argument. Pool workers share the
+        # parent's resource tracker (forkserver passes its fd on), where the
+        # block is already registered, so registering it again is a no-op
+        # and the parent's unlink cleans up.
+        return shared_memory.SharedMemory(name=name)
+
+
+def grow_blur_shared_worker(args):
+    name, shape, index, grow_strength, blur_strength, tile_size = args
+    shm = attach_shared(name)
+    try:
+        frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        grow_blur_u8_tiled(
+            frames[index], grow_strength, blur_strength, tile_size=tile_size, out=frames[index]
+        )
+        del frames
+    finally:
+        shm.close()
+    return index